@@ -0,0 +1,201 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from starlette.responses import JSONResponse
+
+from app.config import settings
+
+# not rate limited: probes and docs must keep working while clients are throttled
+_EXEMPT_PREFIXES = ("/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+
+class OverloadedError(ValueError):
+    """Raised instead of queueing for Supabase when the upstream queue is full or too slow."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Too many requests waiting for Supabase, retry later")
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token bucket per client: ``rate`` requests per second, bursts of up to ``burst``.
+
+    At most ``max_clients`` buckets are kept; the least recently seen client
+    is forgotten first, which only resets it to a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    def acquire(self, client: str) -> float:
+        """Take a token for ``client``; return 0.0, or the seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = [float(self.burst), now]
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+            bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            self.allowed += 1
+            return 0.0
+        self.limited += 1
+        return (1.0 - bucket[0]) / self.rate
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self.allowed = self.limited = 0
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+        }
+
+
+class UpstreamGate:
+    """At most ``limit`` Supabase calls at once; further callers wait in line, first come first served.
+
+    A caller is turned away with :class:`OverloadedError` at once when
+    ``max_queue`` callers are already waiting, and after ``queue_timeout``
+    seconds in line otherwise. Shedding early keeps the wait of admitted
+    calls short, instead of letting the queue, and with it every request's
+    latency, grow without bound under overload. Only touched from the event
+    loop thread, so it needs no lock.
+    """
+
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._waiters: deque[asyncio.Future] = deque()
+        self.clear()
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            raise OverloadedError(self.queue_timeout)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        timeout = self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over just as the wait ended
+                if isinstance(exc, TimeoutError):
+                    return
+                self.release()
+                raise
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(exc, TimeoutError):
+                self.shed += 1
+                raise OverloadedError(self.queue_timeout) from None
+            raise
+
+    def release(self) -> None:
+        # hand the slot straight to the next waiter so a newcomer cannot jump the line
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None):
+        await self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def clear(self) -> None:
+        self._waiters.clear()
+        self.active = 0
+        self.queued = 0
+        self.shed = 0
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "queued": self.queued,
+            "shed": self.shed,
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+        }
+
+
+rate_limiter = RateLimiter(settings.rate_limit_per_second, settings.rate_limit_burst, settings.rate_limit_max_clients)
+upstream_gate = UpstreamGate(
+    settings.supabase_max_concurrency, settings.upstream_max_queue, settings.upstream_queue_timeout
+)
+
+
+def client_id(scope) -> str:
+    """The client IP of a request.
+
+    API key headers are not used: the app verifies none, so a client could
+    send a new one with every request and never run out of tokens.
+    """
+    if settings.rate_limit_trust_forwarded_for:
+        forwarded = next((value for name, value in scope["headers"] if name == b"x-forwarded-for"), None)
+        if forwarded:
+            # the proxy in front of us appends the address it saw last; earlier ones are the client's to choose
+            return "ip:" + forwarded.decode("latin-1").rsplit(",", 1)[-1].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class RateLimitMiddleware:
+    """Answer ``429`` with ``Retry-After`` once a client has used up its token bucket.
+
+    Runs before the request body is read or a handler is entered, so a
+    flooding client costs little and cannot use up the Supabase quota.
+    """
+
+    def __init__(self, app, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.rate_limit_enabled
+            or scope["path"].startswith(_EXEMPT_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+        wait = self.limiter.acquire(client_id(scope))
+        if wait:
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded, retry later"},
+                status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
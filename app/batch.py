@@ -0,0 +1,49 @@
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.supabase_client import execute
+
+
+def check_unique(ids: list[str]) -> None:
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Duplicate ids in batch")
+
+
+async def insert_rows(supabase, table: str, payloads: list[dict]) -> list[dict]:
+    """Insert ``payloads`` in one multi-row statement; rows come back in input order."""
+    resp = await execute(supabase.table(table).insert(payloads))
+    rows = resp.data or []
+    if len(rows) != len(payloads):
+        raise HTTPException(status_code=500, detail="Insert failed")
+    return rows
+
+
+async def update_rows(
+    supabase,
+    table: str,
+    patches: dict[str, dict],
+    returning: Optional[str] = None,
+) -> dict[str, dict]:
+    """Apply per-row ``patches`` (keyed by id) in one ``UPDATE`` through ``update_<table>_batch``.
+
+    The merge happens in Postgres, so a row deleted or changed since the
+    client read it is neither re-inserted nor overwritten with stale values.
+    ``returning`` overrides the select list of the returned rows. Ids that
+    do not exist are left out of the result.
+    """
+    query = supabase.rpc(f"update_{table}_batch", {"patches": patches})
+    if returning is not None:
+        query = query.select(returning)
+    resp = await execute(query)
+    return {row["id"]: row for row in (resp.data or [])}
+
+
+async def delete_rows(supabase, table: str, ids: list[str]) -> set[str]:
+    """Delete ``ids`` in one statement through ``delete_<table>_batch`` and return the ids that existed.
+
+    The ids go in the request body; as an ``in.(ids)`` filter a full batch
+    would not fit in the URL.
+    """
+    resp = await execute(supabase.rpc(f"delete_{table}_batch", {"ids": ids}).select("id"))
+    return {row["id"] for row in (resp.data or [])}
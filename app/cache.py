@@ -0,0 +1,249 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from app.config import settings
+from app.resilience import breaker, is_upstream_failure, mark_stale
+from app.shared_cache import SharedCache
+from app.supabase_client import execute
+
+
+class ReadCache:
+    """TTL + LRU cache of PostgREST result rows.
+
+    Keys are tuples whose first element is the table name, so a write can
+    drop every cached query on that table with :meth:`invalidate`. Expired
+    entries are kept for another ``stale_seconds`` so :meth:`get_stale` can
+    answer reads while Supabase is unavailable.
+
+    With a ``shared`` cache, table generations are its version counters, so
+    a write in any worker invalidates this one's entries too, and a miss
+    here is looked up there before going to Supabase.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        stale_seconds: float = 0.0,
+        shared: Optional[SharedCache] = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self.shared = shared
+        # key -> (stored_at, rows, generation)
+        self._entries: OrderedDict[Hashable, tuple[float, Any, int]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_hits = 0
+        self.shared_hits = 0
+
+    def _entry(self, key: tuple, generation: int) -> Optional[tuple[float, Any, int]]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] != generation:
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key: tuple) -> tuple[bool, Any]:
+        generation = self.generation(key[0])
+        entry = self._entry(key, generation)
+        if entry is None or entry[0] + self.ttl_seconds <= time.monotonic():
+            if entry is not None and entry[0] + self.ttl_seconds + self.stale_seconds <= time.monotonic():
+                del self._entries[key]
+            if self.shared is not None:
+                found = self.shared.get(repr(key), generation)
+                if found is not None:
+                    age, rows = found
+                    self._store(key, time.monotonic() - age, rows, generation)
+                    self.hits += 1
+                    self.shared_hits += 1
+                    return True, rows
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def get_stale(self, key: tuple) -> tuple[bool, Any, float]:
+        """Return ``(found, rows, age)`` for ``key`` even if it has expired."""
+        entry = self._entry(key, self.generation(key[0]))
+        if entry is None:
+            return False, None, 0.0
+        age = time.monotonic() - entry[0]
+        if age >= self.ttl_seconds + self.stale_seconds:
+            del self._entries[key]
+            return False, None, 0.0
+        self.stale_hits += 1
+        return True, entry[1], age
+
+    def set(self, key: tuple, value: Any, generation: Optional[int] = None) -> None:
+        """Cache ``value``, read while ``key``'s table was at ``generation`` (default: now)."""
+        if generation is None:
+            generation = self.generation(key[0])
+        self._store(key, time.monotonic(), value, generation)
+        if self.shared is not None:
+            self.shared.set(repr(key), key[0], generation, value)
+
+    def _store(self, key: tuple, stored_at: float, value: Any, generation: int) -> None:
+        self._entries[key] = (stored_at, value, generation)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def generation(self, table: str) -> int:
+        if self.shared is not None:
+            return self.shared.version(table)
+        return self._generations.get(table, 0)
+
+    def invalidate(self, table: str) -> int:
+        """Drop every entry for ``table`` and return its new generation.
+
+        Bumping the table's generation also stops reads that were already in
+        flight from storing rows fetched before the write.
+        """
+        if self.shared is not None:
+            generation = self.shared.bump(table)
+        else:
+            generation = self._generations[table] = self.generation(table) + 1
+        for key in [key for key in self._entries if key[0] == table]:
+            del self._entries[key]
+        return generation
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generations.clear()
+        if self.shared is not None:
+            self.shared.clear()
+        self.hits = self.misses = self.evictions = self.stale_hits = self.shared_hits = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale_hits": self.stale_hits,
+            "shared_hits": self.shared_hits,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "stale_seconds": self.stale_seconds,
+            "shared": self.shared.stats() if self.shared is not None else None,
+        }
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key.
+
+    The call runs as its own task and every caller awaits it through
+    ``asyncio.shield``, so a caller that disconnects does not cancel the
+    upstream call for the others.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.get_running_loop().create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.calls += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def clear(self) -> None:
+        self.calls = self.coalesced = 0
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+read_cache = ReadCache(
+    settings.cache_ttl_seconds,
+    settings.cache_max_entries,
+    settings.cache_stale_seconds,
+    shared=(
+        SharedCache(settings.shared_cache_path, settings.cache_ttl_seconds, settings.shared_cache_max_entries)
+        if settings.shared_cache_path
+        else None
+    ),
+)
+read_flights = SingleFlight()
+
+
+_revalidations: dict[Hashable, asyncio.Task] = {}
+
+
+def _revalidate(key: tuple, generation: int, load: Callable[[], Awaitable[list[dict]]]) -> None:
+    """Refresh ``key`` in the background once the breaker allows a trial call."""
+    task = _revalidations.get(key)
+    if task is not None and not task.done():
+        return
+
+    async def run() -> None:
+        await asyncio.sleep(breaker.retry_after())
+        try:
+            await read_flights.do((key, generation), load)
+        except Exception:
+            pass  # still down; the next stale read schedules another attempt
+
+    def forget(done: asyncio.Task) -> None:
+        if _revalidations.get(key) is done:
+            del _revalidations[key]
+
+    task = asyncio.get_running_loop().create_task(run())
+    _revalidations[key] = task
+    task.add_done_callback(forget)
+
+
+async def fetch_rows(key: tuple, build: Callable[[], Any]) -> list[dict]:
+    """Return the rows for ``build()``'s query, served from the cache when fresh.
+
+    ``key`` must start with the table name and identify the query completely.
+    Concurrent misses for the same key share one upstream call. The flight is
+    keyed by the table's generation as well, so a read that starts after a
+    write never joins a call that started before it.
+
+    If the upstream call fails because Supabase is down (or the circuit is
+    open), the last rows cached for ``key`` are returned instead, the response
+    is marked stale, and a background refresh is scheduled.
+    """
+    if settings.cache_enabled:
+        hit, rows = read_cache.get(key)
+        if hit:
+            return rows
+    generation = read_cache.generation(key[0])
+
+    async def load() -> list[dict]:
+        rows = (await execute(build(), read=True)).data or []
+        if settings.cache_enabled and read_cache.generation(key[0]) == generation:
+            read_cache.set(key, rows, generation)
+        return rows
+
+    try:
+        if not settings.coalesce_enabled:
+            return await load()
+        return await read_flights.do((key, generation), load)
+    except Exception as exc:
+        if not settings.cache_enabled or not is_upstream_failure(exc):
+            raise
+        found, rows, age = read_cache.get_stale(key)
+        if not found:
+            raise
+        mark_stale(age)
+        _revalidate(key, generation, load)
+        return rows
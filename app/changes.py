@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Optional
+
+from app.pagination import seek
+from app.projection import select_columns
+from app.schemas.experiments import ExperimentResponse
+from app.schemas.learning import LearningGoalResponse
+from app.schemas.service import ServiceEntryResponse
+
+TOMBSTONES = "deleted_records"
+_NIL_UUID = "00000000-0000-0000-0000-000000000000"
+
+# weekly_hours is embedded from learning_goal_weekly_hours rather than stored on the goal
+GOAL_EXPRESSIONS = {"weekly_hours": "weekly_hours:learning_goal_weekly_hours(week_key,hours)"}
+GOAL_COLUMNS = select_columns(LearningGoalResponse, None, expressions=GOAL_EXPRESSIONS)
+
+MODELS = {
+    "learning_goals": LearningGoalResponse,
+    "experiments": ExperimentResponse,
+    "service_entries": ServiceEntryResponse,
+}
+
+# source -> (select list, order column, lowest id)
+SOURCES = {
+    "learning_goals": (GOAL_COLUMNS, "updated_at", _NIL_UUID),
+    "experiments": (select_columns(ExperimentResponse, None), "updated_at", _NIL_UUID),
+    "service_entries": (select_columns(ServiceEntryResponse, None), "updated_at", _NIL_UUID),
+    TOMBSTONES: ("id,table_name,row_id,deleted_at", "deleted_at", 0),
+}
+
+
+def changes_query(supabase, source: str, position: Optional[list], limit: int):
+    """Rows of ``source`` after ``position``, oldest first, with one look-ahead row."""
+    columns, column, _ = SOURCES[source]
+    query = supabase.table(source).select(columns)
+    if position is not None:
+        query = seek(query, column, position[0], position[1], desc=False)
+    return query.order(column).order("id").limit(limit + 1)
+
+
+def advance(
+    source: str, rows: list[dict], limit: int, previous: Optional[list], horizon: datetime
+) -> tuple[list[dict], Optional[list], bool]:
+    """Trim the look-ahead row and return ``(rows, next position, more)``.
+
+    ``updated_at`` is set when a transaction starts, so a write that commits
+    after this read can still land just before the last row returned. Unless
+    the page is full, the position therefore never passes ``horizon``
+    (``sync_overlap_seconds`` ago); rows newer than that are read again next
+    time instead of being skipped.
+    """
+    _, column, lowest = SOURCES[source]
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return rows, previous, False
+    last = rows[-1]
+    if not more and datetime.fromisoformat(last[column]) > horizon:
+        return rows, [horizon.isoformat(), lowest], False
+    return rows, [last[column], last["id"]], more
@@ -15,6 +15,82 @@ class Settings(BaseSettings):
 
     supabase_url: str = ""
     supabase_key: str = ""
+    supabase_max_concurrency: int = 16
+
+    # HTTP pool for PostgREST calls, built and warmed at startup
+    supabase_http2: bool = True
+    supabase_max_connections: int = 32
+    supabase_max_keepalive_connections: int = 16
+    supabase_keepalive_expiry: float = 60.0
+    supabase_connect_timeout: float = 5.0
+    supabase_read_timeout: float = 30.0
+    supabase_write_timeout: float = 30.0
+    supabase_pool_timeout: float = 10.0
+    supabase_warm_connections: int = 2
+
+    # failure handling: reads retry with jittered backoff inside a deadline,
+    # and the circuit opens after consecutive upstream failures
+    supabase_read_retries: int = 2
+    supabase_retry_backoff: float = 0.05
+    supabase_retry_backoff_max: float = 0.5
+    supabase_read_deadline: float = 5.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 10.0
+
+    # admission control: a token bucket per client IP and a
+    # line for Supabase calls beyond supabase_max_concurrency; a caller that
+    # finds the line full, or waits longer than the timeout, gets a 503
+    rate_limit_enabled: bool = True
+    rate_limit_per_second: float = 20.0
+    rate_limit_burst: int = 40
+    rate_limit_max_clients: int = 10000
+    # take the client IP from X-Forwarded-For; only behind a proxy that appends
+    # to it, otherwise every client shares the proxy's address and bucket
+    rate_limit_trust_forwarded_for: bool = False
+    upstream_max_queue: int = 64
+    upstream_queue_timeout: float = 1.0
+
+    metrics_enabled: bool = True
+
+    cache_enabled: bool = True
+    cache_ttl_seconds: float = 5.0
+    cache_max_entries: int = 1024
+    coalesce_enabled: bool = True
+    # how long expired entries are kept to answer reads while Supabase is down
+    cache_stale_seconds: float = 3600.0
+    # SQLite file shared by the uvicorn workers on one host: cached rows and
+    # per-table versions, so a write in one worker invalidates all of them
+    # (empty: each worker caches on its own)
+    shared_cache_path: str = ""
+    shared_cache_max_entries: int = 10000
+
+    graph_ttl_seconds: float = 60.0
+
+    # in-memory SQLite mirror of the three tables that serves list and get
+    # reads; filled at startup and kept current by incremental sync
+    replica_enabled: bool = False
+    replica_sync_interval: float = 1.0
+    replica_sync_batch: int = 1000
+
+    export_chunk_size: int = 500
+
+    # Idempotency-Key replay store for POST and :batch requests
+    idempotency_ttl_seconds: float = 86400.0
+    idempotency_max_entries: int = 10000
+    idempotency_max_bytes: int = 64 * 1024 * 1024
+    idempotency_wait_seconds: float = 30.0
+
+    # /sync: rows newer than this are re-sent by the next sync so late commits
+    # are not skipped; tokens older than the tombstone retention get a 410
+    sync_overlap_seconds: float = 30.0
+    sync_tombstone_retention_days: int = 30
+
+    # live change feed (/events): per-listener backlog, replay window for
+    # Last-Event-ID, keep-alive interval and the client reconnect delay
+    events_queue_size: int = 256
+    events_replay_size: int = 1024
+    events_heartbeat_seconds: float = 15.0
+    events_retry_ms: int = 3000
 
 
 settings = Settings()
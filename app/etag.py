@@ -0,0 +1,35 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+
+def item_etag(row: dict, *parts: Any) -> str:
+    """Strong ETag for one row; ``parts`` distinguish representations such as projections."""
+    return f'"{_digest(row["id"], row["updated_at"], parts)}"'
+
+
+def collection_etag(rows: list[dict], *parts: Any) -> str:
+    """Weak ETag for a page of rows, derived from its size, ids and newest ``updated_at``."""
+    newest = max((row["updated_at"] for row in rows), default="")
+    ids = [row["id"] for row in rows]
+    return f'W/"{_digest(len(rows), newest, ids, parts)}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison against ``If-None-Match``, as RFC 9110 prescribes for GET."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,134 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from app.cache import read_cache
+from app.config import settings
+from app.graph import experiment_graph
+from app.replica import local_replica
+from app.schemas.events import ChangeEvent
+
+
+class Subscription:
+    """One listener's bounded queue of serialized :class:`ChangeEvent` messages.
+
+    The queue belongs to the subscriber's event loop; :meth:`offer` may be
+    called from any thread. A subscriber that falls ``queue_size`` events
+    behind has its backlog replaced by a single ``resync`` event instead of
+    slowing down the writers.
+    """
+
+    def __init__(self, broker: "EventBroker", tables: frozenset[str], queue_size: int):
+        self.broker = broker
+        self.tables = tables
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue(queue_size)
+
+    def offer(self, message: tuple[int, str]) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._put(message)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message: tuple[int, str]) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(self.broker.resync_message())
+            self.broker.resyncs += 1
+
+    async def get(self) -> tuple[int, str]:
+        """Return the next ``(event id, JSON)`` message."""
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """In-process fan-out of row changes to SSE and WebSocket listeners.
+
+    Events are numbered; the last ``replay_size`` are kept so a client that
+    reconnects with ``Last-Event-ID`` gets what it missed. Each event is
+    serialized once and shared by every subscriber.
+    """
+
+    def __init__(self, queue_size: int, replay_size: int):
+        self.queue_size = queue_size
+        self._subscribers: set[Subscription] = set()
+        self._recent: deque[tuple[int, str, str]] = deque(maxlen=replay_size)
+        self._seq = 0
+        self.published = 0
+        self.resyncs = 0
+
+    def subscribe(self, tables: Iterable[str], last_event_id: Optional[int] = None) -> Subscription:
+        subscription = Subscription(self, frozenset(tables), self.queue_size)
+        if last_event_id is not None and last_event_id < self._seq:
+            oldest = self._recent[0][0] if self._recent else self._seq + 1
+            if last_event_id + 1 < oldest:
+                subscription.offer(self.resync_message())
+            else:
+                for seq, table, data in self._recent:
+                    if seq > last_event_id and table in subscription.tables:
+                        subscription.offer((seq, data))
+        elif last_event_id is not None and last_event_id > self._seq:
+            # the id came from before a restart
+            subscription.offer(self.resync_message())
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, table: str, op: str, ids: Iterable[str]) -> None:
+        self._seq += 1
+        event = ChangeEvent(id=self._seq, table=table, op=op, ids=list(ids), at=datetime.now(timezone.utc))
+        data = event.model_dump_json()
+        self._recent.append((self._seq, table, data))
+        self.published += 1
+        for subscription in list(self._subscribers):
+            if table in subscription.tables:
+                subscription.offer((self._seq, data))
+
+    def resync_message(self) -> tuple[int, str]:
+        event = ChangeEvent(id=self._seq, op="resync", at=datetime.now(timezone.utc))
+        return self._seq, event.model_dump_json()
+
+    def clear(self) -> None:
+        self._subscribers.clear()
+        self._recent.clear()
+        self._seq = self.published = self.resyncs = 0
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "resyncs": self.resyncs,
+            "last_event_id": self._seq,
+        }
+
+
+event_broker = EventBroker(settings.events_queue_size, settings.events_replay_size)
+
+
+def record_change(table: str, op: str, ids: Iterable[str], rows: Iterable[dict] = ()) -> None:
+    """Called by every write path after Supabase accepted the change.
+
+    ``rows`` are the written rows as Supabase returned them, if the write
+    returned them. Drops the table's cached reads (in every worker, with a
+    shared cache), applies the change to the local replica and notifies
+    live listeners.
+    """
+    ids = [str(row_id) for row_id in ids]
+    generation = read_cache.invalidate(table)
+    if table == "experiments":
+        experiment_graph.follow(generation)
+    local_replica.apply(table, op, ids, list(rows), generation)
+    event_broker.publish(table, op, ids)
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Callable, Literal, Optional
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.config import settings
+from app.pagination import apply_page, page_rows
+from app.serialization import list_adapter
+from app.supabase_client import execute
+
+ExportFormat = Literal["ndjson", "csv"]
+
+_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+async def iter_chunks(build: Callable[[], object], column: str) -> AsyncIterator[list[dict]]:
+    """Yield the whole table in ``export_chunk_size`` pages, walking the keyset cursor."""
+    cursor: Optional[str] = None
+    while True:
+        resp = await execute(apply_page(build(), column, settings.export_chunk_size, cursor), read=True)
+        rows, cursor = page_rows(resp.data or [], column, settings.export_chunk_size)
+        if rows:
+            yield rows
+        if cursor is None:
+            return
+
+
+async def _ndjson(model: type[BaseModel], chunks: AsyncIterator[list[dict]]) -> AsyncIterator[bytes]:
+    adapter = list_adapter(model)
+    async for rows in chunks:
+        yield b"".join(item.model_dump_json().encode() + b"\n" for item in adapter.validate_python(rows))
+
+
+async def _csv(model: type[BaseModel], chunks: AsyncIterator[list[dict]]) -> AsyncIterator[bytes]:
+    adapter = list_adapter(model)
+    columns = list(model.model_fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in chunks:
+        for item in adapter.dump_python(adapter.validate_python(rows), mode="json"):
+            writer.writerow(
+                json.dumps(item[name]) if isinstance(item[name], (list, dict)) else item[name]
+                for name in columns
+            )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def export_response(
+    model: type[BaseModel],
+    chunks: AsyncIterator[list[dict]],
+    export_format: ExportFormat,
+    name: str,
+) -> StreamingResponse:
+    """Stream ``chunks`` as NDJSON or CSV; only one chunk is held in memory at a time."""
+    body = _ndjson(model, chunks) if export_format == "ndjson" else _csv(model, chunks)
+    return StreamingResponse(
+        body,
+        media_type=_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'},
+    )
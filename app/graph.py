@@ -0,0 +1,251 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.cache import read_cache
+from app.config import settings
+from app.export import iter_chunks
+from app.resilience import is_upstream_failure, mark_stale
+
+GRAPH_COLUMNS = "id,title,status,dependencies,created_at"
+
+
+@dataclass
+class GraphAnalysis:
+    order: list[str]
+    cycles: list[list[str]]
+    critical_path: list[str]
+    missing: dict[str, list[str]] = field(default_factory=dict)
+
+
+class DependencyGraph:
+    """In-memory index of experiment dependencies.
+
+    ``dependencies`` hold the ids an experiment depends on; the reverse index
+    answers "what does this unblock" without a scan. Nodes and edges are
+    updated in place from the write handlers, and the derived analysis
+    (topological order, cycles, critical path) is recomputed lazily, only
+    after a change that can affect it.
+    """
+
+    def __init__(self):
+        self.nodes: dict[str, dict] = {}
+        self.deps: dict[str, set[str]] = {}
+        self.dependents: dict[str, set[str]] = defaultdict(set)
+        self.loaded_at: Optional[float] = None
+        # generation of the experiments table the graph reflects
+        self.version: Optional[int] = None
+        self._analysis: Optional[GraphAnalysis] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def load(self, rows: list[dict], version: int = 0) -> None:
+        self.reset()
+        for row in rows:
+            self.upsert(row)
+        self.loaded_at = time.monotonic()
+        self.version = version
+
+    def follow(self, version: int) -> None:
+        """Called when this process moves experiments to ``version`` and updates the graph in place.
+
+        If the graph was current before, it still is; if another worker wrote
+        in between, it stays behind and the next read reloads it.
+        """
+        if self.version == version - 1:
+            self.version = version
+
+    def reset(self) -> None:
+        self.nodes.clear()
+        self.deps.clear()
+        self.dependents.clear()
+        self.loaded_at = None
+        self.version = None
+        self._analysis = None
+
+    def upsert(self, row: dict) -> None:
+        node_id = str(row["id"])
+        deps = {str(dep) for dep in (row.get("dependencies") or [])}
+        node = {"id": node_id, "title": row.get("title", ""), "status": row.get("status", "not_started")}
+        previous = self.nodes.get(node_id)
+        old_deps = self.deps.get(node_id, set())
+        for dep in old_deps - deps:
+            self.dependents[dep].discard(node_id)
+        for dep in deps - old_deps:
+            self.dependents[dep].add(node_id)
+        self.nodes[node_id] = node
+        self.deps[node_id] = deps
+        if previous is None or old_deps != deps or previous["status"] != node["status"]:
+            self._analysis = None
+
+    def remove(self, node_id: str) -> None:
+        if node_id not in self.nodes:
+            return
+        for dep in self.deps.pop(node_id):
+            self.dependents[dep].discard(node_id)
+        del self.nodes[node_id]
+        self._analysis = None
+
+    def node(self, node_id: str) -> dict:
+        return {**self.nodes[node_id], "dependencies": sorted(self.deps[node_id])}
+
+    def blocked_by(self, node_id: str, transitive: bool = False) -> list[str]:
+        """Dependencies of ``node_id`` that exist and are not completed."""
+        found = self._walk(node_id, self.deps, transitive)
+        return [dep for dep in found if self.nodes[dep]["status"] != "completed"]
+
+    def unblocks(self, node_id: str, transitive: bool = False) -> list[str]:
+        """Experiments that depend on ``node_id``."""
+        return self._walk(node_id, self.dependents, transitive)
+
+    def _walk(self, start: str, edges: dict[str, set[str]], transitive: bool) -> list[str]:
+        seen: dict[str, None] = {}
+        queue = deque(sorted(edges.get(start, ())))
+        while queue:
+            current = queue.popleft()
+            if current in seen or current == start or current not in self.nodes:
+                continue
+            seen[current] = None
+            if transitive:
+                queue.extend(sorted(edges.get(current, ())))
+        return list(seen)
+
+    def analysis(self) -> GraphAnalysis:
+        if self._analysis is None:
+            self._analysis = self._analyze()
+        return self._analysis
+
+    def _analyze(self) -> GraphAnalysis:
+        missing = {
+            node_id: sorted(deps - self.nodes.keys())
+            for node_id, deps in self.deps.items()
+            if deps - self.nodes.keys()
+        }
+        # Kahn's algorithm; nodes on or behind a cycle never reach in-degree 0.
+        indegree = {node_id: len(self.deps[node_id] & self.nodes.keys()) for node_id in self.nodes}
+        ready = deque(sorted(node_id for node_id, count in indegree.items() if count == 0))
+        order: list[str] = []
+        while ready:
+            node_id = ready.popleft()
+            order.append(node_id)
+            for dependent in sorted(self.dependents.get(node_id, ())):
+                if dependent in indegree:
+                    indegree[dependent] -= 1
+                    if indegree[dependent] == 0:
+                        ready.append(dependent)
+        return GraphAnalysis(
+            order=order,
+            cycles=self._cycles() if len(order) < len(self.nodes) else [],
+            critical_path=self._critical_path(order),
+            missing=missing,
+        )
+
+    def _critical_path(self, order: list[str]) -> list[str]:
+        """Longest chain of unfinished experiments through the acyclic part of the graph."""
+        length: dict[str, int] = {}
+        previous: dict[str, Optional[str]] = {}
+        for node_id in order:
+            weight = 0 if self.nodes[node_id]["status"] == "completed" else 1
+            best, best_dep = 0, None
+            for dep in self.deps[node_id]:
+                if dep in length and length[dep] > best:
+                    best, best_dep = length[dep], dep
+            length[node_id] = best + weight
+            previous[node_id] = best_dep
+        if not length or max(length.values()) == 0:
+            return []
+        node_id: Optional[str] = max(order, key=lambda n: length[n])
+        path = []
+        while node_id is not None:
+            path.append(node_id)
+            node_id = previous[node_id]
+        return [n for n in reversed(path) if self.nodes[n]["status"] != "completed"]
+
+    def _cycles(self) -> list[list[str]]:
+        """Strongly connected components that form cycles (Tarjan, iterative)."""
+        index: dict[str, int] = {}
+        low: dict[str, int] = {}
+        on_stack: set[str] = set()
+        stack: list[str] = []
+        cycles: list[list[str]] = []
+        counter = 0
+        for root in sorted(self.nodes):
+            if root in index:
+                continue
+            work = [(root, iter(sorted(self.deps[root] & self.nodes.keys())))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node_id, children = work[-1]
+                child = next(children, None)
+                if child is not None:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(sorted(self.deps[child] & self.nodes.keys()))))
+                    elif child in on_stack:
+                        low[node_id] = min(low[node_id], index[child])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node_id])
+                if low[node_id] == index[node_id]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node_id:
+                            break
+                    if len(component) > 1 or node_id in self.deps[node_id]:
+                        cycles.append(sorted(component))
+        return cycles
+
+
+experiment_graph = DependencyGraph()
+
+
+async def load_graph(supabase) -> DependencyGraph:
+    """Return the experiment graph, loading it on first use, after ``graph_ttl_seconds``
+    or once experiments moved to a newer generation (a write in another worker).
+
+    If the refresh fails because Supabase is down, the graph already loaded
+    is kept and returned (marked stale) rather than failing the request.
+    """
+    graph = experiment_graph
+
+    def current(version: int) -> bool:
+        return (
+            graph.loaded
+            and graph.version == version
+            and time.monotonic() - graph.loaded_at < settings.graph_ttl_seconds
+        )
+
+    if current(read_cache.generation("experiments")):
+        return graph
+    if graph._lock is None:
+        graph._lock = asyncio.Lock()
+    async with graph._lock:
+        version = read_cache.generation("experiments")
+        if not current(version):
+            # paged like the exports: PostgREST caps an unpaged select at max-rows
+            chunks = iter_chunks(lambda: supabase.table("experiments").select(GRAPH_COLUMNS), "created_at")
+            try:
+                rows = [row async for chunk in chunks for row in chunk]
+            except Exception as exc:
+                if not graph.loaded or not is_upstream_failure(exc):
+                    raise
+                mark_stale(time.monotonic() - graph.loaded_at)
+                return graph
+            graph.load(rows, version)
+    return graph
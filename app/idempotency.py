@@ -0,0 +1,231 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import orjson
+
+from app.config import settings
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+
+
+class StoredResponse:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status: int, headers: list[tuple[bytes, bytes]], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "expires_at", "response", "done")
+
+    def __init__(self, fingerprint: str, done: asyncio.Future):
+        self.fingerprint = fingerprint
+        self.expires_at = 0.0
+        self.response: Optional[StoredResponse] = None
+        self.done = done
+
+
+class IdempotencyStore:
+    """Responses of completed requests by ``Idempotency-Key``, with a TTL.
+
+    Bounded by ``max_entries`` and by ``max_bytes`` of stored bodies; the
+    least recently used entries go first. A key stays reserved while its
+    first request is in flight, so duplicates can wait for its result.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self.replays = 0
+        self.conflicts = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.response is not None and entry.expires_at <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def reserve(self, key: str, fingerprint: str) -> _Entry:
+        entry = _Entry(fingerprint, asyncio.get_running_loop().create_future())
+        self._entries[key] = entry
+        self._evict()
+        return entry
+
+    def complete(self, key: str, entry: _Entry, response: Optional[StoredResponse]) -> None:
+        """Store ``response`` for ``key``, or release the key if it is None."""
+        if not entry.done.done():
+            entry.done.set_result(response)
+        if self._entries.get(key) is not entry:
+            return
+        if response is None or len(response.body) > self.max_bytes:
+            self._drop(key)
+            return
+        entry.response = response
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+        self._bytes += len(response.body)
+        self._evict()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        if entry.response is not None:
+            self._bytes -= len(entry.response.body)
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            key = next((key for key, entry in self._entries.items() if entry.response is not None), None)
+            if key is None:
+                return
+            self._drop(key)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        self.replays = self.conflicts = self.evictions = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "replays": self.replays,
+            "conflicts": self.conflicts,
+            "evictions": self.evictions,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+idempotency_store = IdempotencyStore(
+    settings.idempotency_ttl_seconds, settings.idempotency_max_entries, settings.idempotency_max_bytes
+)
+
+
+def _applies(scope) -> bool:
+    method = scope["method"]
+    return method == "POST" or (method in ("PATCH", "DELETE") and scope["path"].endswith(":batch"))
+
+
+async def _send_error(send, status: int, detail: str, extra_headers: tuple = ()) -> None:
+    body = orjson.dumps({"detail": detail})
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *extra_headers]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _in_progress(send) -> None:
+    await _send_error(send, 409, "A request with this Idempotency-Key is in progress", ((b"retry-after", b"1"),))
+
+
+async def _replay(send, response: StoredResponse) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": [*response.headers, (b"idempotent-replayed", b"true")],
+        }
+    )
+    await send({"type": "http.response.body", "body": response.body})
+
+
+class IdempotencyMiddleware:
+    """Run a create or batch request at most once per ``Idempotency-Key``.
+
+    A repeat of a completed request gets the stored response back without
+    reaching a handler; a duplicate that arrives while the first is still
+    running waits for it. Reusing a key with a different method, path or
+    body is a 422. Responses with a 5xx status are not stored, so the
+    client can retry them.
+    """
+
+    def __init__(self, app, store: IdempotencyStore = idempotency_store):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _applies(scope):
+            await self.app(scope, receive, send)
+            return
+        key = next((value for name, value in scope["headers"] if name == HEADER), None)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _send_error(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            return
+
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        digest = hashlib.sha256()
+        for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body):
+            digest.update(part)
+            digest.update(b"\0")
+        fingerprint = digest.hexdigest()
+        store_key = key.decode("latin-1")
+
+        entry = self.store.get(store_key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                self.store.conflicts += 1
+                await _send_error(send, 422, "Idempotency-Key was already used for a different request")
+                return
+            response = entry.response
+            if response is None:
+                try:
+                    response = await asyncio.wait_for(asyncio.shield(entry.done), settings.idempotency_wait_seconds)
+                except TimeoutError:
+                    await _in_progress(send)
+                    return
+                if response is None:
+                    await _send_error(send, 409, "The original request with this Idempotency-Key failed; retry it")
+                    return
+            self.store.replays += 1
+            await _replay(send, response)
+            return
+
+        entry = self.store.reserve(store_key, fingerprint)
+        replayed = False
+
+        async def receive_body():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status, headers, sent = 500, [], []
+
+        async def send_and_capture(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status, headers = message["status"], list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                sent.append(message.get("body", b""))
+            await send(message)
+
+        response = None
+        try:
+            await self.app(scope, receive_body, send_and_capture)
+            if status < 500:
+                response = StoredResponse(status, headers, b"".join(sent))
+        finally:
+            self.store.complete(store_key, entry, response)
@@ -1,10 +1,21 @@
+import math
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from app.routers import experiments, learning, service
+from app import metrics
+from app.admission import OverloadedError, RateLimitMiddleware, rate_limiter, upstream_gate
+from app.cache import read_cache, read_flights
+from app.config import settings
+from app.events import event_broker
+from app.idempotency import IdempotencyMiddleware, idempotency_store
+from app.replica import local_replica
+from app.resilience import CircuitOpenError, StaleResponseMiddleware, breaker
+from app.routers import dashboard, events, experiments, learning, search, service, sync
+from app.serialization import ORJSONResponse
+from app.supabase_client import close_client, close_executor, open_client, open_executor, pool_stats
 
 
 async def value_error_handler(request: Request, exc: ValueError) -> JSONResponse:
@@ -14,9 +25,24 @@ async def value_error_handler(request: Request, exc: ValueError) -> JSONResponse
     )
 
 
+async def retry_later_handler(request: Request, exc: CircuitOpenError | OverloadedError) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    open_executor()
+    await open_client()
+    if settings.replica_enabled:
+        await local_replica.start()
     yield
+    await local_replica.stop()
+    close_executor()
+    close_client()
 
 
 app = FastAPI(
@@ -24,8 +50,15 @@ app = FastAPI(
     description="Backend for Nebibs, connected to Supabase",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 app.add_exception_handler(ValueError, value_error_handler)
+app.add_exception_handler(CircuitOpenError, retry_later_handler)
+app.add_exception_handler(OverloadedError, retry_later_handler)
+
+app.add_middleware(IdempotencyMiddleware)
+# inside CORS, so browsers can read the 429
+app.add_middleware(RateLimitMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,7 +66,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "X-Stale", "Age", "Retry-After", "Idempotent-Replayed"],
 )
+app.add_middleware(StaleResponseMiddleware)
+if settings.metrics_enabled:
+    app.add_middleware(metrics.MetricsMiddleware)
 
 
 @app.get("/health")
@@ -41,9 +78,175 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/health/cache")
+async def cache_stats():
+    return {**read_cache.stats(), "flights": read_flights.stats()}
+
+
+def _cache_metrics():
+    stats = read_cache.stats()
+    for name in ("hits", "misses", "evictions", "stale_hits", "shared_hits"):
+        yield f"# TYPE read_cache_{name}_total counter"
+        yield f"read_cache_{name}_total {stats[name]}"
+    yield "# TYPE read_cache_entries gauge"
+    yield f"read_cache_entries {stats['entries']}"
+    flights = read_flights.stats()
+    yield "# HELP supabase_reads_total Upstream reads started by fetch_rows."
+    yield "# TYPE supabase_reads_total counter"
+    yield f"supabase_reads_total {flights['calls']}"
+    yield "# HELP supabase_reads_coalesced_total Reads served by joining an identical in-flight call (upstream calls saved)."
+    yield "# TYPE supabase_reads_coalesced_total counter"
+    yield f"supabase_reads_coalesced_total {flights['coalesced']}"
+
+
+metrics.add_collector(_cache_metrics)
+
+
+@app.get("/health/pool")
+async def supabase_pool_stats():
+    return pool_stats()
+
+
+def _pool_metrics():
+    stats = pool_stats()
+    for name in ("connections", "idle", "active", "requests", "waiting"):
+        yield f"# TYPE supabase_pool_{name} gauge"
+        yield f"supabase_pool_{name} {stats[name]}"
+    yield "# TYPE supabase_pool_max_connections gauge"
+    yield f"supabase_pool_max_connections {stats['max_connections']}"
+
+
+metrics.add_collector(_pool_metrics)
+
+
+@app.get("/health/events")
+async def events_stats():
+    return event_broker.stats()
+
+
+def _event_metrics():
+    stats = event_broker.stats()
+    yield "# TYPE events_subscribers gauge"
+    yield f"events_subscribers {stats['subscribers']}"
+    yield "# TYPE events_published_total counter"
+    yield f"events_published_total {stats['published']}"
+    yield "# HELP events_resyncs_total Listeners that fell behind and were told to refetch."
+    yield "# TYPE events_resyncs_total counter"
+    yield f"events_resyncs_total {stats['resyncs']}"
+
+
+metrics.add_collector(_event_metrics)
+
+
+@app.get("/health/idempotency")
+async def idempotency_stats():
+    return idempotency_store.stats()
+
+
+def _idempotency_metrics():
+    stats = idempotency_store.stats()
+    yield "# TYPE idempotency_entries gauge"
+    yield f"idempotency_entries {stats['entries']}"
+    yield "# TYPE idempotency_stored_bytes gauge"
+    yield f"idempotency_stored_bytes {stats['bytes']}"
+    yield "# HELP idempotency_replays_total Repeated requests answered from the replay store."
+    yield "# TYPE idempotency_replays_total counter"
+    yield f"idempotency_replays_total {stats['replays']}"
+    yield "# TYPE idempotency_conflicts_total counter"
+    yield f"idempotency_conflicts_total {stats['conflicts']}"
+
+
+metrics.add_collector(_idempotency_metrics)
+
+
+@app.get("/health/admission")
+async def admission_stats():
+    return {"rate_limit": rate_limiter.stats(), "upstream": upstream_gate.stats()}
+
+
+def _admission_metrics():
+    limits = rate_limiter.stats()
+    yield "# TYPE rate_limit_clients gauge"
+    yield f"rate_limit_clients {limits['clients']}"
+    yield "# HELP rate_limit_rejected_total Requests answered with 429 by the per-client token bucket."
+    yield "# TYPE rate_limit_rejected_total counter"
+    yield f"rate_limit_rejected_total {limits['limited']}"
+    yield "# TYPE rate_limit_allowed_total counter"
+    yield f"rate_limit_allowed_total {limits['allowed']}"
+    gate = upstream_gate.stats()
+    for name in ("active", "waiting", "limit"):
+        yield f"# TYPE supabase_upstream_{name} gauge"
+        yield f"supabase_upstream_{name} {gate[name]}"
+    yield "# HELP supabase_upstream_queued_total Supabase calls that had to wait for a free slot."
+    yield "# TYPE supabase_upstream_queued_total counter"
+    yield f"supabase_upstream_queued_total {gate['queued']}"
+    yield "# HELP supabase_upstream_shed_total Supabase calls turned away with 503 (line full or waited too long)."
+    yield "# TYPE supabase_upstream_shed_total counter"
+    yield f"supabase_upstream_shed_total {gate['shed']}"
+
+
+metrics.add_collector(_admission_metrics)
+
+
+@app.get("/health/replica")
+async def replica_stats():
+    return local_replica.stats()
+
+
+def _replica_metrics():
+    stats = local_replica.stats()
+    yield "# TYPE replica_ready gauge"
+    yield f"replica_ready {int(stats['ready'])}"
+    yield "# TYPE replica_rows gauge"
+    for table, count in stats["rows"].items():
+        yield f'replica_rows{{table="{table}"}} {count}'
+    if stats["synced_seconds_ago"] is not None:
+        yield "# TYPE replica_sync_age_seconds gauge"
+        yield f"replica_sync_age_seconds {stats['synced_seconds_ago']}"
+    for name in ("syncs", "failures"):
+        yield f"# TYPE replica_{name}_total counter"
+        yield f"replica_{name}_total {stats[name]}"
+    yield "# HELP replica_fallbacks_total Reads sent to Supabase because the replica was behind a write."
+    yield "# TYPE replica_fallbacks_total counter"
+    yield f"replica_fallbacks_total {stats['fallbacks']}"
+
+
+metrics.add_collector(_replica_metrics)
+
+
+@app.get("/health/upstream")
+async def upstream_stats():
+    return breaker.stats()
+
+
+_CIRCUIT_STATES = {breaker.CLOSED: 0, breaker.HALF_OPEN: 1, breaker.OPEN: 2}
+
+
+def _circuit_metrics():
+    stats = breaker.stats()
+    yield "# HELP supabase_circuit_state Circuit breaker state: 0 closed, 1 half-open, 2 open."
+    yield "# TYPE supabase_circuit_state gauge"
+    yield f"supabase_circuit_state {_CIRCUIT_STATES[stats['state']]}"
+    for name in ("opens", "rejected", "read_retries"):
+        yield f"# TYPE supabase_circuit_{name}_total counter"
+        yield f"supabase_circuit_{name}_total {stats[name]}"
+
+
+metrics.add_collector(_circuit_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 app.include_router(learning.router)
 app.include_router(experiments.router)
 app.include_router(service.router)
+app.include_router(search.router)
+app.include_router(events.router)
+app.include_router(sync.router)
+app.include_router(dashboard.router)
 
 
 @app.get("/")
@@ -0,0 +1,146 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label tuple."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            base = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}'
+            yield f'{self.name}_bucket{{{base},le="+Inf"}} {count}'
+            yield f"{self.name}_sum{{{base}}} {total}"
+            yield f"{self.name}_count{{{base}}} {count}"
+
+    def clear(self) -> None:
+        self._series.clear()
+
+
+class RequestTiming:
+    __slots__ = ("db_seconds", "db_calls")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_calls = 0
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time from request start to the end of the response, by route template.",
+    ("method", "route", "status"),
+)
+upstream_duration = Histogram(
+    "supabase_request_duration_seconds",
+    "Time spent waiting on PostgREST, by table and operation.",
+    ("table", "operation"),
+)
+
+_current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+_collectors: list[Callable[[], Iterable[str]]] = []
+
+_OPERATIONS = {"GET": "select", "HEAD": "select", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+
+def describe_query(query) -> tuple[str, str]:
+    """Return ``(table, operation)`` for a postgrest request builder."""
+    request = getattr(query, "request", None)
+    method = getattr(request, "http_method", None)
+    if not isinstance(method, str):
+        return "unknown", "unknown"
+    parts = str(request.path).rstrip("/").split("/")
+    if len(parts) >= 2 and parts[-2] == "rpc":
+        return parts[-1], "rpc"
+    operation = _OPERATIONS.get(method, method.lower())
+    if operation == "insert" and "merge-duplicates" in request.headers.get("prefer", ""):
+        operation = "upsert"
+    return parts[-1], operation
+
+
+def record_upstream(query, seconds: float) -> None:
+    upstream_duration.observe(describe_query(query), seconds)
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.db_seconds += seconds
+        timing.db_calls += 1
+
+
+def add_collector(collector: Callable[[], Iterable[str]]) -> None:
+    """Register a callable that yields extra exposition lines for ``/metrics``."""
+    _collectors.append(collector)
+
+
+def render() -> str:
+    lines = [*request_duration.render(), *upstream_duration.render()]
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Record per-route latency and add a ``Server-Timing`` header to every response.
+
+    ``db`` is the time spent in Supabase calls made by the request and
+    ``total`` the time until the response headers were sent; the difference
+    is spent in the app (validation, serialization).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                value = (
+                    f'db;dur={timing.db_seconds * 1000:.1f};desc="{timing.db_calls} calls", '
+                    f"total;dur={total_ms:.1f}"
+                )
+                message["headers"] = [*message.get("headers", []), (b"server-timing", value.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timing.reset(token)
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            request_duration.observe(
+                (scope["method"], template, str(status)), time.perf_counter() - start
+            )
@@ -0,0 +1,73 @@
+import base64
+import json
+from typing import Any, Optional
+
+from fastapi import HTTPException
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def parse_sort(sort: str) -> tuple[str, bool]:
+    """Split a ``sort`` value into ``(column, desc)``; ``-column`` sorts descending."""
+    return sort.lstrip("-"), sort.startswith("-")
+
+
+def encode_cursor(column: str, value: Any, row_id: str, desc: bool = True) -> str:
+    data = {"k": column, "v": value, "id": row_id}
+    if not desc:
+        data["asc"] = True
+    raw = json.dumps(data, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, column: str, desc: bool = True) -> tuple[Any, str]:
+    """Return the ``(value, id)`` position stored in ``cursor``.
+
+    Raises a 400 if the cursor is malformed or was issued for another ordering.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["k"] != column or data.get("asc", False) == desc:
+            raise ValueError("cursor was issued for a different ordering")
+        return data["v"], str(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _quote(value: Any) -> str:
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def seek(query, column: str, value: Any, row_id: Any, desc: bool = True):
+    """Keep only rows after ``(value, row_id)`` in ``(column, id)`` order."""
+    op = "lt" if desc else "gt"
+    return query.or_(
+        f"{column}.{op}.{_quote(value)},"
+        f"and({column}.eq.{_quote(value)},id.{op}.{_quote(row_id)})"
+    )
+
+
+def apply_page(query, column: str, limit: int, cursor: Optional[str], desc: bool = True):
+    """Order ``query`` by ``(column, id)`` and seek past ``cursor``.
+
+    One extra row is requested so :func:`page_rows` can tell whether another
+    page exists without a count query.
+    """
+    if cursor is not None:
+        value, row_id = decode_cursor(cursor, column, desc)
+        query = seek(query, column, value, row_id, desc)
+    return query.order(column, desc=desc).order("id", desc=desc).limit(limit + 1)
+
+
+def page_rows(
+    rows: list[dict], column: str, limit: int, desc: bool = True
+) -> tuple[list[dict], Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the next page."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(column, last[column], last["id"], desc)
@@ -0,0 +1,49 @@
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel, create_model
+
+
+def parse_fields(fields: Optional[str], model: type[BaseModel]) -> Optional[tuple[str, ...]]:
+    """Parse a ``fields=a,b,c`` query value against ``model``'s fields.
+
+    Returns ``None`` when no projection was requested.
+    """
+    if fields is None:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    if not names:
+        raise HTTPException(status_code=400, detail="fields must not be empty")
+    unknown = [name for name in names if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def select_columns(
+    model: type[BaseModel],
+    selected: Optional[tuple[str, ...]],
+    *required: str,
+    expressions: Optional[dict[str, str]] = None,
+) -> str:
+    """Build the PostgREST ``select`` list for ``selected`` plus ``required`` columns.
+
+    ``expressions`` maps fields that are not plain columns (embedded
+    resources) to the select expression that produces them.
+    """
+    names = selected if selected is not None else tuple(model.model_fields)
+    expressions = expressions or {}
+    return ",".join(expressions.get(name, name) for name in dict.fromkeys(names + required))
+
+
+@lru_cache(maxsize=128)
+def projection_model(model: type[BaseModel], selected: tuple[str, ...]) -> type[BaseModel]:
+    """Return a model holding only ``selected`` fields of ``model``, with the same types."""
+    fields = {name: (model.model_fields[name].annotation, ...) for name in selected}
+    return create_model(f"{model.__name__}[{','.join(selected)}]", **fields)
+
+
+def output_model(model: type[BaseModel], selected: Optional[tuple[str, ...]]) -> type[BaseModel]:
+    """Model to serialize rows with: ``model`` itself, or its projection onto ``selected``."""
+    return model if selected is None else projection_model(model, selected)
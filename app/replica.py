@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Optional
+
+import orjson
+
+from app.cache import read_cache
+from app.changes import MODELS, SOURCES, TOMBSTONES, advance, changes_query
+from app.config import settings
+from app.pagination import decode_cursor
+from app.supabase_client import execute, get_supabase
+
+logger = logging.getLogger(__name__)
+
+# columns the list endpoints sort and filter on, extracted from the stored JSON and indexed;
+# title is left out because SQLite cannot order text the way Postgres' collation does, so
+# title sorts always go to Supabase and a cursor never crosses from one ordering to the other
+_COLUMNS = {
+    "learning_goals": {"created_at": "text", "updated_at": "text", "progress_percent": "real"},
+    "experiments": {"created_at": "text", "updated_at": "text", "status": "text"},
+    "service_entries": {"date": "text", "created_at": "text", "updated_at": "text", "hours": "real"},
+}
+# fields a write response may lack (learning goal inserts do not embed weekly hours)
+_DEFAULTS = {"learning_goals": {"weekly_hours": []}}
+_FILTER_OPS = {"in", ">=", "<="}
+# locally deleted ids are kept this long so a sync read from before the delete cannot bring them back
+_DELETED_TTL = 300.0
+
+
+def _schema(table: str) -> str:
+    columns = "".join(
+        f", {name} {kind} generated always as (json_extract(data, '$.{name}')) virtual"
+        for name, kind in _COLUMNS[table].items()
+    )
+    indexes = "".join(
+        f"create index {table}_{name} on {table} ({name}, id);" for name in _COLUMNS[table] if name != "updated_at"
+    )
+    return f"create table {table} (id text primary key, data text not null{columns});{indexes}"
+
+
+class LocalReplica:
+    """In-memory SQLite mirror of the three tables that answers list and get reads.
+
+    :meth:`start` fills it with a full sync and then keeps it current in the
+    background with the incremental ``(updated_at, id)`` and tombstone reads
+    behind ``/sync``, every ``replica_sync_interval`` seconds. Writes made
+    through this process are applied at once by :func:`app.events.record_change`.
+
+    A table is served only while the replica holds its current generation
+    (see :class:`app.cache.ReadCache`): a write that could not be applied in
+    place, such as a weekly-hours change, or one made by another worker with
+    a shared cache, sends that table's reads back to Supabase until the sync
+    it wakes has caught up. Only touched from the event loop thread.
+    """
+
+    def __init__(self):
+        self._db: Optional[sqlite3.Connection] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._positions: dict[str, Optional[list]] = {source: None for source in SOURCES}
+        # generation of each table the replica reflects
+        self._versions = {table: -1 for table in _COLUMNS}
+        self._deleted: dict[str, float] = {}
+        self.ready = False
+        self.synced_at: Optional[float] = None
+        self.syncs = 0
+        self.failures = 0
+        self.fallbacks = 0
+
+    def open(self) -> None:
+        if self._db is not None:
+            return
+        self._db = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False)
+        for table in _COLUMNS:
+            self._db.executescript(_schema(table))
+
+    async def start(self) -> None:
+        """Fill the replica and start the background sync; called from the app's lifespan.
+
+        If the first sync fails, reads go to Supabase until a later one succeeds.
+        """
+        self.open()
+        self._wake = asyncio.Event()
+        try:
+            await self.sync()
+        except Exception as exc:
+            self.failures += 1
+            logger.warning("Replica fill failed, reading from Supabase until it succeeds: %s", exc)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.replica_sync_interval)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.sync()
+            except Exception as exc:
+                self.failures += 1
+                logger.warning("Replica sync failed: %s", exc)
+
+    async def sync(self) -> None:
+        """Read and apply everything changed since the last sync, page by page."""
+        versions = {table: read_cache.generation(table) for table in _COLUMNS}
+        supabase = get_supabase()
+        limit = settings.replica_sync_batch
+        if self._positions[TOMBSTONES] is None:
+            # a full fill has nothing to delete; start tombstones from now
+            self._positions[TOMBSTONES] = [self._horizon().isoformat(), 0]
+        pending = list(SOURCES)
+        while pending:
+            horizon = self._horizon()
+            responses = await asyncio.gather(
+                *(
+                    execute(changes_query(supabase, source, self._positions[source], limit), read=True)
+                    for source in pending
+                )
+            )
+            more = []
+            for source, resp in zip(pending, responses):
+                rows, self._positions[source], has_more = advance(
+                    source, resp.data or [], limit, self._positions[source], horizon
+                )
+                if source == TOMBSTONES:
+                    for row in rows:
+                        self._remove(row["table_name"], [row["row_id"]])
+                else:
+                    self._upsert(source, rows)
+                if has_more:
+                    more.append(source)
+            pending = more
+        for table, version in versions.items():
+            self._versions[table] = max(self._versions[table], version)
+        now = time.monotonic()
+        self._deleted = {row_id: at for row_id, at in self._deleted.items() if now - at < _DELETED_TTL}
+        self.synced_at = time.time()
+        self.syncs += 1
+        self.ready = True
+
+    @staticmethod
+    def _horizon() -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=settings.sync_overlap_seconds)
+
+    def _upsert(self, table: str, rows: Iterable[dict]) -> None:
+        # an older copy never replaces a newer one, and deleted rows stay deleted
+        self._db.executemany(
+            f"insert into {table} (id, data) values (?, ?) on conflict (id) do update set data = excluded.data"
+            f" where json_extract(excluded.data, '$.updated_at') >= {table}.updated_at",
+            [(str(row["id"]), orjson.dumps(row).decode()) for row in rows if str(row["id"]) not in self._deleted],
+        )
+
+    def _remove(self, table: str, ids: Iterable[str]) -> None:
+        if table in _COLUMNS:
+            self._db.executemany(f"delete from {table} where id = ?", [(row_id,) for row_id in ids])
+
+    def apply(self, table: str, op: str, ids: list[str], rows: list[dict], generation: int) -> None:
+        """Apply a write this process made; ``generation`` is the table's generation after it.
+
+        Inserts and updates need the written ``rows``; without them the table
+        falls behind and is read from Supabase until the next sync.
+        """
+        if self._db is None or table not in _COLUMNS:
+            return
+        if op == "delete":
+            now = time.monotonic()
+            self._deleted.update((row_id, now) for row_id in ids)
+            self._remove(table, ids)
+        elif rows:
+            fields = MODELS[table].model_fields
+            merged = []
+            for row in rows:
+                current = self.get(table, str(row["id"]))
+                base = current[0] if current else _DEFAULTS.get(table, {})
+                merged.append({**base, **{name: value for name, value in row.items() if name in fields}})
+            self._upsert(table, merged)
+        else:
+            self._wake_sync()
+            return
+        if self._versions[table] == generation - 1:
+            self._versions[table] = generation
+        else:
+            self._wake_sync()
+
+    def _wake_sync(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    def serves(self, table: str, column: Optional[str] = None) -> bool:
+        """True if reads of ``table``, for a list sorted by ``column``, can be answered here."""
+        if not self.ready or (column is not None and column not in _COLUMNS[table]):
+            return False
+        if self._versions[table] != read_cache.generation(table):
+            self.fallbacks += 1
+            self._wake_sync()
+            return False
+        return True
+
+    def get(self, table: str, row_id: str) -> list[dict]:
+        row = self._db.execute(f"select data from {table} where id = ?", (row_id,)).fetchone()
+        return [orjson.loads(row[0])] if row else []
+
+    def page(
+        self,
+        table: str,
+        column: str,
+        limit: int,
+        cursor: Optional[str],
+        desc: bool = True,
+        filters: Iterable[tuple[str, str, Any]] = (),
+    ) -> list[dict]:
+        """The rows :func:`app.pagination.apply_page` would fetch: ``limit + 1`` after ``cursor``.
+
+        ``filters`` are ``(column, op, value)`` with ``op`` one of ``in``, ``>=`` and ``<=``.
+        """
+        where, params = [], []
+        for name, op, value in filters:
+            if name not in _COLUMNS[table] or op not in _FILTER_OPS:
+                raise ValueError(f"Unsupported replica filter {name} {op}")
+            if op == "in":
+                where.append(f"{name} in ({','.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                where.append(f"{name} {op} ?")
+                params.append(value)
+        if cursor is not None:
+            value, row_id = decode_cursor(cursor, column, desc)
+            op = "<" if desc else ">"
+            where.append(f"({column} {op} ? or ({column} = ? and id {op} ?))")
+            params.extend((value, value, row_id))
+        direction = "desc" if desc else "asc"
+        sql = f"select data from {table}"
+        if where:
+            sql += " where " + " and ".join(where)
+        sql += f" order by {column} {direction}, id {direction} limit ?"
+        params.append(limit + 1)
+        return [orjson.loads(data) for (data,) in self._db.execute(sql, params)]
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        self._wake = None
+        self._reset()
+
+    def stats(self) -> dict:
+        rows = {}
+        if self._db is not None:
+            rows = {table: self._db.execute(f"select count(*) from {table}").fetchone()[0] for table in _COLUMNS}
+        behind = [table for table in _COLUMNS if self._versions[table] != read_cache.generation(table)]
+        return {
+            "enabled": settings.replica_enabled,
+            "ready": self.ready,
+            "rows": rows,
+            "behind": behind if self.ready else [],
+            "synced_seconds_ago": round(time.time() - self.synced_at, 3) if self.synced_at else None,
+            "syncs": self.syncs,
+            "failures": self.failures,
+            "fallbacks": self.fallbacks,
+        }
+
+
+local_replica = LocalReplica()
@@ -0,0 +1,173 @@
+import random
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+import httpx
+from postgrest.exceptions import APIError
+
+from app.config import settings
+
+# PostgREST could not reach or use the database
+_POSTGREST_UNAVAILABLE = {"PGRST000", "PGRST001", "PGRST002", "PGRST003"}
+# statement timeout, too many connections, admin/crash shutdown
+_POSTGRES_UNAVAILABLE = {"57014", "53300", "57P01", "57P02", "57P03"}
+
+
+class CircuitOpenError(ValueError):
+    """Raised instead of calling Supabase while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Supabase is unavailable, retry later")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Stop calling Supabase after ``failure_threshold`` consecutive upstream failures.
+
+    Once open, calls fail immediately with :class:`CircuitOpenError` for
+    ``reset_timeout`` seconds. After that one trial call is let through
+    (half-open): success closes the circuit, failure opens it again, and a
+    trial that ends with neither (it was cancelled) lets the next call try.
+    Only touched from the event loop thread, so it needs no lock.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clear()
+
+    def before_call(self) -> None:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(self.retry_after())
+            self.state = self.HALF_OPEN
+            self._trial = False
+        if self.state == self.HALF_OPEN:
+            if self._trial:
+                self.rejected += 1
+                raise CircuitOpenError(self.retry_after())
+            self._trial = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.state = self.CLOSED
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opens += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._trial = False
+
+    def release_trial(self) -> None:
+        """Give the half-open trial back after a call that ended without an outcome."""
+        if self.state == self.HALF_OPEN:
+            self._trial = False
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial call is allowed."""
+        if self.state == self.CLOSED:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def clear(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.rejected = 0
+        self.retries = 0
+        self._trial = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opens": self.opens,
+            "rejected": self.rejected,
+            "read_retries": self.retries,
+            "retry_after": round(self.retry_after(), 3),
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+        }
+
+
+breaker = CircuitBreaker(settings.circuit_failure_threshold, settings.circuit_reset_seconds)
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """True when ``exc`` means Supabase is unreachable or overloaded.
+
+    Errors PostgREST reports for the request itself (bad filter, constraint
+    violation, missing row) show the upstream is healthy and return False.
+    """
+    if isinstance(exc, (CircuitOpenError, httpx.TransportError, TimeoutError)):
+        return True
+    if isinstance(exc, APIError):
+        code = exc.code
+        if isinstance(code, int):
+            # non-JSON error body, e.g. a gateway 502/503/504
+            return code >= 500
+        code = str(code or "")
+        return code in _POSTGREST_UNAVAILABLE or code in _POSTGRES_UNAVAILABLE or code.startswith("08")
+    return False
+
+
+def backoff(attempt: int) -> float:
+    """Full-jitter delay before retry number ``attempt`` (0-based)."""
+    ceiling = min(settings.supabase_retry_backoff_max, settings.supabase_retry_backoff * 2**attempt)
+    return random.uniform(0, ceiling)
+
+
+class _Staleness:
+    __slots__ = ("age",)
+
+    def __init__(self):
+        self.age: Optional[float] = None
+
+
+_current_staleness: ContextVar[Optional[_Staleness]] = ContextVar("staleness", default=None)
+
+
+def mark_stale(age: float) -> None:
+    """Flag the current response as built from cached rows fetched ``age`` seconds ago."""
+    staleness = _current_staleness.get()
+    if staleness is not None:
+        staleness.age = age if staleness.age is None else max(staleness.age, age)
+
+
+class StaleResponseMiddleware:
+    """Add ``X-Stale: true`` and ``Age`` to responses that used stale cached rows."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        staleness = _Staleness()
+        token = _current_staleness.set(staleness)
+
+        async def send_with_staleness(message):
+            if message["type"] == "http.response.start" and staleness.age is not None:
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-stale", b"true"),
+                    (b"age", str(int(staleness.age)).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_staleness)
+        finally:
+            _current_staleness.reset(token)
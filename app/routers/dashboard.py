@@ -0,0 +1,66 @@
+import asyncio
+from datetime import date
+from typing import get_args
+
+from fastapi import APIRouter, Query
+
+from app.cache import fetch_rows
+from app.projection import select_columns
+from app.schemas.dashboard import DashboardEntry, DashboardGoal, DashboardResponse, HourTotals
+from app.schemas.experiments import ExperimentStatusFilter
+from app.supabase_client import get_supabase
+
+router = APIRouter(tags=["dashboard"])
+
+MAX_DASHBOARD_ITEMS = 50
+
+_GOAL_COLUMNS = select_columns(DashboardGoal, None)
+_ENTRY_COLUMNS = select_columns(DashboardEntry, None)
+
+
+@router.get("/dashboard", response_model=DashboardResponse)
+async def dashboard(
+    goals: int = Query(10, ge=1, le=MAX_DASHBOARD_ITEMS),
+    entries: int = Query(5, ge=1, le=MAX_DASHBOARD_ITEMS),
+):
+    """Home screen summary: experiment counts per status, the most recently
+    updated goals with their progress, the latest service entries and hour
+    totals for this week, month and year.
+
+    The four reads go to Supabase concurrently and through the read cache, so
+    the response takes about as long as the slowest one.
+    """
+    supabase = get_supabase()
+    today = date.today()
+    goal_rows, status_rows, entry_rows, total_rows = await asyncio.gather(
+        fetch_rows(
+            ("learning_goals", "dashboard", goals),
+            lambda: supabase.table("learning_goals")
+            .select(_GOAL_COLUMNS)
+            .order("updated_at", desc=True)
+            .order("id", desc=True)
+            .limit(goals),
+        ),
+        fetch_rows(("experiments", "status_counts"), lambda: supabase.rpc("experiment_status_counts", {})),
+        fetch_rows(
+            ("service_entries", "dashboard", entries),
+            lambda: supabase.table("service_entries")
+            .select(_ENTRY_COLUMNS)
+            .order("date", desc=True)
+            .order("id", desc=True)
+            .limit(entries),
+        ),
+        fetch_rows(
+            ("service_entries", "totals", today.isoformat()),
+            lambda: supabase.rpc("service_hours_totals", {"today": today.isoformat()}),
+        ),
+    )
+    counts = dict.fromkeys(get_args(ExperimentStatusFilter), 0)
+    for row in status_rows:
+        counts[row["status"]] = row["count"]
+    return DashboardResponse(
+        experiments=counts,
+        goals=[DashboardGoal.model_validate(row) for row in goal_rows],
+        recent_entries=[DashboardEntry.model_validate(row) for row in entry_rows],
+        hours=HourTotals.model_validate(total_rows[0]),
+    )
@@ -0,0 +1,97 @@
+import asyncio
+from typing import AsyncIterator, Iterable, List, Optional, get_args
+
+import orjson
+from fastapi import APIRouter, Header, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.events import event_broker
+from app.schemas.events import ChangeTable
+
+router = APIRouter(tags=["events"])
+
+ALL_TABLES = frozenset(get_args(ChangeTable))
+
+
+async def sse_stream(
+    tables: Iterable[str], last_event_id: Optional[int], heartbeat: float
+) -> AsyncIterator[str]:
+    """Stream changes to ``tables`` as SSE, with a comment line every ``heartbeat`` seconds.
+
+    The heartbeat keeps proxies from closing an idle connection. The
+    subscription is made once the response starts streaming, so a client
+    that is gone before then leaves nothing behind.
+    """
+    subscription = event_broker.subscribe(tables, last_event_id)
+    try:
+        yield f"retry: {settings.events_retry_ms}\n\n"
+        while True:
+            try:
+                event_id, data = await asyncio.wait_for(subscription.get(), heartbeat)
+            except TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield f"id: {event_id}\nevent: change\ndata: {data}\n\n"
+    finally:
+        subscription.close()
+
+
+@router.get("/events")
+async def stream_events(
+    table: Optional[List[ChangeTable]] = Query(None),
+    last_event_id: Optional[int] = Header(None),
+):
+    """Server-Sent Events stream of inserts, updates and deletes.
+
+    Each ``change`` event carries the table, the operation and the affected
+    ids; ``table=`` (repeatable) limits the stream to those tables. A
+    reconnecting client's ``Last-Event-ID`` replays what it missed, or sends a
+    ``resync`` event when that is no longer possible.
+    """
+    return StreamingResponse(
+        sse_stream(table or ALL_TABLES, last_event_id, settings.events_heartbeat_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/events/ws")
+async def events_websocket(
+    websocket: WebSocket,
+    table: Optional[List[ChangeTable]] = Query(None),
+    last_event_id: Optional[int] = Query(None),
+):
+    """WebSocket variant of ``/events``: one JSON ``ChangeEvent`` per text message.
+
+    The client may send ``{"tables": [...]}`` at any time to change its filter.
+    """
+    await websocket.accept()
+    subscription = event_broker.subscribe(table or ALL_TABLES, last_event_id)
+
+    async def receive_filters() -> None:
+        while True:
+            message = await websocket.receive_text()
+            try:
+                tables = orjson.loads(message).get("tables")
+            except (orjson.JSONDecodeError, AttributeError):
+                continue
+            if isinstance(tables, list):
+                subscription.tables = frozenset(tables) & ALL_TABLES if tables else ALL_TABLES
+
+    receiver = asyncio.ensure_future(receive_filters())
+    try:
+        while not receiver.done():
+            getter = asyncio.ensure_future(subscription.get())
+            await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                break
+            await websocket.send_text(getter.result()[1])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        if receiver.done() and not receiver.cancelled():
+            receiver.exception()  # the client went away; nothing to report
+        subscription.close()
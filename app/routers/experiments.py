@@ -1,13 +1,32 @@
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 
+from app.batch import check_unique, delete_rows, insert_rows, update_rows
+from app.cache import fetch_rows
+from app.etag import collection_etag, etag_matches, item_etag, not_modified
+from app.events import record_change
+from app.export import ExportFormat, export_response, iter_chunks
+from app.graph import experiment_graph, load_graph
+from app.pagination import DEFAULT_LIMIT, MAX_LIMIT, apply_page, page_rows, parse_sort
+from app.projection import output_model, parse_fields, select_columns
+from app.replica import local_replica
+from app.schemas.batch import BatchDelete, BatchItemResult, BatchResponse
 from app.schemas.experiments import (
+    ExperimentBatchCreate,
+    ExperimentBatchUpdate,
     ExperimentCreate,
+    ExperimentGraphNode,
+    ExperimentGraphResponse,
+    ExperimentPage,
     ExperimentResponse,
+    ExperimentSort,
+    ExperimentStatusFilter,
     ExperimentUpdate,
 )
-from app.supabase_client import get_supabase
+from app.serialization import row_response, rows_response
+from app.supabase_client import execute, get_supabase
 
 router = APIRouter(prefix="/experiments", tags=["experiments"])
 
@@ -26,36 +45,123 @@ def _row_to_response(row: dict) -> ExperimentResponse:
     )
 
 
-@router.get("", response_model=list[ExperimentResponse])
-async def list_experiments():
+def _insert_payload(body: ExperimentCreate) -> dict:
+    return {
+        "title": body.title,
+        "description": body.description,
+        "dependencies": body.dependencies,
+        "next_action": body.next_action,
+        "status": body.status,
+        "notes": body.notes,
+    }
+
+
+@router.get("", response_model=ExperimentPage)
+async def list_experiments(
+    request: Request,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    status: Optional[List[ExperimentStatusFilter]] = Query(None),
+    sort: ExperimentSort = "-created_at",
+):
+    selected = parse_fields(fields, ExperimentResponse)
+    column, desc = parse_sort(sort)
+    statuses = tuple(sorted(set(status))) if status else None
     supabase = get_supabase()
-    resp = supabase.table("experiments").select("*").order("created_at", desc=True).execute()
-    return [_row_to_response(row) for row in (resp.data or [])]
+    columns = select_columns(ExperimentResponse, selected, "id", column, "updated_at")
 
+    def build():
+        query = supabase.table("experiments").select(columns)
+        if statuses:
+            query = query.in_("status", list(statuses))
+        return apply_page(query, column, limit, cursor, desc)
 
-@router.get("/{experiment_id}", response_model=ExperimentResponse)
-async def get_experiment(experiment_id: UUID):
+    if local_replica.serves("experiments", column):
+        filters = [("status", "in", statuses)] if statuses else []
+        rows = local_replica.page("experiments", column, limit, cursor, desc, filters)
+    else:
+        rows = await fetch_rows(("experiments", "list", columns, limit, cursor, sort, statuses), build)
+    rows, next_cursor = page_rows(rows, column, limit, desc)
+    etag = collection_etag(rows, selected, next_cursor, sort, statuses)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return rows_response(output_model(ExperimentResponse, selected), rows, next_cursor, {"ETag": etag})
+
+
+@router.get("/export")
+async def export_experiments(export_format: ExportFormat = Query("ndjson", alias="format")):
     supabase = get_supabase()
-    resp = supabase.table("experiments").select("*").eq("id", str(experiment_id)).execute()
-    if not resp.data or len(resp.data) == 0:
+    columns = select_columns(ExperimentResponse, None)
+    chunks = iter_chunks(lambda: supabase.table("experiments").select(columns), "created_at")
+    return export_response(ExperimentResponse, chunks, export_format, "experiments")
+
+
+@router.get("/graph", response_model=ExperimentGraphResponse)
+async def get_experiment_graph():
+    graph = await load_graph(get_supabase())
+    analysis = graph.analysis()
+    return ExperimentGraphResponse(
+        order=[graph.node(node_id) for node_id in analysis.order],
+        cycles=analysis.cycles,
+        critical_path=analysis.critical_path,
+        missing_dependencies=analysis.missing,
+    )
+
+
+@router.get("/{experiment_id}/blocked-by", response_model=list[ExperimentGraphNode])
+async def get_blocked_by(experiment_id: UUID, transitive: bool = False):
+    graph = await load_graph(get_supabase())
+    if str(experiment_id) not in graph.nodes:
         raise HTTPException(status_code=404, detail="Experiment not found")
-    return _row_to_response(resp.data[0])
+    return [graph.node(node_id) for node_id in graph.blocked_by(str(experiment_id), transitive)]
+
+
+@router.get("/{experiment_id}/unblocks", response_model=list[ExperimentGraphNode])
+async def get_unblocks(experiment_id: UUID, transitive: bool = False):
+    graph = await load_graph(get_supabase())
+    if str(experiment_id) not in graph.nodes:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+    return [graph.node(node_id) for node_id in graph.unblocks(str(experiment_id), transitive)]
+
+
+async def _get_row(experiment_id: UUID, columns: str) -> dict:
+    if local_replica.serves("experiments"):
+        rows = local_replica.get("experiments", str(experiment_id))
+    else:
+        supabase = get_supabase()
+        rows = await fetch_rows(
+            ("experiments", "get", columns, str(experiment_id)),
+            lambda: supabase.table("experiments").select(columns).eq("id", str(experiment_id)),
+        )
+    if not rows:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+    return rows[0]
+
+
+@router.get("/{experiment_id}", response_model=ExperimentResponse)
+async def get_experiment(
+    experiment_id: UUID,
+    request: Request,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields, ExperimentResponse)
+    row = await _get_row(experiment_id, select_columns(ExperimentResponse, selected, "id", "updated_at"))
+    etag = item_etag(row, selected)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return row_response(output_model(ExperimentResponse, selected), row, {"ETag": etag})
 
 
 @router.post("", response_model=ExperimentResponse, status_code=201)
 async def create_experiment(body: ExperimentCreate):
     supabase = get_supabase()
-    payload = {
-        "title": body.title,
-        "description": body.description,
-        "dependencies": body.dependencies,
-        "next_action": body.next_action,
-        "status": body.status,
-        "notes": body.notes,
-    }
-    resp = supabase.table("experiments").insert(payload).execute()
+    payload = _insert_payload(body)
+    resp = await execute(supabase.table("experiments").insert(payload))
     if not resp.data or len(resp.data) == 0:
         raise HTTPException(status_code=500, detail="Insert failed")
+    record_change("experiments", "insert", [resp.data[0]["id"]], resp.data)
+    experiment_graph.upsert(resp.data[0])
     return _row_to_response(resp.data[0])
 
 
@@ -64,17 +170,77 @@ async def update_experiment(experiment_id: UUID, body: ExperimentUpdate):
     supabase = get_supabase()
     payload = body.model_dump(exclude_unset=True)
     if not payload:
-        return await get_experiment(experiment_id)
-    resp = supabase.table("experiments").update(payload).eq("id", str(experiment_id)).execute()
+        return _row_to_response(await _get_row(experiment_id, select_columns(ExperimentResponse, None)))
+    resp = await execute(supabase.table("experiments").update(payload).eq("id", str(experiment_id)))
     if not resp.data or len(resp.data) == 0:
         raise HTTPException(status_code=404, detail="Experiment not found")
+    record_change("experiments", "update", [experiment_id], resp.data)
+    experiment_graph.upsert(resp.data[0])
     return _row_to_response(resp.data[0])
 
 
 @router.delete("/{experiment_id}", status_code=204)
 async def delete_experiment(experiment_id: UUID):
     supabase = get_supabase()
-    resp = supabase.table("experiments").delete().eq("id", str(experiment_id)).execute()
+    resp = await execute(supabase.table("experiments").delete().eq("id", str(experiment_id)))
     if resp.data is not None and len(resp.data) == 0:
         raise HTTPException(status_code=404, detail="Experiment not found")
+    record_change("experiments", "delete", [experiment_id])
+    experiment_graph.remove(str(experiment_id))
     return None
+
+
+@router.post(":batch", response_model=BatchResponse[ExperimentResponse])
+async def create_experiments_batch(body: ExperimentBatchCreate):
+    supabase = get_supabase()
+    rows = await insert_rows(supabase, "experiments", [_insert_payload(item) for item in body.items])
+    record_change("experiments", "insert", [row["id"] for row in rows], rows)
+    for row in rows:
+        experiment_graph.upsert(row)
+    return BatchResponse[ExperimentResponse](
+        results=[BatchItemResult(id=row["id"], status=201, item=_row_to_response(row)) for row in rows]
+    )
+
+
+@router.patch(":batch", response_model=BatchResponse[ExperimentResponse])
+async def update_experiments_batch(body: ExperimentBatchUpdate):
+    ids = [str(item.id) for item in body.items]
+    check_unique(ids)
+    supabase = get_supabase()
+    patches = {
+        str(item.id): item.model_dump(mode="json", exclude={"id"}, exclude_unset=True)
+        for item in body.items
+    }
+    updated = await update_rows(supabase, "experiments", patches)
+    if updated:
+        record_change("experiments", "update", updated, updated.values())
+    for row in updated.values():
+        experiment_graph.upsert(row)
+    results = []
+    for row_id in ids:
+        row = updated.get(row_id)
+        if row is None:
+            results.append(BatchItemResult(id=row_id, status=404, detail="Experiment not found"))
+        else:
+            results.append(BatchItemResult(id=row_id, status=200, item=_row_to_response(row)))
+    return BatchResponse[ExperimentResponse](results=results)
+
+
+@router.delete(":batch", response_model=BatchResponse[ExperimentResponse])
+async def delete_experiments_batch(body: BatchDelete):
+    ids = [str(row_id) for row_id in body.ids]
+    check_unique(ids)
+    supabase = get_supabase()
+    deleted = await delete_rows(supabase, "experiments", ids)
+    if deleted:
+        record_change("experiments", "delete", [row_id for row_id in ids if row_id in deleted])
+    for row_id in deleted:
+        experiment_graph.remove(row_id)
+    return BatchResponse[ExperimentResponse](
+        results=[
+            BatchItemResult(id=row_id, status=204)
+            if row_id in deleted
+            else BatchItemResult(id=row_id, status=404, detail="Experiment not found")
+            for row_id in ids
+        ]
+    )
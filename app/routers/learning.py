@@ -1,23 +1,54 @@
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from postgrest.exceptions import APIError
 
+from app.batch import check_unique, delete_rows, insert_rows, update_rows
+from app.cache import fetch_rows
+from app.changes import GOAL_COLUMNS, GOAL_EXPRESSIONS
+from app.etag import collection_etag, etag_matches, item_etag, not_modified
+from app.events import record_change
+from app.export import ExportFormat, export_response, iter_chunks
+from app.pagination import DEFAULT_LIMIT, MAX_LIMIT, apply_page, page_rows, parse_sort
+from app.projection import output_model, parse_fields, select_columns
+from app.replica import local_replica
+from app.schemas.batch import BatchDelete, BatchItemResult, BatchResponse
 from app.schemas.learning import (
+    LearningGoalBatchCreate,
+    LearningGoalBatchUpdate,
     LearningGoalCreate,
+    LearningGoalPage,
     LearningGoalResponse,
+    LearningGoalSort,
     LearningGoalUpdate,
+    WeeklyHoursItem,
+    WeeklyHoursUpsert,
 )
-from app.supabase_client import get_supabase
+from app.serialization import row_response, rows_response
+from app.supabase_client import execute, get_supabase
 
 router = APIRouter(prefix="/learning", tags=["learning"])
 
 
+def _sorted_weeks(items: Optional[list]) -> list:
+    return sorted(items or [], key=lambda item: item["week_key"])
+
+
+def _with_sorted_weeks(row: dict) -> dict:
+    if "weekly_hours" not in row:
+        return row
+    return {**row, "weekly_hours": _sorted_weeks(row["weekly_hours"])}
+
+
 def _row_to_response(row: dict) -> LearningGoalResponse:
+    row = _with_sorted_weeks(row)
     return LearningGoalResponse(
         id=row["id"],
         title=row["title"],
         target_hours=row.get("target_hours"),
         progress_percent=row.get("progress_percent", 0),
+        logged_hours=row.get("logged_hours", 0),
         notes=row.get("notes", ""),
         resources=row.get("resources") or [],
         weekly_hours=row.get("weekly_hours") or [],
@@ -26,39 +57,95 @@ def _row_to_response(row: dict) -> LearningGoalResponse:
     )
 
 
-@router.get("/goals", response_model=list[LearningGoalResponse])
-async def list_goals():
+def _insert_payload(body: LearningGoalCreate) -> dict:
+    return {
+        "title": body.title,
+        "target_hours": body.target_hours,
+        "notes": body.notes,
+        "resources": [],
+    }
+
+
+@router.get("/goals", response_model=LearningGoalPage)
+async def list_goals(
+    request: Request,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: LearningGoalSort = "-created_at",
+):
+    selected = parse_fields(fields, LearningGoalResponse)
+    column, desc = parse_sort(sort)
     supabase = get_supabase()
-    resp = supabase.table("learning_goals").select("*").order("created_at", desc=True).execute()
-    return [_row_to_response(row) for row in (resp.data or [])]
+    columns = select_columns(LearningGoalResponse, selected, "id", column, "updated_at", expressions=GOAL_EXPRESSIONS)
+    if local_replica.serves("learning_goals", column):
+        rows = local_replica.page("learning_goals", column, limit, cursor, desc)
+    else:
+        rows = await fetch_rows(
+            ("learning_goals", "list", columns, limit, cursor, sort),
+            lambda: apply_page(supabase.table("learning_goals").select(columns), column, limit, cursor, desc),
+        )
+    rows, next_cursor = page_rows(rows, column, limit, desc)
+    etag = collection_etag(rows, selected, next_cursor, sort)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return rows_response(
+        output_model(LearningGoalResponse, selected),
+        [_with_sorted_weeks(row) for row in rows],
+        next_cursor,
+        {"ETag": etag},
+    )
 
 
-@router.get("/goals/{goal_id}", response_model=LearningGoalResponse)
-async def get_goal(goal_id: UUID):
+@router.get("/goals/export")
+async def export_goals(export_format: ExportFormat = Query("ndjson", alias="format")):
     supabase = get_supabase()
-    resp = supabase.table("learning_goals").select("*").eq("id", str(goal_id)).execute()
-    if not resp.data or len(resp.data) == 0:
+    columns = GOAL_COLUMNS
+    chunks = iter_chunks(lambda: supabase.table("learning_goals").select(columns), "created_at")
+    return export_response(LearningGoalResponse, chunks, export_format, "learning_goals")
+
+
+async def _get_row(goal_id: UUID, columns: str) -> dict:
+    if local_replica.serves("learning_goals"):
+        rows = local_replica.get("learning_goals", str(goal_id))
+    else:
+        supabase = get_supabase()
+        rows = await fetch_rows(
+            ("learning_goals", "get", columns, str(goal_id)),
+            lambda: supabase.table("learning_goals").select(columns).eq("id", str(goal_id)),
+        )
+    if not rows:
         raise HTTPException(status_code=404, detail="Goal not found")
-    return _row_to_response(resp.data[0])
+    return rows[0]
+
+
+@router.get("/goals/{goal_id}", response_model=LearningGoalResponse)
+async def get_goal(
+    goal_id: UUID,
+    request: Request,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields, LearningGoalResponse)
+    columns = select_columns(LearningGoalResponse, selected, "id", "updated_at", expressions=GOAL_EXPRESSIONS)
+    row = await _get_row(goal_id, columns)
+    etag = item_etag(row, selected)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return row_response(output_model(LearningGoalResponse, selected), _with_sorted_weeks(row), {"ETag": etag})
 
 
 @router.post("/goals", response_model=LearningGoalResponse, status_code=201)
 async def create_goal(body: LearningGoalCreate):
     supabase = get_supabase()
-    payload = {
-        "title": body.title,
-        "target_hours": body.target_hours,
-        "progress_percent": 0,
-        "notes": body.notes,
-        "resources": [],
-        "weekly_hours": [],
-    }
+    payload = _insert_payload(body)
     try:
-        resp = supabase.table("learning_goals").insert(payload).execute()
+        resp = await execute(supabase.table("learning_goals").insert(payload))
         if not resp.data or len(resp.data) == 0:
             raise HTTPException(status_code=500, detail="Insert failed")
+        record_change("learning_goals", "insert", [resp.data[0]["id"]], resp.data)
         return _row_to_response(resp.data[0])
-    except HTTPException:
+    except (HTTPException, ValueError):
+        # ValueError covers CircuitOpenError and OverloadedError: 503 with Retry-After from the app's handlers
         raise
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
@@ -69,17 +156,110 @@ async def update_goal(goal_id: UUID, body: LearningGoalUpdate):
     supabase = get_supabase()
     payload = body.model_dump(exclude_unset=True)
     if not payload:
-        return await get_goal(goal_id)
-    resp = supabase.table("learning_goals").update(payload).eq("id", str(goal_id)).execute()
+        return _row_to_response(await _get_row(goal_id, GOAL_COLUMNS))
+    resp = await execute(
+        supabase.table("learning_goals").update(payload).eq("id", str(goal_id)).select(GOAL_COLUMNS)
+    )
     if not resp.data or len(resp.data) == 0:
         raise HTTPException(status_code=404, detail="Goal not found")
+    record_change("learning_goals", "update", [goal_id], resp.data)
     return _row_to_response(resp.data[0])
 
 
 @router.delete("/goals/{goal_id}", status_code=204)
 async def delete_goal(goal_id: UUID):
     supabase = get_supabase()
-    resp = supabase.table("learning_goals").delete().eq("id", str(goal_id)).execute()
+    resp = await execute(supabase.table("learning_goals").delete().eq("id", str(goal_id)))
     if resp.data is not None and len(resp.data) == 0:
         raise HTTPException(status_code=404, detail="Goal not found")
+    record_change("learning_goals", "delete", [goal_id])
     return None
+
+
+@router.get("/goals/{goal_id}/weekly-hours", response_model=list[WeeklyHoursItem])
+async def list_weekly_hours(goal_id: UUID):
+    row = await _get_row(goal_id, "id," + GOAL_EXPRESSIONS["weekly_hours"])
+    return _sorted_weeks(row.get("weekly_hours"))
+
+
+@router.put("/goals/{goal_id}/weekly-hours/{week_key}", response_model=WeeklyHoursItem)
+async def put_weekly_hours(goal_id: UUID, week_key: str, body: WeeklyHoursUpsert):
+    supabase = get_supabase()
+    payload = {"goal_id": str(goal_id), "week_key": week_key, "hours": body.hours}
+    try:
+        resp = await execute(
+            supabase.table("learning_goal_weekly_hours").upsert(payload, on_conflict="goal_id,week_key")
+        )
+    except APIError as e:
+        if e.code == "23503":
+            raise HTTPException(status_code=404, detail="Goal not found")
+        raise
+    if not resp.data or len(resp.data) == 0:
+        raise HTTPException(status_code=500, detail="Upsert failed")
+    record_change("learning_goals", "update", [goal_id])
+    return WeeklyHoursItem(week_key=resp.data[0]["week_key"], hours=resp.data[0]["hours"])
+
+
+@router.delete("/goals/{goal_id}/weekly-hours/{week_key}", status_code=204)
+async def delete_weekly_hours(goal_id: UUID, week_key: str):
+    supabase = get_supabase()
+    resp = await execute(
+        supabase.table("learning_goal_weekly_hours")
+        .delete()
+        .eq("goal_id", str(goal_id))
+        .eq("week_key", week_key)
+    )
+    if resp.data is not None and len(resp.data) == 0:
+        raise HTTPException(status_code=404, detail="Week not found")
+    record_change("learning_goals", "update", [goal_id])
+    return None
+
+
+@router.post("/goals:batch", response_model=BatchResponse[LearningGoalResponse])
+async def create_goals_batch(body: LearningGoalBatchCreate):
+    supabase = get_supabase()
+    rows = await insert_rows(supabase, "learning_goals", [_insert_payload(item) for item in body.items])
+    record_change("learning_goals", "insert", [row["id"] for row in rows], rows)
+    return BatchResponse[LearningGoalResponse](
+        results=[BatchItemResult(id=row["id"], status=201, item=_row_to_response(row)) for row in rows]
+    )
+
+
+@router.patch("/goals:batch", response_model=BatchResponse[LearningGoalResponse])
+async def update_goals_batch(body: LearningGoalBatchUpdate):
+    ids = [str(item.id) for item in body.items]
+    check_unique(ids)
+    supabase = get_supabase()
+    patches = {
+        str(item.id): item.model_dump(mode="json", exclude={"id"}, exclude_unset=True)
+        for item in body.items
+    }
+    updated = await update_rows(supabase, "learning_goals", patches, returning=GOAL_COLUMNS)
+    if updated:
+        record_change("learning_goals", "update", updated, updated.values())
+    results = []
+    for row_id in ids:
+        row = updated.get(row_id)
+        if row is None:
+            results.append(BatchItemResult(id=row_id, status=404, detail="Goal not found"))
+        else:
+            results.append(BatchItemResult(id=row_id, status=200, item=_row_to_response(row)))
+    return BatchResponse[LearningGoalResponse](results=results)
+
+
+@router.delete("/goals:batch", response_model=BatchResponse[LearningGoalResponse])
+async def delete_goals_batch(body: BatchDelete):
+    ids = [str(row_id) for row_id in body.ids]
+    check_unique(ids)
+    supabase = get_supabase()
+    deleted = await delete_rows(supabase, "learning_goals", ids)
+    if deleted:
+        record_change("learning_goals", "delete", [row_id for row_id in ids if row_id in deleted])
+    return BatchResponse[LearningGoalResponse](
+        results=[
+            BatchItemResult(id=row_id, status=204)
+            if row_id in deleted
+            else BatchItemResult(id=row_id, status=404, detail="Goal not found")
+            for row_id in ids
+        ]
+    )
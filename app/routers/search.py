@@ -0,0 +1,44 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.schemas.search import SearchHit, SearchKind, SearchResponse
+from app.supabase_client import execute, get_supabase
+
+router = APIRouter(tags=["search"])
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+MAX_SEARCH_OFFSET = 1000
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., max_length=200),
+    kind: Optional[List[SearchKind]] = Query(None),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+):
+    """Ranked full-text search over goals, experiments and service entries.
+
+    ``q`` uses web-search syntax (``"exact phrase"``, ``or``, ``-exclude``);
+    snippets are HTML-escaped text with matches wrapped in ``<mark>``.
+    """
+    query = q.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="q must not be empty")
+    supabase = get_supabase()
+    params = {
+        "query": query,
+        "kinds": sorted(set(kind)) if kind else None,
+        "result_limit": limit + 1,
+        "result_offset": offset,
+    }
+    # Not cached: queries rarely repeat, and hits span three tables.
+    resp = await execute(supabase.rpc("search_all", params), read=True)
+    rows = resp.data or []
+    return SearchResponse(
+        query=query,
+        items=[SearchHit.model_validate(row) for row in rows[:limit]],
+        next_offset=offset + limit if len(rows) > limit else None,
+    )
@@ -1,13 +1,32 @@
+from datetime import date
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 
+from app.batch import check_unique, delete_rows, insert_rows, update_rows
+from app.cache import fetch_rows
+from app.etag import collection_etag, etag_matches, item_etag, not_modified
+from app.events import record_change
+from app.export import ExportFormat, export_response, iter_chunks
+from app.pagination import DEFAULT_LIMIT, MAX_LIMIT, apply_page, page_rows, parse_sort
+from app.projection import output_model, parse_fields, select_columns
+from app.replica import local_replica
+from app.schemas.batch import BatchDelete, BatchItemResult, BatchResponse
 from app.schemas.service import (
+    ServiceEntryBatchCreate,
+    ServiceEntryBatchUpdate,
     ServiceEntryCreate,
+    ServiceEntryPage,
     ServiceEntryResponse,
+    ServiceEntrySort,
     ServiceEntryUpdate,
+    ServiceStatsBucket,
+    ServiceStatsResponse,
+    StatsGroupBy,
 )
-from app.supabase_client import get_supabase
+from app.serialization import row_response, rows_response
+from app.supabase_client import execute, get_supabase
 
 router = APIRouter(prefix="/service", tags=["service"])
 
@@ -24,34 +43,106 @@ def _row_to_response(row: dict) -> ServiceEntryResponse:
     )
 
 
-@router.get("/entries", response_model=list[ServiceEntryResponse])
-async def list_entries():
+def _insert_payload(body: ServiceEntryCreate) -> dict:
+    return {
+        "date": body.date.isoformat(),
+        "description": body.description,
+        "hours": body.hours,
+        "reflection": body.reflection,
+    }
+
+
+@router.get("/entries", response_model=ServiceEntryPage)
+async def list_entries(
+    request: Request,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    min_hours: Optional[float] = Query(None, ge=0),
+    sort: ServiceEntrySort = "-date",
+):
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    selected = parse_fields(fields, ServiceEntryResponse)
+    column, desc = parse_sort(sort)
+    filters = (
+        date_from.isoformat() if date_from else None,
+        date_to.isoformat() if date_to else None,
+        min_hours,
+    )
     supabase = get_supabase()
-    resp = supabase.table("service_entries").select("*").order("date", desc=True).execute()
-    return [_row_to_response(row) for row in (resp.data or [])]
+    columns = select_columns(ServiceEntryResponse, selected, "id", column, "updated_at")
 
+    def build():
+        query = supabase.table("service_entries").select(columns)
+        if date_from:
+            query = query.gte("date", filters[0])
+        if date_to:
+            query = query.lte("date", filters[1])
+        if min_hours is not None:
+            query = query.gte("hours", min_hours)
+        return apply_page(query, column, limit, cursor, desc)
 
-@router.get("/entries/{entry_id}", response_model=ServiceEntryResponse)
-async def get_entry(entry_id: UUID):
+    if local_replica.serves("service_entries", column):
+        conditions = [("date", ">=", filters[0]), ("date", "<=", filters[1]), ("hours", ">=", filters[2])]
+        rows = local_replica.page(
+            "service_entries", column, limit, cursor, desc, [c for c in conditions if c[2] is not None]
+        )
+    else:
+        rows = await fetch_rows(("service_entries", "list", columns, limit, cursor, sort, filters), build)
+    rows, next_cursor = page_rows(rows, column, limit, desc)
+    etag = collection_etag(rows, selected, next_cursor, sort, filters)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return rows_response(output_model(ServiceEntryResponse, selected), rows, next_cursor, {"ETag": etag})
+
+
+@router.get("/entries/export")
+async def export_entries(export_format: ExportFormat = Query("ndjson", alias="format")):
     supabase = get_supabase()
-    resp = supabase.table("service_entries").select("*").eq("id", str(entry_id)).execute()
-    if not resp.data or len(resp.data) == 0:
+    columns = select_columns(ServiceEntryResponse, None)
+    chunks = iter_chunks(lambda: supabase.table("service_entries").select(columns), "date")
+    return export_response(ServiceEntryResponse, chunks, export_format, "service_entries")
+
+
+async def _get_row(entry_id: UUID, columns: str) -> dict:
+    if local_replica.serves("service_entries"):
+        rows = local_replica.get("service_entries", str(entry_id))
+    else:
+        supabase = get_supabase()
+        rows = await fetch_rows(
+            ("service_entries", "get", columns, str(entry_id)),
+            lambda: supabase.table("service_entries").select(columns).eq("id", str(entry_id)),
+        )
+    if not rows:
         raise HTTPException(status_code=404, detail="Entry not found")
-    return _row_to_response(resp.data[0])
+    return rows[0]
+
+
+@router.get("/entries/{entry_id}", response_model=ServiceEntryResponse)
+async def get_entry(
+    entry_id: UUID,
+    request: Request,
+    fields: Optional[str] = None,
+):
+    selected = parse_fields(fields, ServiceEntryResponse)
+    row = await _get_row(entry_id, select_columns(ServiceEntryResponse, selected, "id", "updated_at"))
+    etag = item_etag(row, selected)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return row_response(output_model(ServiceEntryResponse, selected), row, {"ETag": etag})
 
 
 @router.post("/entries", response_model=ServiceEntryResponse, status_code=201)
 async def create_entry(body: ServiceEntryCreate):
     supabase = get_supabase()
-    payload = {
-        "date": body.date.isoformat(),
-        "description": body.description,
-        "hours": body.hours,
-        "reflection": body.reflection,
-    }
-    resp = supabase.table("service_entries").insert(payload).execute()
+    payload = _insert_payload(body)
+    resp = await execute(supabase.table("service_entries").insert(payload))
     if not resp.data or len(resp.data) == 0:
         raise HTTPException(status_code=500, detail="Insert failed")
+    record_change("service_entries", "insert", [resp.data[0]["id"]], resp.data)
     return _row_to_response(resp.data[0])
 
 
@@ -62,17 +153,101 @@ async def update_entry(entry_id: UUID, body: ServiceEntryUpdate):
     if "date" in payload:
         payload["date"] = payload["date"].isoformat()
     if not payload:
-        return await get_entry(entry_id)
-    resp = supabase.table("service_entries").update(payload).eq("id", str(entry_id)).execute()
+        return _row_to_response(await _get_row(entry_id, select_columns(ServiceEntryResponse, None)))
+    resp = await execute(supabase.table("service_entries").update(payload).eq("id", str(entry_id)))
     if not resp.data or len(resp.data) == 0:
         raise HTTPException(status_code=404, detail="Entry not found")
+    record_change("service_entries", "update", [entry_id], resp.data)
     return _row_to_response(resp.data[0])
 
 
 @router.delete("/entries/{entry_id}", status_code=204)
 async def delete_entry(entry_id: UUID):
     supabase = get_supabase()
-    resp = supabase.table("service_entries").delete().eq("id", str(entry_id)).execute()
+    resp = await execute(supabase.table("service_entries").delete().eq("id", str(entry_id)))
     if resp.data is not None and len(resp.data) == 0:
         raise HTTPException(status_code=404, detail="Entry not found")
+    record_change("service_entries", "delete", [entry_id])
     return None
+
+
+@router.post("/entries:batch", response_model=BatchResponse[ServiceEntryResponse])
+async def create_entries_batch(body: ServiceEntryBatchCreate):
+    supabase = get_supabase()
+    rows = await insert_rows(supabase, "service_entries", [_insert_payload(item) for item in body.items])
+    record_change("service_entries", "insert", [row["id"] for row in rows], rows)
+    return BatchResponse[ServiceEntryResponse](
+        results=[BatchItemResult(id=row["id"], status=201, item=_row_to_response(row)) for row in rows]
+    )
+
+
+@router.patch("/entries:batch", response_model=BatchResponse[ServiceEntryResponse])
+async def update_entries_batch(body: ServiceEntryBatchUpdate):
+    ids = [str(item.id) for item in body.items]
+    check_unique(ids)
+    supabase = get_supabase()
+    patches = {
+        str(item.id): item.model_dump(mode="json", exclude={"id"}, exclude_unset=True)
+        for item in body.items
+    }
+    updated = await update_rows(supabase, "service_entries", patches)
+    if updated:
+        record_change("service_entries", "update", updated, updated.values())
+    results = []
+    for row_id in ids:
+        row = updated.get(row_id)
+        if row is None:
+            results.append(BatchItemResult(id=row_id, status=404, detail="Entry not found"))
+        else:
+            results.append(BatchItemResult(id=row_id, status=200, item=_row_to_response(row)))
+    return BatchResponse[ServiceEntryResponse](results=results)
+
+
+@router.delete("/entries:batch", response_model=BatchResponse[ServiceEntryResponse])
+async def delete_entries_batch(body: BatchDelete):
+    ids = [str(row_id) for row_id in body.ids]
+    check_unique(ids)
+    supabase = get_supabase()
+    deleted = await delete_rows(supabase, "service_entries", ids)
+    if deleted:
+        record_change("service_entries", "delete", [row_id for row_id in ids if row_id in deleted])
+    return BatchResponse[ServiceEntryResponse](
+        results=[
+            BatchItemResult(id=row_id, status=204)
+            if row_id in deleted
+            else BatchItemResult(id=row_id, status=404, detail="Entry not found")
+            for row_id in ids
+        ]
+    )
+
+
+@router.get("/stats", response_model=ServiceStatsResponse)
+async def service_stats(
+    group_by: StatsGroupBy = "month",
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+):
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    supabase = get_supabase()
+    params = {
+        "group_by": group_by,
+        "date_from": date_from.isoformat() if date_from else None,
+        "date_to": date_to.isoformat() if date_to else None,
+    }
+    rows = await fetch_rows(
+        ("service_entries", "stats", group_by, params["date_from"], params["date_to"]),
+        lambda: supabase.rpc("service_hours_stats", params),
+    )
+    buckets = [ServiceStatsBucket.model_validate(row) for row in rows]
+    total_hours = sum(bucket.total_hours for bucket in buckets)
+    entry_count = sum(bucket.entry_count for bucket in buckets)
+    return ServiceStatsResponse(
+        group_by=group_by,
+        date_from=date_from,
+        date_to=date_to,
+        total_hours=total_hours,
+        entry_count=entry_count,
+        avg_hours=total_hours / entry_count if entry_count else None,
+        buckets=buckets,
+    )
@@ -0,0 +1,95 @@
+import asyncio
+import base64
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.changes import MODELS, SOURCES, TOMBSTONES, advance, changes_query
+from app.config import settings
+from app.routers.learning import _with_sorted_weeks
+from app.schemas.learning import LearningGoalResponse
+from app.schemas.sync import SyncResponse, Tombstone
+from app.serialization import ORJSONResponse, dump_rows
+from app.supabase_client import execute, get_supabase
+
+router = APIRouter(tags=["sync"])
+
+DEFAULT_SYNC_LIMIT = 500
+MAX_SYNC_LIMIT = 2000
+
+
+def encode_token(positions: dict[str, Optional[list]], issued_at: float) -> str:
+    raw = json.dumps({"p": positions, "t": int(issued_at)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token: str) -> tuple[dict[str, Optional[list]], float]:
+    """Return ``(positions, issued_at)``; raises a 400 for a malformed token."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        positions = {source: data["p"][source] for source in SOURCES}
+        for position in positions.values():
+            if position is not None and (not isinstance(position, list) or len(position) != 2):
+                raise ValueError("bad position")
+        return positions, float(data["t"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+@router.get("/sync", response_model=SyncResponse)
+async def sync(
+    since: Optional[str] = None,
+    limit: int = Query(DEFAULT_SYNC_LIMIT, ge=1, le=MAX_SYNC_LIMIT),
+):
+    """Rows changed and deleted since ``since``, oldest first, across all three tables.
+
+    Without ``since`` every row is returned (a full sync) and no tombstones.
+    Each table returns at most ``limit`` rows per call; while ``has_more`` is
+    true, call again with ``next_token``. Rows may be sent more than once, so
+    clients should upsert by id. A token older than
+    ``sync_tombstone_retention_days`` is rejected with 410: tombstones it
+    would need may have been purged, so the client must start a full sync.
+    """
+    now = time.time()
+    horizon = datetime.fromtimestamp(now, timezone.utc) - timedelta(seconds=settings.sync_overlap_seconds)
+    if since is None:
+        positions: dict[str, Optional[list]] = {source: None for source in SOURCES}
+        # a full sync has nothing to delete; start tombstones from now
+        positions[TOMBSTONES] = [horizon.isoformat(), 0]
+        sources = list(MODELS)
+    else:
+        positions, issued_at = decode_token(since)
+        if now - issued_at > settings.sync_tombstone_retention_days * 86400:
+            raise HTTPException(status_code=410, detail="Sync token expired, start a full sync")
+        sources = list(SOURCES)
+
+    supabase = get_supabase()
+    responses = await asyncio.gather(
+        *(execute(changes_query(supabase, source, positions[source], limit), read=True) for source in sources)
+    )
+    changes: dict[str, Any] = {}
+    deleted: list[dict] = []
+    has_more = False
+    for source, resp in zip(sources, responses):
+        rows, positions[source], more = advance(source, resp.data or [], limit, positions[source], horizon)
+        has_more = has_more or more
+        if source == TOMBSTONES:
+            deleted = [
+                {"table": row["table_name"], "id": row["row_id"], "deleted_at": row["deleted_at"]} for row in rows
+            ]
+        elif source == "learning_goals":
+            changes[source] = dump_rows(LearningGoalResponse, [_with_sorted_weeks(row) for row in rows])
+        else:
+            changes[source] = dump_rows(MODELS[source], rows)
+    return ORJSONResponse(
+        {
+            "changes": changes,
+            "deleted": dump_rows(Tombstone, deleted),
+            "next_token": encode_token(positions, now),
+            "has_more": has_more,
+        }
+    )
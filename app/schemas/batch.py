@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import Generic, List, Optional, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+MAX_BATCH_ITEMS = 5000
+
+T = TypeVar("T")
+
+
+class BatchDelete(BaseModel):
+    ids: List[UUID] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+class BatchItemResult(BaseModel, Generic[T]):
+    id: Optional[UUID] = None
+    status: int
+    item: Optional[T] = None
+    detail: Optional[str] = None
+
+
+class BatchResponse(BaseModel, Generic[T]):
+    results: List[BatchItemResult[T]]
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class DashboardGoal(BaseModel):
+    id: UUID
+    title: str
+    target_hours: Optional[float] = None
+    logged_hours: float
+    progress_percent: float
+    updated_at: datetime
+
+
+class DashboardEntry(BaseModel):
+    id: UUID
+    date: date
+    description: str
+    hours: float
+
+
+class HourTotals(BaseModel):
+    total_hours: float
+    entry_count: int
+    week_hours: float
+    month_hours: float
+    year_hours: float
+
+
+class DashboardResponse(BaseModel):
+    experiments: Dict[str, int]
+    goals: List[DashboardGoal]
+    recent_entries: List[DashboardEntry]
+    hours: HourTotals
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel
+
+ChangeTable = Literal["learning_goals", "experiments", "service_entries"]
+# "resync": events were missed (slow consumer or unknown Last-Event-ID); refetch the lists
+ChangeOp = Literal["insert", "update", "delete", "resync"]
+
+
+class ChangeEvent(BaseModel):
+    id: int
+    table: Optional[ChangeTable] = None
+    op: ChangeOp
+    ids: List[str] = []
+    at: datetime
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
 
+from app.schemas.batch import MAX_BATCH_ITEMS
+
 ExperimentStatus = str
+# The values allowed by the experiments.status check constraint
+ExperimentStatusFilter = Literal["not_started", "in_progress", "completed"]
+ExperimentSort = Literal["created_at", "-created_at", "updated_at", "-updated_at", "title", "-title"]
 
 
 class ExperimentCreate(BaseModel):
@@ -39,3 +44,34 @@ class ExperimentResponse(BaseModel):
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class ExperimentPage(BaseModel):
+    items: List[ExperimentResponse]
+    next_cursor: Optional[str] = None
+
+
+class ExperimentGraphNode(BaseModel):
+    id: str
+    title: str
+    status: str
+    dependencies: List[str]
+
+
+class ExperimentGraphResponse(BaseModel):
+    order: List[ExperimentGraphNode]
+    cycles: List[List[str]]
+    critical_path: List[str]
+    missing_dependencies: Dict[str, List[str]]
+
+
+class ExperimentBatchCreate(BaseModel):
+    items: List[ExperimentCreate] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+class ExperimentBatchUpdateItem(ExperimentUpdate):
+    id: UUID
+
+
+class ExperimentBatchUpdate(BaseModel):
+    items: List[ExperimentBatchUpdateItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
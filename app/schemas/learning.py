@@ -1,17 +1,27 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field
 
+from app.schemas.batch import MAX_BATCH_ITEMS
+
+LearningGoalSort = Literal[
+    "created_at", "-created_at", "updated_at", "-updated_at", "title", "-title", "progress_percent", "-progress_percent"
+]
+
 
 class WeeklyHoursItem(BaseModel):
     week_key: str
     hours: float
 
 
+class WeeklyHoursUpsert(BaseModel):
+    hours: float = Field(ge=0)
+
+
 class LearningGoalCreate(BaseModel):
     title: str
     target_hours: Optional[float] = None
@@ -21,10 +31,8 @@ class LearningGoalCreate(BaseModel):
 class LearningGoalUpdate(BaseModel):
     title: Optional[str] = None
     target_hours: Optional[float] = None
-    progress_percent: Optional[float] = None
     notes: Optional[str] = None
     resources: Optional[List[str]] = None
-    weekly_hours: Optional[List[WeeklyHoursItem]] = None
 
 
 class LearningGoalResponse(BaseModel):
@@ -32,10 +40,28 @@ class LearningGoalResponse(BaseModel):
     title: str
     target_hours: Optional[float]
     progress_percent: float
+    logged_hours: float
     notes: str
     resources: List[str]
-    weekly_hours: List[dict]
+    weekly_hours: List[WeeklyHoursItem]
     created_at: datetime
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class LearningGoalPage(BaseModel):
+    items: List[LearningGoalResponse]
+    next_cursor: Optional[str] = None
+
+
+class LearningGoalBatchCreate(BaseModel):
+    items: List[LearningGoalCreate] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+class LearningGoalBatchUpdateItem(LearningGoalUpdate):
+    id: UUID
+
+
+class LearningGoalBatchUpdate(BaseModel):
+    items: List[LearningGoalBatchUpdateItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+SearchKind = Literal["learning_goal", "experiment", "service_entry"]
+
+
+class SearchHit(BaseModel):
+    kind: SearchKind
+    id: UUID
+    title: str
+    snippet: str
+    rank: float
+    updated_at: datetime
+
+
+class SearchResponse(BaseModel):
+    query: str
+    items: List[SearchHit]
+    next_offset: Optional[int] = None
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.schemas.batch import MAX_BATCH_ITEMS
+
+ServiceEntrySort = Literal["date", "-date", "created_at", "-created_at", "hours", "-hours"]
 
 
 class ServiceEntryCreate(BaseModel):
@@ -31,3 +35,40 @@ class ServiceEntryResponse(BaseModel):
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class ServiceEntryPage(BaseModel):
+    items: List[ServiceEntryResponse]
+    next_cursor: Optional[str] = None
+
+
+StatsGroupBy = Literal["week", "month", "year"]
+
+
+class ServiceStatsBucket(BaseModel):
+    period: date
+    total_hours: float
+    entry_count: int
+    avg_hours: float
+
+
+class ServiceStatsResponse(BaseModel):
+    group_by: StatsGroupBy
+    date_from: Optional[date]
+    date_to: Optional[date]
+    total_hours: float
+    entry_count: int
+    avg_hours: Optional[float]
+    buckets: List[ServiceStatsBucket]
+
+
+class ServiceEntryBatchCreate(BaseModel):
+    items: List[ServiceEntryCreate] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
+
+
+class ServiceEntryBatchUpdateItem(ServiceEntryUpdate):
+    id: UUID
+
+
+class ServiceEntryBatchUpdate(BaseModel):
+    items: List[ServiceEntryBatchUpdateItem] = Field(min_length=1, max_length=MAX_BATCH_ITEMS)
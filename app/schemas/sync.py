@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.schemas.events import ChangeTable
+from app.schemas.experiments import ExperimentResponse
+from app.schemas.learning import LearningGoalResponse
+from app.schemas.service import ServiceEntryResponse
+
+
+class Tombstone(BaseModel):
+    table: ChangeTable
+    id: UUID
+    deleted_at: datetime
+
+
+class SyncChanges(BaseModel):
+    learning_goals: List[LearningGoalResponse]
+    experiments: List[ExperimentResponse]
+    service_entries: List[ServiceEntryResponse]
+
+
+class SyncResponse(BaseModel):
+    changes: SyncChanges
+    deleted: List[Tombstone]
+    next_token: str
+    has_more: bool
@@ -0,0 +1,46 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson; ``orjson.Fragment`` values are copied in as-is."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+@lru_cache(maxsize=128)
+def list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+def dump_rows(model: type[BaseModel], rows: list[dict]) -> orjson.Fragment:
+    """Validate raw PostgREST ``rows`` against ``model`` in one call and serialize them.
+
+    Validation and encoding both run in pydantic-core, so no intermediate
+    model instances or dicts are built per row in Python.
+    """
+    adapter = list_adapter(model)
+    return orjson.Fragment(adapter.dump_json(adapter.validate_python(rows)))
+
+
+def dump_row(model: type[BaseModel], row: dict) -> orjson.Fragment:
+    return orjson.Fragment(model.model_validate(row).model_dump_json())
+
+
+def rows_response(
+    model: type[BaseModel],
+    rows: list[dict],
+    next_cursor: Optional[str],
+    headers: Optional[dict[str, str]] = None,
+) -> ORJSONResponse:
+    """Page envelope for ``rows``; bypasses the route's ``response_model`` re-validation."""
+    return ORJSONResponse({"items": dump_rows(model, rows), "next_cursor": next_cursor}, headers=headers)
+
+
+def row_response(model: type[BaseModel], row: dict, headers: Optional[dict[str, str]] = None) -> ORJSONResponse:
+    return ORJSONResponse(dump_row(model, row), headers=headers)
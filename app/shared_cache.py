@@ -0,0 +1,258 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+create table if not exists versions (
+    name text primary key,
+    version integer not null
+);
+create table if not exists entries (
+    key text primary key,
+    name text not null,
+    version integer not null,
+    stored_at real not null,
+    rows blob not null
+);
+create index if not exists entries_name on entries (name);
+create index if not exists entries_stored_at on entries (stored_at);
+"""
+
+# prune expired entries once every this many writes
+_PRUNE_EVERY = 256
+# how long a statement on the event loop waits for another worker's write lock
+_LOOP_BUSY_TIMEOUT = 0.1
+# the writer thread is not on the event loop, so it can wait longer
+_WRITER_BUSY_TIMEOUT = 5.0
+# entries waiting for the writer thread; more are skipped rather than queued
+_MAX_PENDING = 256
+# pause between attempts of a version bump that the event loop could not make,
+# and how long to keep trying; cached rows have expired everywhere by then
+_BUMP_RETRY_DELAY = 0.5
+_BUMP_RETRY_FOR = 30.0
+_BUMP = (
+    "insert into versions (name, version) values (?, 1)"
+    " on conflict (name) do update set version = version + 1 returning version"
+)
+
+
+class SharedCache:
+    """Cached rows and per-table version counters in a SQLite file shared by the workers on a host.
+
+    :meth:`bump` is the invalidation broadcast: every worker reads a table's
+    version before trusting rows cached for it, in this file or in its own
+    memory, and entries stored under an older version are ignored. WAL mode
+    lets readers run alongside a writer. The lookups are local page-cache
+    reads of a few microseconds that never wait for a lock, so they run on
+    the event loop instead of in a thread. So does :meth:`bump`, a one-row
+    write that waits at most ``_LOOP_BUSY_TIMEOUT`` for another worker's
+    write lock. Storing rows and pruning happen on a writer thread per worker.
+
+    A bump the event loop cannot make is counted locally and retried on the
+    writer thread until the file takes it, so this worker's versions move at
+    once and the other workers' as soon as the file is free; the write that
+    triggered it never fails because of the cache.
+
+    Reading and storing rows is best effort: a SQLite error is logged and
+    treated as a miss, and rows the writer thread cannot keep up with are
+    not stored. Version reads raise, because serving rows without knowing
+    the version could serve them after a write.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._lock = threading.Lock()
+        self._pending = 0
+        # bumps made by this worker that the file has not taken yet, per name;
+        # _versions_lock keeps them consistent with the file's counters
+        self._unsynced: dict[str, int] = {}
+        self._versions_lock = threading.Lock()
+        self._known: dict[str, int] = {}
+        self._writes = 0
+        self.errors = 0
+        self.skipped = 0
+
+    def _connect(self, timeout: float) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        conn.execute("pragma journal_mode=wal")
+        conn.execute("pragma synchronous=normal")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _db(self) -> sqlite3.Connection:
+        # connections and threads must not cross a fork, so each worker opens its own
+        if self._conn is None or self._pid != os.getpid():
+            self._conn, self._pid = self._connect(_LOOP_BUSY_TIMEOUT), os.getpid()
+            self._writer = self._writer_conn = None
+            self._pending = 0
+            self._unsynced, self._known = {}, {}
+        return self._conn
+
+    def version(self, name: str) -> int:
+        db = self._db()
+        with self._versions_lock:
+            row = db.execute("select version from versions where name = ?", (name,)).fetchone()
+            version = (row[0] if row else 0) + self._unsynced.get(name, 0)
+        self._known[name] = max(version, self._known.get(name, 0))
+        return version
+
+    def bump(self, name: str) -> int:
+        """Move ``name`` to a new version, making everything cached for it stale in every worker.
+
+        Never raises: if the file is locked or fails, the bump is retried
+        on the writer thread and the version returned is this worker's.
+        """
+        try:
+            (version,) = self._db().execute(_BUMP, (name,)).fetchone()
+        except sqlite3.Error as exc:
+            self._failed(exc)
+            with self._versions_lock:
+                self._unsynced[name] = self._unsynced.get(name, 0) + 1
+            self._queue(self._retry_bump, name)
+        else:
+            self._submit("delete from entries where name = ? and version < ?", (name, version))
+        try:
+            return self.version(name)
+        except sqlite3.Error as exc:
+            self._failed(exc)
+            # the file's version has moved past the last one read here by this bump at least
+            self._known[name] = self._known.get(name, 0) + 1
+            return self._known[name]
+
+    def get(self, key: str, version: int) -> Optional[tuple[float, Any]]:
+        """Return ``(age, rows)`` stored for ``key`` at ``version`` within the TTL, or None."""
+        now = time.time()
+        try:
+            row = (
+                self._db()
+                .execute(
+                    "select stored_at, rows from entries where key = ? and version = ? and stored_at > ?",
+                    (key, version, now - self.ttl_seconds),
+                )
+                .fetchone()
+            )
+        except sqlite3.Error as exc:
+            self._failed(exc)
+            return None
+        if row is None:
+            return None
+        return now - row[0], orjson.loads(row[1])
+
+    def set(self, key: str, name: str, version: int, rows: Any) -> None:
+        """Store ``rows`` for ``key`` on the writer thread, unless ``name`` has moved past ``version`` by then."""
+        self._submit(
+            "insert or replace into entries (key, name, version, stored_at, rows)"
+            " select ?, ?, ?, ?, ? where coalesce((select version from versions where name = ?), 0) = ?",
+            (key, name, version, time.time(), orjson.dumps(rows), name, version),
+        )
+
+    def _submit(self, sql: str, params: tuple) -> None:
+        """Queue a write for the writer thread; skipped if ``_MAX_PENDING`` are already queued."""
+        self._db()
+        with self._lock:
+            if self._pending >= _MAX_PENDING:
+                self.skipped += 1
+                return
+            self._pending += 1
+        self._queue(self._write, sql, params)
+
+    def _queue(self, fn, *args) -> None:
+        self._db()
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-cache")
+        self._writer.submit(fn, *args)
+
+    def _writer_db(self) -> sqlite3.Connection:
+        if self._writer_conn is None:
+            self._writer_conn = self._connect(_WRITER_BUSY_TIMEOUT)
+        return self._writer_conn
+
+    def _retry_bump(self, name: str) -> None:
+        give_up_at = time.monotonic() + _BUMP_RETRY_FOR
+        while True:
+            try:
+                db = self._writer_db()
+                db.execute("begin immediate")
+                try:
+                    (version,) = db.execute(_BUMP, (name,)).fetchone()
+                    # committing and forgetting the local bump together keeps version() from moving back
+                    with self._versions_lock:
+                        db.execute("commit")
+                        self._unsynced[name] -= 1
+                except BaseException:
+                    if db.in_transaction:
+                        db.execute("rollback")
+                    raise
+                db.execute("delete from entries where name = ? and version < ?", (name, version))
+                return
+            except sqlite3.Error as exc:
+                self._failed(exc)
+                if time.monotonic() >= give_up_at:
+                    logger.error("Shared cache version of %s not bumped; other workers catch up as entries expire", name)
+                    return
+                time.sleep(_BUMP_RETRY_DELAY)
+
+    def _write(self, sql: str, params: tuple) -> None:
+        try:
+            self._writer_db().execute(sql, params)
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune(self._writer_db())
+        except sqlite3.Error as exc:
+            self._failed(exc)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def flush(self) -> None:
+        """Wait until the writes queued so far are done."""
+        if self._writer is not None and self._pid == os.getpid():
+            self._writer.submit(lambda: None).result()
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        db.execute("delete from entries where stored_at <= ?", (time.time() - self.ttl_seconds,))
+        db.execute(
+            "delete from entries where key in"
+            " (select key from entries order by stored_at desc limit -1 offset ?)",
+            (self.max_entries,),
+        )
+
+    def _failed(self, exc: sqlite3.Error) -> None:
+        self.errors += 1
+        logger.warning("Shared cache error: %s", exc)
+
+    def clear(self) -> None:
+        db = self._db()
+        self.flush()
+        db.execute("delete from entries")
+        db.execute("delete from versions")
+        self._writes = self.errors = self.skipped = 0
+
+    def stats(self) -> dict:
+        try:
+            (entries,) = self._db().execute("select count(*) from entries").fetchone()
+        except sqlite3.Error:
+            entries = None
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "pending": self._pending,
+            "unsynced_bumps": sum(self._unsynced.values()),
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
@@ -1,16 +1,203 @@
-from typing import Optional
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
 
-from supabase import Client, create_client
+import httpx
+from supabase import Client, ClientOptions, create_client
 
+from app.admission import upstream_gate
 from app.config import settings
+from app.metrics import record_upstream
+from app.resilience import backoff, breaker, is_upstream_failure
+
+logger = logging.getLogger(__name__)
 
 _client: Optional[Client] = None
+_http: Optional[httpx.Client] = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _build_http_client() -> httpx.Client:
+    return httpx.Client(
+        http2=settings.supabase_http2,
+        limits=httpx.Limits(
+            max_connections=settings.supabase_max_connections,
+            max_keepalive_connections=settings.supabase_max_keepalive_connections,
+            keepalive_expiry=settings.supabase_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.supabase_connect_timeout,
+            read=settings.supabase_read_timeout,
+            write=settings.supabase_write_timeout,
+            pool=settings.supabase_pool_timeout,
+        ),
+        follow_redirects=True,
+    )
 
 
 def get_supabase() -> Client:
-    global _client
+    global _client, _http
     if _client is None:
         if not settings.supabase_url or not settings.supabase_key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set")
-        _client = create_client(settings.supabase_url, settings.supabase_key)
+        _http = _build_http_client()
+        _client = create_client(
+            settings.supabase_url, settings.supabase_key, options=ClientOptions(httpx_client=_http)
+        )
     return _client
+
+
+async def open_client() -> None:
+    """Build the Supabase client and open ``supabase_warm_connections`` connections.
+
+    Called from the app's lifespan so the first real request does not pay for
+    client construction, DNS and the TLS handshake. A failed warm-up is logged
+    and does not stop startup; requests then connect on demand.
+    """
+    if not settings.supabase_url or not settings.supabase_key:
+        return
+    client = get_supabase()
+    results = await asyncio.gather(
+        *(
+            execute(client.table("experiments").select("id").limit(1))
+            for _ in range(settings.supabase_warm_connections)
+        ),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        logger.warning("Supabase warm-up failed: %s", errors[0])
+
+
+def close_client() -> None:
+    global _client, _http
+    if _http is not None:
+        _http.close()
+    _client = None
+    _http = None
+
+
+def pool_stats() -> dict:
+    """Connection counts of the PostgREST HTTP pool.
+
+    httpx has no public API for this, so the numbers come from the httpcore
+    pool behind the default transport; they are zero before the client exists.
+    """
+    pool = getattr(getattr(_http, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []))
+    requests = list(getattr(pool, "_requests", []))
+    return {
+        "connections": len(connections),
+        "idle": sum(1 for connection in connections if connection.is_idle()),
+        "active": sum(1 for connection in connections if not connection.is_idle() and not connection.is_closed()),
+        "http2": sum(1 for connection in connections if "HTTP/2" in connection.info()),
+        "requests": len(requests),
+        # requests queued for a free connection (bounded by supabase_pool_timeout)
+        "waiting": sum(1 for request in requests if getattr(request, "connection", None) is None),
+        "max_connections": settings.supabase_max_connections,
+        "max_keepalive_connections": settings.supabase_max_keepalive_connections,
+    }
+
+
+def open_executor() -> ThreadPoolExecutor:
+    """Create the bounded pool that runs blocking PostgREST calls."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.supabase_max_concurrency,
+            thread_name_prefix="supabase",
+        )
+    return _executor
+
+
+def close_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def _submit(query, loop: asyncio.AbstractEventLoop) -> asyncio.Future:
+    """Hand ``query.execute()`` to the pool, which takes over the caller's :data:`upstream_gate` slot.
+
+    The slot is released when the worker thread is done rather than when the
+    caller stops waiting, so a call abandoned at its deadline still counts
+    against ``supabase_max_concurrency`` while it runs.
+    """
+    future = open_executor().submit(contextvars.copy_context().run, query.execute)
+    future.add_done_callback(lambda _: _release_slot(loop))
+    return asyncio.wrap_future(future, loop=loop)
+
+
+def _release_slot(loop: asyncio.AbstractEventLoop) -> None:
+    try:
+        loop.call_soon_threadsafe(upstream_gate.release)
+    except RuntimeError:
+        pass  # the loop is closed, so nobody is waiting for the slot
+
+
+async def _call(query, future: asyncio.Future, start: float) -> Any:
+    try:
+        return await future
+    finally:
+        record_upstream(query, time.perf_counter() - start)
+
+
+async def execute(query, read: bool = False) -> Any:
+    """Run ``query.execute()`` off the event loop and return its response.
+
+    The sync Supabase client blocks on every round trip, so the call is handed
+    to a bounded thread pool; at most ``supabase_max_concurrency`` requests are
+    in flight and the rest queue without stalling other handlers. The queue
+    is :data:`upstream_gate`: a caller that finds it full, or waits in it
+    longer than ``upstream_queue_timeout``, gets :class:`~app.admission.OverloadedError`.
+
+    Every call goes through the circuit breaker. ``read=True`` marks the query
+    as idempotent: it is given ``supabase_read_deadline`` seconds and, on an
+    upstream failure, retried up to ``supabase_read_retries`` times with
+    jittered backoff while the deadline allows. postgrest's own retry (fixed
+    1s, 2s, ... sleeps inside the worker thread) is turned off so it cannot
+    stretch the tail.
+    """
+    request = getattr(query, "request", None)
+    if request is not None and hasattr(request, "retry_enabled"):
+        request.retry_enabled = False
+    deadline = time.monotonic() + settings.supabase_read_deadline if read else None
+    retries = settings.supabase_read_retries if read else 0
+    attempt = 0
+    loop = asyncio.get_running_loop()
+    while True:
+        await upstream_gate.acquire(None if deadline is None else deadline - time.monotonic())
+        try:
+            breaker.before_call()
+            start = time.perf_counter()
+            future = _submit(query, loop)
+        except BaseException:
+            upstream_gate.release()
+            raise
+        try:
+            call = _call(query, future, start)
+            if deadline is not None:
+                call = asyncio.wait_for(call, max(0.0, deadline - time.monotonic()))
+            resp = await call
+        except Exception as exc:
+            if not is_upstream_failure(exc):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            delay = backoff(attempt)
+            if attempt >= retries or breaker.state != breaker.CLOSED or time.monotonic() + delay >= deadline:
+                raise
+        except BaseException:
+            # cancelled: no outcome to record, but a half-open trial must not stay taken
+            breaker.release_trial()
+            raise
+        else:
+            breaker.record_success()
+            return resp
+        attempt += 1
+        breaker.retries += 1
+        await asyncio.sleep(delay)
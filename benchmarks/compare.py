@@ -0,0 +1,72 @@
+"""Diff two ``benchmarks.load`` results and flag regressions.
+
+A scenario regresses when its p95 or p99 latency grows, or its throughput
+drops, by more than ``--threshold`` (a fraction, default 0.10), or when it
+has errors that the baseline did not. Exits with status 1 if anything
+regressed, so it can gate a release.
+
+    python -m benchmarks.compare baseline.json current.json [--threshold 0.1]
+"""
+
+import argparse
+import json
+import sys
+
+# metric -> True when a higher value is better
+_METRICS = {"throughput_rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False, "peak_rss_mb": False}
+_GATED = ("throughput_rps", "p95_ms", "p99_ms")
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> tuple[list[str], list[str]]:
+    """Return ``(report lines, regressed scenario names)``."""
+    lines = [f"{'scenario':<30} " + " ".join(f"{metric:>20}" for metric in _METRICS)]
+    regressed = []
+    for name, before in baseline["scenarios"].items():
+        after = current["scenarios"].get(name)
+        if after is None:
+            lines.append(f"{name:<30} missing from current run")
+            regressed.append(name)
+            continue
+        cells, worse = [], False
+        for metric, higher_is_better in _METRICS.items():
+            if before.get(metric) is None or after.get(metric) is None:
+                # peak RSS is only measured on Linux
+                cells.append(f"{'-':>10} {'':>7} ")
+                continue
+            change = _change(before[metric], after[metric])
+            flag = ""
+            if metric in _GATED and (-change if higher_is_better else change) > threshold:
+                flag, worse = "!", True
+            cells.append(f"{after[metric]:>10.1f} {change:>+7.1%}{flag:1}")
+        if after["errors"] > before["errors"]:
+            cells.append(f"errors {before['errors']} -> {after['errors']}")
+            worse = True
+        lines.append(f"{name:<30} " + " ".join(cells))
+        if worse:
+            regressed.append(name)
+    for name in current["scenarios"].keys() - baseline["scenarios"].keys():
+        lines.append(f"{name:<30} new scenario")
+    return lines, regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    lines, regressed = compare(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if baseline["meta"] != {**current["meta"], "started_at": baseline["meta"]["started_at"]}:
+        print("\nnote: runs used different settings or hosts; compare with care")
+    if regressed:
+        print(f"\n{len(regressed)} regressed: {', '.join(regressed)}")
+        sys.exit(1)
@@ -0,0 +1,326 @@
+"""Load test for every endpoint against an in-memory PostgREST stand-in.
+
+Each scenario sends ``--requests`` requests to one endpoint through
+``--concurrency`` concurrent workers and records throughput, p50/p95/p99
+latency, errors and the app's peak RSS during the scenario. The app runs
+under uvicorn in a child process and is called over HTTP, so neither the
+client nor the stand-in (in a process of its own) counts towards it, and
+streamed responses go through the server as they would in production.
+The peak is read from ``/proc`` and left out on other platforms. Reads run
+first, then writes, then deletes, which consume seeded rows from the end
+of each table.
+
+The result is written as JSON so that runs can be compared between
+releases with ``python -m benchmarks.compare``:
+
+    python -m benchmarks.load --output baseline.json
+    python -m benchmarks.load --output current.json
+    python -m benchmarks.compare baseline.json current.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import httpx
+
+from app.routers.sync import encode_token
+from benchmarks.stub_postgrest import WEEKS_PER_GOAL, StubPostgrest, seeded_at, stub_id, week_key
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: Callable[[int], str]
+    body: Optional[Callable[[int], Any]] = None
+    status: int = 200
+
+
+class AppServer:
+    """Serve the app with uvicorn in a child process configured by ``env``."""
+
+    def __init__(self, env: dict[str, str]):
+        self.env = env
+        self.url = ""
+        self._process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "AppServer":
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=Path(__file__).resolve().parent.parent,
+            env={**os.environ, **self.env},
+        )
+        self.url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{self.url}/health", timeout=1).raise_for_status()
+                return self
+            except httpx.HTTPError:
+                if self._process.poll() is not None or time.monotonic() > deadline:
+                    self.__exit__()
+                    raise RuntimeError("the app server did not start")
+                time.sleep(0.1)
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        self._process.wait(timeout=10)
+
+    def reset_peak_rss(self) -> None:
+        # writing 5 to clear_refs resets VmHWM to the current RSS (Linux 4.0+)
+        try:
+            with open(f"/proc/{self._process.pid}/clear_refs", "w") as f:
+                f.write("5")
+        except OSError:
+            pass
+
+    def peak_rss_mb(self) -> Optional[float]:
+        try:
+            with open(f"/proc/{self._process.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return round(int(line.split()[1]) / 1024, 1)
+        except OSError:
+            pass
+        return None
+
+
+def scenarios(rows: int, requests: int, batch_size: int) -> list[Scenario]:
+    """All endpoints, reads first. Reads and updates use the first half of the seeded rows."""
+    pool = rows // 2
+
+    def seeded(table: str) -> Callable[[int], str]:
+        return lambda i: stub_id(table, i % pool)
+
+    def deletable(table: str) -> Callable[[], str]:
+        counter = itertools.count(rows - 1, -1)
+        return lambda: stub_id(table, next(counter))
+
+    goal, experiment, entry = seeded("learning_goals"), seeded("experiments"), seeded("service_entries")
+    doomed = {table: deletable(table) for table in ("learning_goals", "experiments", "service_entries")}
+    goal_body = lambda i: {"title": f"Load goal {i}", "target_hours": 40}
+    experiment_body = lambda i: {"title": f"Load experiment {i}", "dependencies": [experiment(i)]}
+    entry_body = lambda i: {"date": "2025-06-01", "description": f"Load shift {i}", "hours": 2}
+
+    # rows changed since the last ~50 seeded ones, plus every tombstone
+    since = encode_token(
+        {
+            **{
+                table: [seeded_at(rows - 51), stub_id(table, rows - 51)]
+                for table in ("learning_goals", "experiments", "service_entries")
+            },
+            "deleted_records": [seeded_at(0), 0],
+        },
+        time.time(),
+    )
+
+    def batch(make: Callable[[int], dict]) -> Callable[[int], dict]:
+        return lambda i: {"items": [make(i * batch_size + j) for j in range(batch_size)]}
+
+    def batch_patch(ids: Callable[[int], str], patch: dict) -> Callable[[int], dict]:
+        # consecutive ids so that one batch never repeats an id
+        return lambda i: {"items": [{"id": ids(i * batch_size + j), **patch} for j in range(batch_size)]}
+
+    def batch_delete(table: str) -> Callable[[int], dict]:
+        return lambda i: {"ids": [doomed[table]() for _ in range(batch_size)]}
+
+    return [
+        Scenario("root", "GET", lambda i: "/"),
+        Scenario("health", "GET", lambda i: "/health"),
+        Scenario("health_cache", "GET", lambda i: "/health/cache"),
+        Scenario("learning_list", "GET", lambda i: "/learning/goals?limit=50"),
+        Scenario("learning_list_max", "GET", lambda i: "/learning/goals?limit=200"),
+        Scenario("learning_list_fields", "GET", lambda i: "/learning/goals?limit=200&fields=id,title"),
+        Scenario("learning_get", "GET", lambda i: f"/learning/goals/{goal(i)}"),
+        Scenario("learning_weekly_hours", "GET", lambda i: f"/learning/goals/{goal(i)}/weekly-hours"),
+        Scenario("learning_export", "GET", lambda i: "/learning/goals/export?format=ndjson"),
+        Scenario("experiments_list", "GET", lambda i: "/experiments?limit=50"),
+        Scenario("experiments_list_max", "GET", lambda i: "/experiments?limit=200"),
+        Scenario("experiments_list_fields", "GET", lambda i: "/experiments?limit=200&fields=id,status"),
+        Scenario("experiments_list_status", "GET", lambda i: "/experiments?status=in_progress&sort=title"),
+        Scenario("experiments_get", "GET", lambda i: f"/experiments/{experiment(i)}"),
+        Scenario("experiments_graph", "GET", lambda i: "/experiments/graph"),
+        Scenario("experiments_blocked_by", "GET", lambda i: f"/experiments/{experiment(i)}/blocked-by?transitive=true"),
+        Scenario("experiments_unblocks", "GET", lambda i: f"/experiments/{experiment(i)}/unblocks?transitive=true"),
+        Scenario("experiments_export", "GET", lambda i: "/experiments/export?format=csv"),
+        Scenario("service_list", "GET", lambda i: "/service/entries?limit=50"),
+        Scenario("service_list_max", "GET", lambda i: "/service/entries?limit=200"),
+        Scenario("service_list_fields", "GET", lambda i: "/service/entries?limit=200&fields=date,hours"),
+        Scenario(
+            "service_list_filtered",
+            "GET",
+            lambda i: "/service/entries?date_from=2025-02-01&date_to=2025-06-30&min_hours=2&sort=-hours",
+        ),
+        Scenario("service_get", "GET", lambda i: f"/service/entries/{entry(i)}"),
+        Scenario("service_stats", "GET", lambda i: "/service/stats?group_by=week"),
+        Scenario("service_export", "GET", lambda i: "/service/entries/export?format=ndjson"),
+        Scenario("search", "GET", lambda i: f"/search?q=experiment {i % 50}"),
+        Scenario("search_kind", "GET", lambda i: "/search?q=shift&kind=service_entry&limit=50"),
+        Scenario("dashboard", "GET", lambda i: "/dashboard"),
+        Scenario("sync_full", "GET", lambda i: "/sync?limit=500"),
+        Scenario("sync_incremental", "GET", lambda i: f"/sync?since={since}"),
+        Scenario("metrics", "GET", lambda i: "/metrics"),
+        Scenario("learning_create", "POST", lambda i: "/learning/goals", goal_body, 201),
+        Scenario("learning_update", "PATCH", lambda i: f"/learning/goals/{goal(i)}", lambda i: {"notes": f"n{i}"}),
+        Scenario(
+            "learning_weekly_hours_put",
+            "PUT",
+            lambda i: f"/learning/goals/{goal(i)}/weekly-hours/2026-W{i % 52 + 1:02d}",
+            lambda i: {"hours": 1.5},
+        ),
+        Scenario("learning_create_batch", "POST", lambda i: "/learning/goals:batch", batch(goal_body)),
+        Scenario("learning_update_batch", "PATCH", lambda i: "/learning/goals:batch", batch_patch(goal, {"notes": "b"})),
+        Scenario("experiments_create", "POST", lambda i: "/experiments", experiment_body, 201),
+        Scenario("experiments_update", "PATCH", lambda i: f"/experiments/{experiment(i)}", lambda i: {"status": "in_progress"}),
+        Scenario("experiments_create_batch", "POST", lambda i: "/experiments:batch", batch(experiment_body)),
+        Scenario(
+            "experiments_update_batch", "PATCH", lambda i: "/experiments:batch", batch_patch(experiment, {"notes": "b"})
+        ),
+        Scenario("service_create", "POST", lambda i: "/service/entries", entry_body, 201),
+        Scenario("service_update", "PATCH", lambda i: f"/service/entries/{entry(i)}", lambda i: {"hours": 3}),
+        Scenario("service_create_batch", "POST", lambda i: "/service/entries:batch", batch(entry_body)),
+        Scenario("service_update_batch", "PATCH", lambda i: "/service/entries:batch", batch_patch(entry, {"hours": 1})),
+        Scenario(
+            "learning_weekly_hours_delete",
+            "DELETE",
+            lambda i: f"/learning/goals/{goal(i // WEEKS_PER_GOAL)}/weekly-hours/{week_key(i % WEEKS_PER_GOAL)}",
+            status=204,
+        ),
+        Scenario("learning_delete", "DELETE", lambda i: f"/learning/goals/{doomed['learning_goals']()}", status=204),
+        Scenario("learning_delete_batch", "DELETE", lambda i: "/learning/goals:batch", batch_delete("learning_goals")),
+        Scenario("experiments_delete", "DELETE", lambda i: f"/experiments/{doomed['experiments']()}", status=204),
+        Scenario("experiments_delete_batch", "DELETE", lambda i: "/experiments:batch", batch_delete("experiments")),
+        Scenario("service_delete", "DELETE", lambda i: f"/service/entries/{doomed['service_entries']()}", status=204),
+        Scenario("service_delete_batch", "DELETE", lambda i: "/service/entries:batch", batch_delete("service_entries")),
+    ]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, server: AppServer, scenario: Scenario, requests: int, concurrency: int
+) -> dict:
+    latencies: list[float] = []
+    errors: list[str] = []
+    counter = itertools.count()
+
+    async def worker() -> None:
+        for i in iter(lambda: next(counter), None):
+            if i >= requests:
+                return
+            body = scenario.body(i) if scenario.body else None
+            start = time.perf_counter()
+            r = await client.request(scenario.method, scenario.path(i), json=body)
+            latencies.append(time.perf_counter() - start)
+            if r.status_code != scenario.status:
+                errors.append(f"{r.status_code} {r.text[:200]}")
+
+    server.reset_peak_rss()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    result = {
+        "requests": requests,
+        "errors": len(errors),
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+        "peak_rss_mb": server.peak_rss_mb(),
+    }
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+async def main(args: argparse.Namespace) -> dict:
+    results = {}
+    with StubPostgrest(latency=args.latency, rows=args.rows) as stub:
+        env = {
+            "SUPABASE_URL": stub.url,
+            "SUPABASE_KEY": "stub-key",
+            "CACHE_ENABLED": str(not args.no_cache).lower(),
+            "REPLICA_ENABLED": str(args.replica).lower(),
+            # one client sends everything; the per-client limit would turn most of it away
+            "RATE_LIMIT_ENABLED": "false",
+        }
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        with AppServer(env) as server:
+            async with httpx.AsyncClient(base_url=server.url, limits=limits, timeout=60) as client:
+                # creates the Supabase client and opens the upstream connection
+                (await client.get("/experiments?limit=1")).raise_for_status()
+                for scenario in scenarios(args.rows, args.requests, args.batch_size):
+                    if args.only and not any(name in scenario.name for name in args.only):
+                        continue
+                    results[scenario.name] = await run_scenario(
+                        client, server, scenario, args.requests, args.concurrency
+                    )
+                    print(_format_row(scenario.name, results[scenario.name]), flush=True)
+    peaks = [result["peak_rss_mb"] for result in results.values() if result["peak_rss_mb"] is not None]
+    return {
+        "meta": {
+            "rows": args.rows,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "batch_size": args.batch_size,
+            "upstream_latency_ms": args.latency * 1000,
+            "cache_enabled": not args.no_cache,
+            "replica_enabled": args.replica,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "peak_rss_mb": max(peaks, default=None),
+        "scenarios": results,
+    }
+
+
+def _format_row(name: str, result: dict) -> str:
+    rss = "-" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.1f}"
+    return (
+        f"{name:<30} {result['throughput_rps']:>9.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+        f"{result['p99_ms']:>8.1f} {rss:>8} {result['errors']:>6}"
+    )
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000, help="seeded rows per table")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.005, help="upstream latency in seconds")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--no-cache", action="store_true", help="disable the read cache")
+    parser.add_argument("--replica", action="store_true", help="serve list and get reads from the local replica")
+    parser.add_argument("--only", nargs="+", help="run scenarios whose name contains one of these")
+    parser.add_argument("--output", help="write the JSON result to this file")
+    args = parser.parse_args(argv)
+    # deletes consume rows from the top half of each table
+    if args.requests * (1 + args.batch_size) > args.rows // 2:
+        parser.error("--rows must be at least 2 * requests * (1 + batch-size)")
+    return args
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    print(f"{'scenario':<30} {'req/s':>9} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'rss_mb':>8} {'errors':>6}")
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
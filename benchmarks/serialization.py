@@ -0,0 +1,79 @@
+"""CPU cost of serializing a large list response.
+
+Compares the previous list path (one ``*Response`` model built per row,
+dumped and re-validated against the page ``response_model`` by FastAPI,
+then serialized to JSON-compatible Python and encoded with ``json.dumps``)
+with the single-pass path in ``app.serialization``. Both produce the same
+JSON; times are process CPU per request.
+
+    python -m benchmarks.serialization [--rows 10000] [--repeat 20]
+"""
+
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pydantic import TypeAdapter
+
+from app.routers.experiments import _row_to_response
+from app.schemas.experiments import ExperimentPage, ExperimentResponse
+from app.serialization import rows_response
+
+_PAGE = TypeAdapter(ExperimentPage)
+
+
+def _rows(count: int) -> list[dict]:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": str(uuid.UUID(int=i)),
+            "title": f"Experiment {i}",
+            "description": "Measure the effect of spaced repetition on recall",
+            "dependencies": [str(uuid.UUID(int=i - 1))] if i else [],
+            "next_action": "Collect week 2 results",
+            "status": "in_progress",
+            "notes": "",
+            "created_at": (start + timedelta(minutes=i)).isoformat(),
+            "updated_at": (start + timedelta(minutes=i, seconds=30)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def legacy(rows: list[dict]) -> bytes:
+    page = ExperimentPage(items=[_row_to_response(row) for row in rows], next_cursor=None)
+    revalidated = _PAGE.validate_python(page.model_dump())
+    content = _PAGE.dump_python(revalidated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def single_pass(rows: list[dict]) -> bytes:
+    return rows_response(ExperimentResponse, rows, None).body
+
+
+def _measure(fn, rows: list[dict], repeat: int) -> float:
+    fn(rows)
+    start = time.process_time()
+    for _ in range(repeat):
+        fn(rows)
+    return (time.process_time() - start) / repeat * 1000
+
+
+def main(count: int, repeat: int) -> None:
+    rows = _rows(count)
+    assert json.loads(legacy(rows)) == json.loads(single_pass(rows))
+    before = _measure(legacy, rows, repeat)
+    after = _measure(single_pass, rows, repeat)
+    print(f"{count} rows, CPU ms per request")
+    print(f"  legacy       {before:8.1f}")
+    print(f"  single-pass  {after:8.1f}  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
@@ -0,0 +1,510 @@
+"""In-memory stand-in for the PostgREST API used by the app.
+
+``FakePostgrest`` keeps every table in memory and understands the subset of
+the PostgREST protocol that the routers send: ``select`` (including the
+weekly-hours embed), ``eq``/``in``/``lt``/``gt``-style filters, ``or``/``and``
+groups, ``order``, ``limit``/``offset``, inserts, upserts, updates, deletes
+and the RPCs in ``supabase/schema.sql``. Deletes write tombstones to
+``deleted_records`` as the schema's triggers do. Rows get deterministic ids
+from ``stub_id`` so a load generator can address seeded rows.
+
+``StubPostgrest`` serves it over HTTP with a fixed latency per request. The
+server runs in its own process so that its request handling does not compete
+with the application under test for the GIL.
+"""
+
+import html
+import json
+import multiprocessing
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+TABLES = ("learning_goals", "learning_goal_weekly_hours", "experiments", "service_entries")
+WEEKS_PER_GOAL = 4
+
+_PRIMARY_KEYS = {"learning_goal_weekly_hours": ("goal_id", "week_key")}
+# embedded table -> (column on the embedded table, column on the parent)
+_EMBEDS = {"learning_goal_weekly_hours": ("goal_id", "id")}
+_FOREIGN_KEYS = {"learning_goal_weekly_hours": ("goal_id", "learning_goals")}
+_DEFAULTS = {
+    "learning_goals": {"target_hours": None, "progress_percent": 0, "notes": "", "resources": [], "logged_hours": 0},
+    "experiments": {
+        "description": "",
+        "dependencies": [],
+        "next_action": "",
+        "status": "not_started",
+        "notes": "",
+    },
+    "service_entries": {"reflection": ""},
+}
+_TOMBSTONED = {"learning_goals", "experiments", "service_entries"}
+_RESERVED = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def stub_id(table: str, index: int) -> str:
+    """Id of the ``index``-th seeded row of ``table``."""
+    return str(uuid.UUID(int=(TABLES.index(table) + 1) << 64 | index))
+
+
+def seeded_at(index: int) -> str:
+    """``created_at``/``updated_at`` of the ``index``-th seeded row of every table."""
+    return _timestamp(_EPOCH + timedelta(seconds=index))
+
+
+def week_key(index: int) -> str:
+    return f"2025-W{index + 1:02d}"
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.isoformat(timespec="microseconds")
+
+
+def _now() -> str:
+    return _timestamp(datetime.now(timezone.utc))
+
+
+def seed(rows: int) -> dict[str, dict[tuple, dict]]:
+    tables: dict[str, dict[tuple, dict]] = {name: {} for name in (*TABLES, "deleted_records")}
+    statuses = ("not_started", "in_progress", "completed")
+    for i in range(rows):
+        ts = seeded_at(i)
+        goal_id = stub_id("learning_goals", i)
+        tables["learning_goals"][(goal_id,)] = {
+            "id": goal_id,
+            "title": f"Goal {i}",
+            "target_hours": 100,
+            "progress_percent": 10,
+            "notes": "",
+            "resources": [],
+            "logged_hours": 10,
+            "created_at": ts,
+            "updated_at": ts,
+        }
+        for week in range(WEEKS_PER_GOAL):
+            tables["learning_goal_weekly_hours"][(goal_id, week_key(week))] = {
+                "goal_id": goal_id,
+                "week_key": week_key(week),
+                "hours": 2.5,
+                "created_at": ts,
+                "updated_at": ts,
+            }
+        experiment_id = stub_id("experiments", i)
+        tables["experiments"][(experiment_id,)] = {
+            "id": experiment_id,
+            "title": f"Experiment {i}",
+            "description": "Measure the effect of spaced repetition on recall",
+            # chains of five experiments, each depending on the previous one
+            "dependencies": [stub_id("experiments", i - 1)] if i % 5 else [],
+            "next_action": "",
+            "status": statuses[i % 3],
+            "notes": "",
+            "created_at": ts,
+            "updated_at": ts,
+        }
+        entry_id = stub_id("service_entries", i)
+        tables["service_entries"][(entry_id,)] = {
+            "id": entry_id,
+            "date": (_EPOCH.date() + timedelta(days=i // 3)).isoformat(),
+            "description": f"Shift {i}",
+            "hours": 1.5 + i % 4,
+            "reflection": "",
+            "created_at": ts,
+            "updated_at": ts,
+        }
+    return tables
+
+
+class PostgrestError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.payload = {"code": code, "message": message, "details": None, "hint": None}
+
+
+def _split(expr: str) -> list[str]:
+    """Split on commas that are not inside parentheses or double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in expr:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _coerce(current: Any, value: str) -> Any:
+    if isinstance(current, bool):
+        return value == "true"
+    if isinstance(current, (int, float)):
+        return float(value)
+    return value
+
+
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+}
+
+
+def _condition(column: str, expr: str) -> Callable[[dict], bool]:
+    operator, _, value = expr.partition(".")
+    if operator == "in":
+        options = [_unquote(option) for option in _split(value.strip("()"))]
+        return lambda row: row.get(column) is not None and str(row[column]) in options
+    if operator == "is":
+        return lambda row: row.get(column) is None if value == "null" else row.get(column) is (value == "true")
+    compare = _OPERATORS.get(operator)
+    if compare is None:
+        raise PostgrestError(400, "PGRST100", f"unsupported operator {operator}")
+    value = _unquote(value)
+    return lambda row: row.get(column) is not None and compare(row[column], _coerce(row[column], value))
+
+
+def _logic(kind: str, expr: str) -> Callable[[dict], bool]:
+    predicates = []
+    for part in _split(expr[1:-1]):
+        if part.startswith(("and(", "or(")):
+            nested, _, inner = part.partition("(")
+            predicates.append(_logic(nested, "(" + inner))
+        else:
+            column, _, rest = part.partition(".")
+            predicates.append(_condition(column, rest))
+    combine = all if kind == "and" else any
+    return lambda row: combine(predicate(row) for predicate in predicates)
+
+
+def _filters(params: list[tuple[str, str]]) -> Callable[[dict], bool]:
+    predicates = []
+    for key, value in params:
+        if key in _RESERVED:
+            continue
+        if key in ("or", "and"):
+            predicates.append(_logic(key, value))
+        else:
+            predicates.append(_condition(key, value))
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda row: all(predicate(row) for predicate in predicates)
+
+
+class FakePostgrest:
+    """The table store and request handling behind ``StubPostgrest``."""
+
+    def __init__(self, rows: int = 20):
+        self.tables = seed(rows)
+        self._lock = threading.Lock()
+
+    def handle(self, method: str, url: str, headers: dict[str, str], body: Optional[bytes]) -> tuple[int, Any]:
+        parts = urlsplit(url)
+        path = parts.path.removeprefix("/rest/v1/").strip("/")
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        payload = json.loads(body) if body else None
+        try:
+            with self._lock:
+                if path.startswith("rpc/"):
+                    return 200, self._rpc(path[4:], payload or {}, dict(params).get("select", "*"))
+                if path not in self.tables:
+                    raise PostgrestError(404, "42P01", f'relation "{path}" does not exist')
+                return self._dispatch(method, path, params, headers.get("prefer", ""), payload)
+        except PostgrestError as e:
+            return e.status, e.payload
+
+    def _dispatch(self, method: str, table: str, params, prefer: str, payload) -> tuple[int, Any]:
+        query = dict(params)
+        matches = _filters(params)
+        if method == "GET":
+            rows = [row for row in self._candidates(table, query) if matches(row)]
+            rows = self._order(rows, query.get("order"))
+            offset = int(query.get("offset", 0))
+            limit = int(query["limit"]) if "limit" in query else None
+            rows = rows[offset : offset + limit if limit is not None else None]
+            return 200, self._project(table, rows, query.get("select", "*"))
+        if method == "POST":
+            items = payload if isinstance(payload, list) else [payload]
+            if "merge-duplicates" in prefer:
+                conflict = tuple(query.get("on_conflict", "id").split(","))
+                rows = [self._upsert(table, conflict, item) for item in items]
+            else:
+                rows = [self._insert(table, item) for item in items]
+            status = 201
+        elif method == "PATCH":
+            rows = [row for row in self._candidates(table, query) if matches(row)]
+            for row in rows:
+                row.update(payload, updated_at=_now())
+            status = 200
+        elif method == "DELETE":
+            store = self.tables[table]
+            keys = [key for key, row in store.items() if matches(row)]
+            rows = [store.pop(key) for key in keys]
+            if table in _TOMBSTONED:
+                self._record_deletes(table, rows)
+            status = 200
+        else:
+            raise PostgrestError(405, "PGRST117", f"unsupported method {method}")
+        if "return=representation" not in prefer:
+            return 204 if method != "POST" else 201, None
+        return status, self._project(table, rows, query.get("select", "*"))
+
+    def _record_deletes(self, table: str, rows: list[dict]) -> None:
+        tombstones = self.tables["deleted_records"]
+        now = _now()
+        for row in rows:
+            tombstone_id = len(tombstones) + 1
+            tombstones[(str(tombstone_id),)] = {
+                "id": tombstone_id,
+                "table_name": table,
+                "row_id": row["id"],
+                "deleted_at": now,
+            }
+
+    def _candidates(self, table: str, query: dict[str, str]) -> list[dict]:
+        """Rows that can match, looked up by primary key when filtering on ``id``."""
+        store = self.tables[table]
+        expr = query.get("id", "") if table not in _PRIMARY_KEYS else ""
+        if expr.startswith("eq."):
+            ids = [_unquote(expr[3:])]
+        elif expr.startswith("in."):
+            ids = [_unquote(option) for option in _split(expr[3:].strip("()"))]
+        else:
+            return list(store.values())
+        return [store[(row_id,)] for row_id in ids if (row_id,) in store]
+
+    def _key(self, table: str, row: dict, columns: Optional[tuple[str, ...]] = None) -> tuple:
+        return tuple(str(row[column]) for column in columns or _PRIMARY_KEYS.get(table, ("id",)))
+
+    def _check_foreign_key(self, table: str, row: dict) -> None:
+        if table in _FOREIGN_KEYS:
+            column, parent = _FOREIGN_KEYS[table]
+            if (str(row[column]),) not in self.tables[parent]:
+                raise PostgrestError(409, "23503", f'insert or update on table "{table}" violates foreign key')
+
+    def _insert(self, table: str, item: dict) -> dict:
+        now = _now()
+        row = {**_DEFAULTS.get(table, {}), **item, "created_at": now, "updated_at": now}
+        if table not in _PRIMARY_KEYS:
+            row.setdefault("id", str(uuid.uuid4()))
+        self._check_foreign_key(table, row)
+        key = self._key(table, row)
+        if key in self.tables[table]:
+            raise PostgrestError(409, "23505", "duplicate key value violates unique constraint")
+        self.tables[table][key] = row
+        return row
+
+    def _upsert(self, table: str, conflict: tuple[str, ...], item: dict) -> dict:
+        key = self._key(table, item, conflict)
+        existing = next(
+            (row for row in self.tables[table].values() if self._key(table, row, conflict) == key), None
+        )
+        if existing is None:
+            return self._insert(table, item)
+        existing.update(item, updated_at=_now())
+        return existing
+
+    @staticmethod
+    def _order(rows: list[dict], order: Optional[str]) -> list[dict]:
+        for term in reversed(_split(order or "")):
+            column, _, direction = term.partition(".")
+            rows = sorted(rows, key=lambda row: (row.get(column) is None, row.get(column)), reverse=direction.startswith("desc"))
+        return rows
+
+    def _project(self, table: str, rows: list[dict], select: str) -> list[dict]:
+        columns, embeds = [], []
+        for part in _split(select):
+            if "(" in part:
+                alias, _, rest = part.partition(":") if ":" in part.split("(")[0] else ("", "", part)
+                child, _, inner = rest.partition("(")
+                embeds.append((alias or child, child, inner[:-1] or "*"))
+            else:
+                columns.append(part.strip('"'))
+        grouped = {}
+        for alias, child, child_select in embeds:
+            child_column, parent_column = _EMBEDS[child]
+            wanted = {row[parent_column] for row in rows}
+            groups: dict[Any, list[dict]] = {}
+            for candidate in self.tables[child].values():
+                if candidate[child_column] in wanted:
+                    groups.setdefault(candidate[child_column], []).append(candidate)
+            grouped[alias] = (child, child_select, parent_column, groups)
+        result = []
+        for row in rows:
+            out = dict(row) if "*" in columns else {column: row.get(column) for column in columns}
+            for alias, (child, child_select, parent_column, groups) in grouped.items():
+                out[alias] = self._project(child, groups.get(row[parent_column], []), child_select)
+            result.append(out)
+        return result
+
+    def _rpc(self, name: str, args: dict, select: str = "*") -> list[dict]:
+        table = name.removeprefix("update_").removesuffix("_batch")
+        if name == f"update_{table}_batch" and table in self.tables:
+            # merge each patch into the current row; missing ids are skipped
+            store, now = self.tables[table], _now()
+            rows = [store[(row_id,)] for row_id in args["patches"] if (row_id,) in store]
+            for row in rows:
+                row.update(args["patches"][row["id"]], updated_at=now)
+            return self._project(table, rows, select)
+        table = name.removeprefix("delete_").removesuffix("_batch")
+        if name == f"delete_{table}_batch" and table in _TOMBSTONED:
+            store = self.tables[table]
+            rows = [store.pop((row_id,)) for row_id in args["ids"] if (row_id,) in store]
+            self._record_deletes(table, rows)
+            return self._project(table, rows, select)
+        if name == "service_hours_stats":
+            return self._service_hours_stats(args)
+        if name == "search_all":
+            return self._search_all(args)
+        if name == "experiment_status_counts":
+            counts: dict[str, int] = {}
+            for row in self.tables["experiments"].values():
+                counts[row["status"]] = counts.get(row["status"], 0) + 1
+            return [{"status": status, "count": count} for status, count in counts.items()]
+        if name == "service_hours_totals":
+            return self._service_hours_totals(args)
+        raise PostgrestError(404, "PGRST202", f"function {name} not found")
+
+    def _search_all(self, args: dict) -> list[dict]:
+        """Rank by how often the query words occur; a rough stand-in for ts_rank_cd."""
+        words = [word for word in args["query"].lower().split() if word.isalnum()]
+        sources = {
+            "learning_goal": ("learning_goals", "title", ("title", "notes")),
+            "experiment": ("experiments", "title", ("title", "description", "notes")),
+            "service_entry": ("service_entries", "description", ("description", "reflection")),
+        }
+        hits = []
+        for kind, (table, title, columns) in sources.items():
+            if args.get("kinds") and kind not in args["kinds"]:
+                continue
+            for row in self.tables[table].values():
+                body = "\n".join(str(row[column]) for column in columns)
+                lowered = body.lower()
+                rank = sum(lowered.count(word) for word in words)
+                if rank:
+                    hits.append((kind, row, row[title], body, rank / (1 + len(lowered) / 100)))
+        hits.sort(key=lambda hit: (-hit[4], hit[1]["updated_at"], hit[1]["id"]))
+        offset = args.get("result_offset", 0)
+        page = hits[offset : offset + args.get("result_limit", 20)]
+        return [
+            {
+                "kind": kind,
+                "id": row["id"],
+                "title": title,
+                "snippet": html.escape(body[:200], quote=False),
+                "rank": rank,
+                "updated_at": row["updated_at"],
+            }
+            for kind, row, title, body, rank in page
+        ]
+
+    def _service_hours_stats(self, args: dict) -> list[dict]:
+        buckets: dict[str, list[float]] = {}
+        for row in self.tables["service_entries"].values():
+            day = date.fromisoformat(row["date"])
+            if args.get("date_from") and row["date"] < args["date_from"]:
+                continue
+            if args.get("date_to") and row["date"] > args["date_to"]:
+                continue
+            if args["group_by"] == "week":
+                period = day - timedelta(days=day.weekday())
+            elif args["group_by"] == "month":
+                period = day.replace(day=1)
+            else:
+                period = day.replace(month=1, day=1)
+            buckets.setdefault(period.isoformat(), []).append(float(row["hours"]))
+        return [
+            {"period": period, "total_hours": sum(hours), "entry_count": len(hours), "avg_hours": sum(hours) / len(hours)}
+            for period, hours in sorted(buckets.items())
+        ]
+
+
+    def _service_hours_totals(self, args: dict) -> list[dict]:
+        today = date.fromisoformat(args["today"])
+        starts = {
+            "week_hours": today - timedelta(days=today.weekday()),
+            "month_hours": today.replace(day=1),
+            "year_hours": today.replace(month=1, day=1),
+        }
+        totals = {"total_hours": 0.0, "entry_count": 0, **dict.fromkeys(starts, 0.0)}
+        for row in self.tables["service_entries"].values():
+            day, hours = date.fromisoformat(row["date"]), float(row["hours"])
+            totals["total_hours"] += hours
+            totals["entry_count"] += 1
+            for name, start in starts.items():
+                if start <= day <= today:
+                    totals[name] += hours
+        return [totals]
+
+
+def _serve(latency: float, rows: int, port_queue) -> None:
+    fake = FakePostgrest(rows)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _respond(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else None
+            headers = {key.lower(): value for key, value in self.headers.items()}
+            started = time.perf_counter()
+            status, payload = fake.handle(self.command, self.path, headers, body)
+            remaining = latency - (time.perf_counter() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+            data = json.dumps(payload).encode() if payload is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PATCH = do_DELETE = _respond
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+class StubPostgrest:
+    """Serve a ``FakePostgrest`` seeded with ``rows`` rows per table, ``latency`` seconds per request."""
+
+    def __init__(self, latency: float = 0.05, rows: int = 20):
+        self._queue = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(latency, rows, self._queue), daemon=True
+        )
+        self.url = ""
+
+    def __enter__(self) -> "StubPostgrest":
+        self._process.start()
+        self.url = f"http://127.0.0.1:{self._queue.get(timeout=10)}"
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        self._process.join()
@@ -13,3 +13,15 @@ create policy "Allow anon all on experiments"
 create policy "Allow anon all on service_entries"
   on service_entries for all to anon
   using (true) with check (true);
+
+create policy "Allow anon all on learning_goal_weekly_hours"
+  on learning_goal_weekly_hours for all to anon
+  using (true) with check (true);
+
+-- Tombstones are written by the record_deletes() trigger as its owner;
+-- the backend only reads them for GET /sync and the local replica.
+alter table deleted_records enable row level security;
+
+create policy "Allow anon read on deleted_records"
+  on deleted_records for select to anon
+  using (true);
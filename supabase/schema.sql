@@ -7,11 +7,24 @@ create table if not exists learning_goals (
   progress_percent numeric not null default 0,
   notes text not null default '',
   resources jsonb not null default '[]',
-  weekly_hours jsonb not null default '[]',
+  logged_hours numeric not null default 0,
   created_at timestamptz not null default now(),
   updated_at timestamptz not null default now()
 );
 
+-- For databases created before logged_hours existed
+alter table learning_goals add column if not exists logged_hours numeric not null default 0;
+
+-- One row per goal and week; learning_goals.logged_hours is kept as their sum
+create table if not exists learning_goal_weekly_hours (
+  goal_id uuid not null references learning_goals (id) on delete cascade,
+  week_key text not null,
+  hours numeric not null check (hours >= 0),
+  created_at timestamptz not null default now(),
+  updated_at timestamptz not null default now(),
+  primary key (goal_id, week_key)
+);
+
 create table if not exists experiments (
   id uuid primary key default gen_random_uuid(),
   title text not null,
@@ -34,7 +47,236 @@ create table if not exists service_entries (
   updated_at timestamptz not null default now()
 );
 
--- Optional: trigger to keep updated_at in sync (run if you want auto updated_at)
+-- Keyset pagination: list endpoints seek on (created_at, id) / (date, id) descending
+create index if not exists learning_goals_created_at_id_idx
+  on learning_goals (created_at desc, id desc);
+
+create index if not exists experiments_created_at_id_idx
+  on experiments (created_at desc, id desc);
+
+create index if not exists service_entries_date_id_idx
+  on service_entries (date desc, id desc);
+
+-- Filters and sort= options on the list endpoints. Each list query filters,
+-- then seeks and orders on (sort column, id); b-tree indexes serve both
+-- directions. status= is an equality prefix in front of the default order,
+-- and service date_from/date_to are range scans on service_entries_date_id_idx.
+create index if not exists experiments_status_created_at_id_idx
+  on experiments (status, created_at desc, id desc);
+
+create index if not exists experiments_updated_at_id_idx
+  on experiments (updated_at desc, id desc);
+
+create index if not exists experiments_title_id_idx
+  on experiments (title, id);
+
+create index if not exists learning_goals_updated_at_id_idx
+  on learning_goals (updated_at desc, id desc);
+
+create index if not exists learning_goals_title_id_idx
+  on learning_goals (title, id);
+
+create index if not exists learning_goals_progress_percent_id_idx
+  on learning_goals (progress_percent, id);
+
+create index if not exists service_entries_created_at_id_idx
+  on service_entries (created_at desc, id desc);
+
+create index if not exists service_entries_hours_id_idx
+  on service_entries (hours, id);
+
+-- GET /sync seeks on (updated_at, id) ascending in every table;
+-- learning_goals and experiments use their updated_at indexes above.
+create index if not exists service_entries_updated_at_id_idx
+  on service_entries (updated_at, id);
+
+-- Service hours rollup for GET /service/stats: totals, counts and averages per
+-- week/month/year. The date range is an index range scan on
+-- service_entries_date_id_idx (date is its leading column).
+create or replace function service_hours_stats(
+  group_by text,
+  date_from date default null,
+  date_to date default null
+)
+returns table (period date, total_hours numeric, entry_count bigint, avg_hours numeric)
+language sql stable
+as $$
+  select
+    date_trunc(group_by, e.date)::date as period,
+    sum(e.hours) as total_hours,
+    count(*) as entry_count,
+    avg(e.hours) as avg_hours
+  from service_entries e
+  where (date_from is null or e.date >= date_from)
+    and (date_to is null or e.date <= date_to)
+  group by 1
+  order by 1;
+$$;
+
+-- GET /dashboard: experiment counts per status (one index-only scan of
+-- experiments_status_created_at_id_idx) and hour totals in one pass.
+create or replace function experiment_status_counts()
+returns table (status text, count bigint)
+language sql stable
+as $$
+  select e.status, count(*) from experiments e group by e.status;
+$$;
+
+create or replace function service_hours_totals(today date default current_date)
+returns table (
+  total_hours numeric, entry_count bigint, week_hours numeric, month_hours numeric, year_hours numeric
+)
+language sql stable
+as $$
+  select
+    coalesce(sum(e.hours), 0),
+    count(*),
+    coalesce(sum(e.hours) filter (where e.date between date_trunc('week', today)::date and today), 0),
+    coalesce(sum(e.hours) filter (where e.date between date_trunc('month', today)::date and today), 0),
+    coalesce(sum(e.hours) filter (where e.date between date_trunc('year', today)::date and today), 0)
+  from service_entries e;
+$$;
+
+-- PATCH ...:batch: patches is {"<id>": {column: value, ...}, ...}. One UPDATE
+-- merges each patch into the current row (jsonb_populate_record keeps the
+-- columns a patch leaves out), so a row deleted meanwhile is skipped rather
+-- than re-inserted, and a concurrent write to another column is kept.
+-- Returns the updated rows; ids that do not exist are missing from them.
+create or replace function update_learning_goals_batch(patches jsonb)
+returns setof learning_goals
+language sql
+as $$
+  update learning_goals t
+  set (title, target_hours, notes, resources) = (
+    select r.title, r.target_hours, r.notes, r.resources from jsonb_populate_record(t, p.value) r
+  )
+  from jsonb_each(patches) p
+  where t.id = p.key::uuid
+  returning t.*;
+$$;
+
+create or replace function update_experiments_batch(patches jsonb)
+returns setof experiments
+language sql
+as $$
+  update experiments t
+  set (title, description, dependencies, next_action, status, notes) = (
+    select r.title, r.description, r.dependencies, r.next_action, r.status, r.notes
+    from jsonb_populate_record(t, p.value) r
+  )
+  from jsonb_each(patches) p
+  where t.id = p.key::uuid
+  returning t.*;
+$$;
+
+create or replace function update_service_entries_batch(patches jsonb)
+returns setof service_entries
+language sql
+as $$
+  update service_entries t
+  set (date, description, hours, reflection) = (
+    select r.date, r.description, r.hours, r.reflection from jsonb_populate_record(t, p.value) r
+  )
+  from jsonb_each(patches) p
+  where t.id = p.key::uuid
+  returning t.*;
+$$;
+
+-- DELETE ...:batch: the ids travel in the request body rather than an
+-- in.(...) filter, which would not fit in a URL at the 5000-id batch limit.
+-- Returns the deleted rows; ids that do not exist are missing from them.
+create or replace function delete_learning_goals_batch(ids uuid[])
+returns setof learning_goals
+language sql
+as $$
+  delete from learning_goals where id = any(ids) returning *;
+$$;
+
+create or replace function delete_experiments_batch(ids uuid[])
+returns setof experiments
+language sql
+as $$
+  delete from experiments where id = any(ids) returning *;
+$$;
+
+create or replace function delete_service_entries_batch(ids uuid[])
+returns setof service_entries
+language sql
+as $$
+  delete from service_entries where id = any(ids) returning *;
+$$;
+
+-- Full-text search for GET /search: a weighted tsvector per table, kept current
+-- by Postgres as a stored generated column and indexed with GIN.
+alter table learning_goals add column if not exists search tsvector
+  generated always as (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(notes, '')), 'B')
+  ) stored;
+
+alter table experiments add column if not exists search tsvector
+  generated always as (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(notes, '')), 'C')
+  ) stored;
+
+alter table service_entries add column if not exists search tsvector
+  generated always as (
+    setweight(to_tsvector('english', coalesce(description, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(reflection, '')), 'B')
+  ) stored;
+
+create index if not exists learning_goals_search_idx on learning_goals using gin (search);
+create index if not exists experiments_search_idx on experiments using gin (search);
+create index if not exists service_entries_search_idx on service_entries using gin (search);
+
+-- Ranked hits across all three tables in one call. Only the requested page
+-- gets a ts_headline snippet, since building headlines means re-parsing the text.
+-- The snippet is HTML: the row text is escaped first, so only the <mark> tags
+-- around matches are markup.
+create or replace function search_all(
+  query text,
+  kinds text[] default null,
+  result_limit int default 20,
+  result_offset int default 0
+)
+returns table (kind text, id uuid, title text, snippet text, rank real, updated_at timestamptz)
+language sql stable
+as $$
+  with q as (
+    select websearch_to_tsquery('english', query) as tsq
+  ),
+  hits as (
+    select 'learning_goal'::text as kind, g.id, g.title, g.title || E'\n' || g.notes as body,
+           ts_rank_cd(g.search, q.tsq) as rank, g.updated_at
+    from learning_goals g, q
+    where g.search @@ q.tsq and (kinds is null or 'learning_goal' = any(kinds))
+    union all
+    select 'experiment', e.id, e.title, e.title || E'\n' || e.description || E'\n' || e.notes,
+           ts_rank_cd(e.search, q.tsq), e.updated_at
+    from experiments e, q
+    where e.search @@ q.tsq and (kinds is null or 'experiment' = any(kinds))
+    union all
+    select 'service_entry', s.id, s.description, s.description || E'\n' || s.reflection,
+           ts_rank_cd(s.search, q.tsq), s.updated_at
+    from service_entries s, q
+    where s.search @@ q.tsq and (kinds is null or 'service_entry' = any(kinds))
+  ),
+  page as (
+    select * from hits
+    order by rank desc, updated_at desc, id
+    limit result_limit offset result_offset
+  )
+  select p.kind, p.id, p.title,
+         ts_headline('english', replace(replace(replace(p.body, '&', '&amp;'), '<', '&lt;'), '>', '&gt;'), q.tsq,
+                     'StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2'),
+         p.rank, p.updated_at
+  from page p, q
+  order by p.rank desc, p.updated_at desc, p.id;
+$$;
+
+-- Keep updated_at current on every write; ETags and GET /sync rely on it.
 create or replace function set_updated_at()
 returns trigger as $$
 begin
@@ -57,3 +299,129 @@ drop trigger if exists service_entries_updated_at on service_entries;
 create trigger service_entries_updated_at
   before update on service_entries
   for each row execute function set_updated_at();
+
+drop trigger if exists learning_goal_weekly_hours_updated_at on learning_goal_weekly_hours;
+create trigger learning_goal_weekly_hours_updated_at
+  before update on learning_goal_weekly_hours
+  for each row execute function set_updated_at();
+
+-- Progress: each weekly-hours write adds its delta to learning_goals.logged_hours,
+-- and progress_percent follows from logged_hours / target_hours on every goal write.
+create or replace function apply_weekly_hours_delta()
+returns trigger as $$
+declare
+  delta numeric;
+  target_goal uuid;
+begin
+  if tg_op = 'INSERT' then
+    delta := new.hours;
+    target_goal := new.goal_id;
+  elsif tg_op = 'UPDATE' then
+    delta := new.hours - old.hours;
+    target_goal := new.goal_id;
+  else
+    delta := -old.hours;
+    target_goal := old.goal_id;
+  end if;
+  if delta <> 0 then
+    update learning_goals set logged_hours = logged_hours + delta where id = target_goal;
+  else
+    -- weekly_hours is part of the goal, so bump updated_at for GET /sync
+    update learning_goals set updated_at = now() where id = target_goal;
+  end if;
+  return null;
+end;
+$$ language plpgsql;
+
+drop trigger if exists learning_goal_weekly_hours_progress on learning_goal_weekly_hours;
+create trigger learning_goal_weekly_hours_progress
+  after insert or update or delete on learning_goal_weekly_hours
+  for each row execute function apply_weekly_hours_delta();
+
+create or replace function set_goal_progress()
+returns trigger as $$
+begin
+  new.progress_percent = case
+    when new.target_hours > 0 then least(100, round(new.logged_hours / new.target_hours * 100, 2))
+    else 0
+  end;
+  return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists learning_goals_progress on learning_goals;
+create trigger learning_goals_progress
+  before insert or update of target_hours, logged_hours on learning_goals
+  for each row execute function set_goal_progress();
+
+-- Tombstones for GET /sync: one row per deleted goal, experiment or service
+-- entry, written by statement-level triggers so a batch delete adds them in
+-- one insert. Purge old ones with purge_deleted_records() (e.g. daily via
+-- pg_cron); keep them at least SYNC_TOMBSTONE_RETENTION_DAYS.
+create table if not exists deleted_records (
+  id bigint generated always as identity primary key,
+  table_name text not null,
+  row_id uuid not null,
+  deleted_at timestamptz not null default now()
+);
+
+create index if not exists deleted_records_deleted_at_id_idx
+  on deleted_records (deleted_at, id);
+
+-- Runs as its owner so a delete by the API role can write tombstones
+-- without an insert policy on deleted_records.
+create or replace function record_deletes()
+returns trigger as $$
+begin
+  insert into public.deleted_records (table_name, row_id)
+  select tg_table_name, id from old_rows;
+  return null;
+end;
+$$ language plpgsql security definer set search_path = '';
+
+drop trigger if exists learning_goals_tombstones on learning_goals;
+create trigger learning_goals_tombstones
+  after delete on learning_goals
+  referencing old table as old_rows
+  for each statement execute function record_deletes();
+
+drop trigger if exists experiments_tombstones on experiments;
+create trigger experiments_tombstones
+  after delete on experiments
+  referencing old table as old_rows
+  for each statement execute function record_deletes();
+
+drop trigger if exists service_entries_tombstones on service_entries;
+create trigger service_entries_tombstones
+  after delete on service_entries
+  referencing old table as old_rows
+  for each statement execute function record_deletes();
+
+create or replace function purge_deleted_records(keep interval default interval '30 days')
+returns bigint
+language sql
+as $$
+  with purged as (
+    delete from deleted_records where deleted_at < now() - keep returning 1
+  )
+  select count(*) from purged;
+$$;
+
+-- Migration for databases created before learning_goal_weekly_hours existed:
+-- moves the learning_goals.weekly_hours JSONB array into the table (the
+-- triggers above fill in logged_hours and progress_percent) and drops the column.
+do $$
+begin
+  if exists (
+    select 1 from information_schema.columns
+    where table_name = 'learning_goals' and column_name = 'weekly_hours'
+  ) then
+    insert into learning_goal_weekly_hours (goal_id, week_key, hours)
+    select g.id, item->>'week_key', sum((item->>'hours')::numeric)
+    from learning_goals g, jsonb_array_elements(g.weekly_hours) as item
+    group by g.id, item->>'week_key'
+    on conflict (goal_id, week_key) do nothing;
+    alter table learning_goals drop column weekly_hours;
+  end if;
+end;
+$$;
@@ -1,9 +1,70 @@
 import pytest
 from fastapi.testclient import TestClient
 
+from app.admission import rate_limiter, upstream_gate
+from app.cache import read_cache, read_flights
+from app.events import event_broker
+from app.graph import experiment_graph
+from app.idempotency import idempotency_store
 from app.main import app
+from app.replica import local_replica
+from app.resilience import breaker
 
 
 @pytest.fixture
 def client():
-    return TestClient(app)
+    # one event loop for the whole test, as in production, with the app's lifespan run around it
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def clear_read_cache():
+    read_cache.clear()
+    read_flights.clear()
+    yield
+    read_cache.clear()
+    read_flights.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_experiment_graph():
+    experiment_graph.reset()
+    yield
+    experiment_graph.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breaker():
+    breaker.clear()
+    yield
+    breaker.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_event_broker():
+    event_broker.clear()
+    yield
+    event_broker.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_idempotency_store():
+    idempotency_store.clear()
+    yield
+    idempotency_store.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_admission():
+    rate_limiter.clear()
+    upstream_gate.clear()
+    yield
+    rate_limiter.clear()
+    upstream_gate.clear()
+
+
+@pytest.fixture(autouse=True)
+def close_replica():
+    yield
+    local_replica.close()
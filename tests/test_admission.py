@@ -0,0 +1,132 @@
+import asyncio
+import threading
+from unittest.mock import Mock, patch
+
+from app.admission import OverloadedError, RateLimiter, UpstreamGate, rate_limiter, upstream_gate
+from app.resilience import breaker
+from app.supabase_client import execute
+
+
+def test_bucket_allows_burst_then_refills():
+    limiter = RateLimiter(rate=2.0, burst=3, max_clients=10)
+    with patch("app.admission.time.monotonic", return_value=100.0):
+        assert [limiter.acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.acquire("a") == 0.5
+        assert limiter.acquire("b") == 0.0
+    with patch("app.admission.time.monotonic", return_value=100.5):
+        assert limiter.acquire("a") == 0.0
+        assert limiter.acquire("a") > 0
+    assert limiter.stats()["limited"] == 2
+
+
+def test_least_recent_client_forgotten_over_max_clients():
+    limiter = RateLimiter(rate=1.0, burst=1, max_clients=2)
+    for client in ("a", "b", "c"):
+        limiter.acquire(client)
+    assert limiter.stats()["clients"] == 2
+    # "a" was dropped, so it starts from a full bucket again
+    assert limiter.acquire("a") == 0.0
+    assert limiter.acquire("c") > 0
+
+
+def test_rate_limited_client_gets_429(client):
+    with patch.object(rate_limiter, "burst", 2), patch.object(rate_limiter, "rate", 0.5):
+        assert [client.get("/").status_code for _ in range(2)] == [200, 200]
+        r = client.get("/")
+        assert r.status_code == 429
+        assert r.headers["retry-after"] == "2"
+        # unverified API keys do not get a bucket of their own; probes are never limited
+        assert client.get("/", headers={"X-API-Key": "other"}).status_code == 429
+        assert client.get("/health").status_code == 200
+    assert client.get("/health/admission").json()["rate_limit"]["limited"] == 2
+
+
+@patch("app.admission.settings.rate_limit_trust_forwarded_for", True)
+def test_forwarded_clients_are_told_apart_by_the_proxy_address(client):
+    with patch.object(rate_limiter, "burst", 1), patch.object(rate_limiter, "rate", 0.5):
+        assert client.get("/", headers={"X-Forwarded-For": "203.0.113.1"}).status_code == 200
+        assert client.get("/", headers={"X-Forwarded-For": "203.0.113.2"}).status_code == 200
+        # an address the client put in front of the proxy's own is ignored
+        assert client.get("/", headers={"X-Forwarded-For": "198.51.100.7, 203.0.113.1"}).status_code == 429
+
+
+def test_gate_hands_slots_over_in_order():
+    async def run():
+        gate = UpstreamGate(limit=1, max_queue=5, queue_timeout=1.0)
+        order = []
+
+        async def call(name):
+            async with gate.slot():
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call(name) for name in "abc"))
+        return order, gate.stats()
+
+    order, stats = asyncio.run(run())
+    assert order == ["a", "b", "c"]
+    assert (stats["active"], stats["waiting"], stats["queued"], stats["shed"]) == (0, 0, 2, 0)
+
+
+def test_gate_sheds_when_line_is_full_or_too_slow():
+    async def run():
+        gate = UpstreamGate(limit=1, max_queue=1, queue_timeout=0.05)
+        await gate.acquire()
+        waiting = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0)
+        errors = []
+        for attempt in (gate.acquire(), waiting):
+            try:
+                await attempt
+            except OverloadedError as exc:
+                errors.append(exc.retry_after)
+        gate.release()
+        return errors, gate.stats()
+
+    errors, stats = asyncio.run(run())
+    assert errors == [0.05, 0.05]
+    assert (stats["active"], stats["waiting"], stats["shed"]) == (0, 0, 2)
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_shed_call_is_503_and_does_not_touch_breaker(mock_get_supabase, client):
+    mock_get_supabase.return_value.table.return_value = Mock()
+    with patch.object(upstream_gate, "limit", 0), patch.object(upstream_gate, "max_queue", 0):
+        r = client.get("/experiments/00000000-0000-0000-0000-000000000001")
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
+    assert breaker.stats()["state"] == "closed"
+    assert breaker.failures == 0
+    assert upstream_gate.stats()["shed"] == 1
+
+
+@patch("app.supabase_client.settings.supabase_read_deadline", 0.05)
+def test_slot_is_held_until_an_abandoned_call_finishes():
+    finish = threading.Event()
+    query = Mock()
+    query.execute.side_effect = lambda: finish.wait(1) and Mock(data=[])
+
+    async def run():
+        try:
+            await execute(query, read=True)
+            assert False, "expected TimeoutError"
+        except TimeoutError:
+            pass
+        # the worker thread is still running, so the next call cannot start
+        assert upstream_gate.active == 1
+        try:
+            await execute(query)
+            assert False, "expected OverloadedError"
+        except OverloadedError:
+            pass
+        finish.set()
+        for _ in range(100):
+            if upstream_gate.active == 0:
+                break
+            await asyncio.sleep(0.01)
+        return upstream_gate.stats()
+
+    with patch.object(upstream_gate, "limit", 1), patch.object(upstream_gate, "queue_timeout", 0.05):
+        stats = asyncio.run(run())
+    assert (stats["active"], stats["waiting"], stats["shed"]) == (0, 0, 1)
+    assert query.execute.call_count == 1
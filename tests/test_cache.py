@@ -0,0 +1,135 @@
+import asyncio
+from unittest.mock import Mock, patch
+
+from app.cache import ReadCache, fetch_rows, read_cache, read_flights
+
+
+def test_cache_hit_and_miss():
+    cache = ReadCache(ttl_seconds=60, max_entries=10)
+    assert cache.get(("experiments", "list")) == (False, None)
+    cache.set(("experiments", "list"), [{"id": "a"}])
+    assert cache.get(("experiments", "list")) == (True, [{"id": "a"}])
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_expires_after_ttl():
+    cache = ReadCache(ttl_seconds=10, max_entries=10)
+    with patch("app.cache.time.monotonic", return_value=100.0):
+        cache.set(("experiments", "list"), [])
+    with patch("app.cache.time.monotonic", return_value=111.0):
+        assert cache.get(("experiments", "list")) == (False, None)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ReadCache(ttl_seconds=60, max_entries=2)
+    cache.set(("a",), 1)
+    cache.set(("b",), 2)
+    cache.get(("a",))
+    cache.set(("c",), 3)
+    assert cache.get(("b",)) == (False, None)
+    assert cache.get(("a",)) == (True, 1)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_drops_only_that_table():
+    cache = ReadCache(ttl_seconds=60, max_entries=10)
+    cache.set(("experiments", "list"), [])
+    cache.set(("experiments", "get", "x"), [])
+    cache.set(("service_entries", "list"), [])
+    cache.invalidate("experiments")
+    assert cache.get(("experiments", "list")) == (False, None)
+    assert cache.get(("experiments", "get", "x")) == (False, None)
+    assert cache.get(("service_entries", "list")) == (True, [])
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_list_served_from_cache_until_write(mock_get_supabase, client):
+    mock_table = Mock()
+    mock_query = mock_table.select.return_value.order.return_value.order.return_value
+    mock_query.limit.return_value.execute.return_value = Mock(data=[])
+    mock_table.delete.return_value.eq.return_value.execute.return_value = Mock(data=None)
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    client.get("/experiments")
+    client.get("/experiments")
+    assert mock_query.limit.return_value.execute.call_count == 1
+
+    client.delete("/experiments/00000000-0000-0000-0000-000000000001")
+    client.get("/experiments")
+    assert mock_query.limit.return_value.execute.call_count == 2
+
+
+def test_cache_stats_endpoint(client):
+    r = client.get("/health/cache")
+    assert r.status_code == 200
+    assert set(r.json()) >= {"hits", "misses", "evictions", "entries"}
+
+
+def _slow_execute(result, calls):
+    async def execute(query, read=False):
+        calls.append(query)
+        await asyncio.sleep(0.01)
+        if isinstance(result, Exception):
+            raise result
+        return Mock(data=result)
+
+    return execute
+
+
+def test_concurrent_identical_reads_share_one_call():
+    calls = []
+
+    async def run():
+        return await asyncio.gather(*(fetch_rows(("experiments", "list"), lambda: "query") for _ in range(5)))
+
+    with patch("app.cache.execute", _slow_execute([{"id": "a"}], calls)):
+        results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [[{"id": "a"}]] * 5
+    assert read_flights.stats() == {"calls": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_coalesced_error_reaches_every_caller():
+    calls = []
+
+    async def run():
+        return await asyncio.gather(
+            *(fetch_rows(("experiments", "list"), lambda: "query") for _ in range(3)), return_exceptions=True
+        )
+
+    with patch("app.cache.execute", _slow_execute(ConnectionError("down"), calls)):
+        results = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_read_after_write_does_not_join_older_flight():
+    calls = []
+
+    async def run():
+        first = asyncio.ensure_future(fetch_rows(("experiments", "list"), lambda: "before"))
+        await asyncio.sleep(0)
+        read_cache.invalidate("experiments")
+        second = await fetch_rows(("experiments", "list"), lambda: "after")
+        await first
+        return second
+
+    with patch("app.cache.execute", _slow_execute([], calls)):
+        asyncio.run(run())
+    assert calls == ["before", "after"]
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    calls = []
+
+    async def run():
+        first = asyncio.ensure_future(fetch_rows(("experiments", "list"), lambda: "query"))
+        second = asyncio.ensure_future(fetch_rows(("experiments", "list"), lambda: "query"))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    with patch("app.cache.execute", _slow_execute([{"id": "a"}], calls)):
+        assert asyncio.run(run()) == [{"id": "a"}]
+    assert len(calls) == 1
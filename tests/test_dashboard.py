@@ -0,0 +1,81 @@
+import time
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+from app.events import record_change
+
+GOAL = {
+    "id": str(uuid4()),
+    "title": "Rust",
+    "target_hours": 40,
+    "logged_hours": 10,
+    "progress_percent": 25,
+    "updated_at": "2025-01-01T00:00:00+00:00",
+}
+ENTRY = {"id": str(uuid4()), "date": "2025-01-02", "description": "Shelter", "hours": 2}
+TOTALS = {"total_hours": 12, "entry_count": 5, "week_hours": 2, "month_hours": 4, "year_hours": 12}
+
+
+def _supabase(delay: float = 0.0) -> Mock:
+    def respond(data):
+        def execute():
+            time.sleep(delay)
+            return Mock(data=data)
+
+        return execute
+
+    supabase = Mock()
+    tables = {"learning_goals": Mock(), "service_entries": Mock()}
+    for name, data in (("learning_goals", [GOAL]), ("service_entries", [ENTRY])):
+        query = tables[name].select.return_value.order.return_value.order.return_value.limit.return_value
+        query.execute.side_effect = respond(data)
+    supabase.table.side_effect = tables.__getitem__
+    rpcs = {
+        "experiment_status_counts": [{"status": "in_progress", "count": 3}, {"status": "completed", "count": 1}],
+        "service_hours_totals": [TOTALS],
+    }
+    supabase.rpc.side_effect = lambda name, params: Mock(execute=Mock(side_effect=respond(rpcs[name])))
+    return supabase
+
+
+@patch("app.routers.dashboard.get_supabase")
+def test_dashboard_summary(mock_get_supabase, client):
+    mock_get_supabase.return_value = _supabase()
+
+    r = client.get("/dashboard")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["experiments"] == {"not_started": 0, "in_progress": 3, "completed": 1}
+    assert body["goals"][0]["progress_percent"] == 25
+    assert body["recent_entries"][0]["description"] == "Shelter"
+    assert body["hours"] == {"total_hours": 12, "entry_count": 5, "week_hours": 2, "month_hours": 4, "year_hours": 12}
+    assert mock_get_supabase.return_value.table("learning_goals").select.call_args[0][0] == (
+        "id,title,target_hours,logged_hours,progress_percent,updated_at"
+    )
+
+
+@patch("app.routers.dashboard.get_supabase")
+def test_dashboard_reads_run_concurrently(mock_get_supabase, client):
+    mock_get_supabase.return_value = _supabase(delay=0.2)
+
+    start = time.perf_counter()
+    assert client.get("/dashboard").status_code == 200
+    # four 0.2s reads; sequential would take 0.8s
+    assert time.perf_counter() - start < 0.6
+
+
+@patch("app.routers.dashboard.get_supabase")
+def test_dashboard_cached_until_a_write(mock_get_supabase, client):
+    supabase = mock_get_supabase.return_value = _supabase()
+    client.get("/dashboard")
+    client.get("/dashboard")
+    assert supabase.rpc.call_count == 2
+
+    record_change("experiments", "update", [str(uuid4())])
+    client.get("/dashboard")
+    assert [call.args[0] for call in supabase.rpc.call_args_list[2:]] == ["experiment_status_counts"]
+
+
+def test_dashboard_limits_validated(client):
+    assert client.get("/dashboard", params={"goals": 0}).status_code == 422
+    assert client.get("/dashboard", params={"entries": 51}).status_code == 422
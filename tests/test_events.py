@@ -0,0 +1,137 @@
+import asyncio
+import json
+import time
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+from app.events import EventBroker, event_broker, record_change
+from app.routers.events import sse_stream
+
+
+def _drain(subscription) -> list[dict]:
+    events = []
+    while not subscription.queue.empty():
+        events.append(json.loads(subscription.queue.get_nowait()[1]))
+    return events
+
+
+def test_publish_reaches_matching_subscribers_only():
+    async def run():
+        broker = EventBroker(queue_size=10, replay_size=10)
+        experiments = broker.subscribe({"experiments"})
+        everything = broker.subscribe({"experiments", "service_entries"})
+        broker.publish("service_entries", "insert", ["a"])
+        broker.publish("experiments", "delete", ["b", "c"])
+        return _drain(experiments), _drain(everything)
+
+    experiments, everything = asyncio.run(run())
+    assert [(e["table"], e["op"], e["ids"]) for e in experiments] == [("experiments", "delete", ["b", "c"])]
+    assert [e["id"] for e in everything] == [1, 2]
+
+
+def test_last_event_id_replays_or_asks_for_resync():
+    async def run():
+        broker = EventBroker(queue_size=10, replay_size=2)
+        for row_id in "abc":
+            broker.publish("experiments", "update", [row_id])
+        resumed = broker.subscribe({"experiments"}, last_event_id=1)
+        too_old = broker.subscribe({"experiments"}, last_event_id=0)
+        return _drain(resumed), _drain(too_old)
+
+    resumed, too_old = asyncio.run(run())
+    assert [e["ids"] for e in resumed] == [["b"], ["c"]]
+    assert [e["op"] for e in too_old] == ["resync"]
+
+
+def test_slow_subscriber_gets_resync_instead_of_backlog():
+    async def run():
+        broker = EventBroker(queue_size=2, replay_size=10)
+        subscription = broker.subscribe({"experiments"})
+        for row_id in "abc":
+            broker.publish("experiments", "update", [row_id])
+        return _drain(subscription), broker.stats()
+
+    events, stats = asyncio.run(run())
+    assert [e["op"] for e in events] == ["resync"]
+    assert stats["resyncs"] == 1
+
+
+def test_sse_stream_formats_events_and_heartbeats():
+    async def run():
+        stream = sse_stream({"experiments"}, None, heartbeat=0.01)
+        chunks = [await stream.__anext__(), await stream.__anext__()]
+        record_change("experiments", "insert", ["a"])
+        chunks.append(await stream.__anext__())
+        await stream.aclose()
+        return chunks
+
+    retry, ping, change = asyncio.run(run())
+    assert retry.startswith("retry: ")
+    assert ping == ": ping\n\n"
+    assert change.startswith("id: 1\nevent: change\ndata: ")
+    assert json.loads(change.split("data: ", 1)[1])["ids"] == ["a"]
+    assert event_broker.stats()["subscribers"] == 0
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_websocket_receives_changes_from_write_handlers(mock_get_supabase, client):
+    mock_table = Mock()
+    mock_table.delete.return_value.eq.return_value.execute.return_value = Mock(data=None)
+    mock_get_supabase.return_value.table.return_value = mock_table
+    experiment_id = str(uuid4())
+
+    with client.websocket_connect("/events/ws?table=experiments") as ws:
+        assert client.delete(f"/experiments/{experiment_id}").status_code == 204
+        event = ws.receive_json()
+    assert (event["table"], event["op"], event["ids"]) == ("experiments", "delete", [experiment_id])
+
+
+def test_websocket_filter_can_be_changed(client):
+    with client.websocket_connect("/events/ws?table=experiments") as ws:
+        ws.send_text(json.dumps({"tables": ["service_entries"]}))
+        _wait_for(lambda: [s.tables for s in event_broker._subscribers] == [{"service_entries"}])
+        record_change("experiments", "update", ["a"])
+        record_change("service_entries", "update", ["b"])
+        assert ws.receive_json()["ids"] == ["b"]
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_sse_client_gone_before_first_event_leaves_no_subscriber():
+    from app.main import app
+
+    async def run():
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.3"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/events",
+            "raw_path": b"/events",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"test")],
+            "client": ("127.0.0.1", 1234),
+            "server": ("test", 80),
+        }
+
+        async def receive():
+            await asyncio.sleep(10)
+
+        async def send(message):
+            # the connection was closed before the response could start
+            raise OSError("client disconnected")
+
+        try:
+            await app(scope, receive, send)
+        except OSError:
+            pass
+
+    asyncio.run(run())
+    assert event_broker.stats()["subscribers"] == 0
@@ -1,6 +1,9 @@
+import json
 from unittest.mock import Mock, patch
 from uuid import uuid4
 
+from app.pagination import encode_cursor
+
 
 def _experiment_row(experiment_id=None, title="Exp 1", **kwargs):
     row = {
@@ -21,28 +24,134 @@ def _experiment_row(experiment_id=None, title="Exp 1", **kwargs):
 @patch("app.routers.experiments.get_supabase")
 def test_list_experiments_empty(mock_get_supabase, client):
     mock_table = Mock()
-    mock_table.select.return_value.order.return_value.execute.return_value = Mock(data=[])
+    mock_table.select.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[])
     mock_get_supabase.return_value.table.return_value = mock_table
 
     r = client.get("/experiments")
     assert r.status_code == 200
-    assert r.json() == []
+    assert r.json() == {"items": [], "next_cursor": None}
 
 
 @patch("app.routers.experiments.get_supabase")
 def test_list_experiments_returns_items(mock_get_supabase, client):
     row = _experiment_row()
     mock_table = Mock()
-    mock_table.select.return_value.order.return_value.execute.return_value = Mock(data=[row])
+    mock_table.select.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[row])
     mock_get_supabase.return_value.table.return_value = mock_table
 
     r = client.get("/experiments")
     assert r.status_code == 200
-    data = r.json()
+    data = r.json()["items"]
     assert len(data) == 1
     assert data[0]["title"] == row["title"]
 
 
+@patch("app.routers.experiments.get_supabase")
+def test_list_experiments_next_cursor(mock_get_supabase, client):
+    rows = [_experiment_row(title=f"Exp {i}") for i in range(3)]
+    mock_table = Mock()
+    mock_query = mock_table.select.return_value.order.return_value.order.return_value
+    mock_query.limit.return_value.execute.return_value = Mock(data=rows)
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get("/experiments", params={"limit": 2})
+    assert r.status_code == 200
+    body = r.json()
+    assert [item["title"] for item in body["items"]] == ["Exp 0", "Exp 1"]
+    assert body["next_cursor"]
+    mock_query.limit.assert_called_once_with(3)
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_list_experiments_with_cursor_seeks(mock_get_supabase, client):
+    mock_table = Mock()
+    mock_seek = mock_table.select.return_value.or_
+    mock_query = mock_seek.return_value.order.return_value.order.return_value
+    mock_query.limit.return_value.execute.return_value = Mock(data=[])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    cursor = encode_cursor("created_at", "2025-01-01T00:00:00+00:00", "abc")
+    r = client.get("/experiments", params={"cursor": cursor})
+    assert r.status_code == 200
+    assert r.json()["next_cursor"] is None
+    mock_seek.assert_called_once_with(
+        'created_at.lt."2025-01-01T00:00:00+00:00",'
+        'and(created_at.eq."2025-01-01T00:00:00+00:00",id.lt."abc")'
+    )
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_list_experiments_invalid_cursor(mock_get_supabase, client):
+    r = client.get("/experiments", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Invalid cursor"
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_list_experiments_filter_by_status(mock_get_supabase, client):
+    mock_table = Mock()
+    mock_filter = mock_table.select.return_value.in_
+    mock_query = mock_filter.return_value.order.return_value.order.return_value
+    mock_query.limit.return_value.execute.return_value = Mock(data=[_experiment_row(status="completed")])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get("/experiments", params={"status": ["completed", "in_progress"]})
+    assert r.status_code == 200
+    assert r.json()["items"][0]["status"] == "completed"
+    mock_filter.assert_called_once_with("status", ["completed", "in_progress"])
+
+
+def test_list_experiments_rejects_unknown_status_and_sort(client):
+    assert client.get("/experiments", params={"status": "paused"}).status_code == 422
+    assert client.get("/experiments", params={"sort": "notes"}).status_code == 422
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_list_experiments_sort_ascending(mock_get_supabase, client):
+    rows = [_experiment_row(title=f"Exp {i}") for i in range(3)]
+    mock_table = Mock()
+    mock_order = mock_table.select.return_value.order
+    mock_order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=rows)
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get("/experiments", params={"sort": "title", "limit": 2})
+    assert r.status_code == 200
+    mock_order.assert_called_once_with("title", desc=False)
+    mock_table.select.assert_called_once_with(
+        "id,title,description,dependencies,next_action,status,notes,created_at,updated_at"
+    )
+    cursor = r.json()["next_cursor"]
+
+    mock_seek = mock_table.select.return_value.or_
+    mock_seek.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[])
+    r = client.get("/experiments", params={"sort": "title", "cursor": cursor})
+    assert r.status_code == 200
+    mock_seek.assert_called_once_with(f'title.gt."Exp 1",and(title.eq."Exp 1",id.gt."{rows[1]["id"]}")')
+    # a cursor only continues the ordering it was issued for
+    assert client.get("/experiments", params={"sort": "-title", "cursor": cursor}).status_code == 400
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_list_experiments_sparse_fields(mock_get_supabase, client):
+    row = _experiment_row()
+    mock_table = Mock()
+    mock_query = mock_table.select.return_value.order.return_value.order.return_value
+    mock_query.limit.return_value.execute.return_value = Mock(data=[row])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get("/experiments", params={"fields": "id,title,status"})
+    assert r.status_code == 200
+    assert r.json()["items"] == [{"id": row["id"], "title": row["title"], "status": row["status"]}]
+    mock_table.select.assert_called_once_with("id,title,status,created_at,updated_at")
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_list_experiments_unknown_field(mock_get_supabase, client):
+    r = client.get("/experiments", params={"fields": "title,secret"})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Unknown fields: secret"
+
+
 @patch("app.routers.experiments.get_supabase")
 def test_get_experiment_ok(mock_get_supabase, client):
     experiment_id = uuid4()
@@ -113,3 +222,55 @@ def test_delete_experiment_404(mock_get_supabase, client):
 
     r = client.delete(f"/experiments/{uuid4()}")
     assert r.status_code == 404
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_update_experiments_batch(mock_get_supabase, client):
+    found, missing = uuid4(), uuid4()
+    existing = _experiment_row(experiment_id=found)
+    mock_supabase = mock_get_supabase.return_value
+    mock_supabase.rpc.return_value.execute.return_value = Mock(data=[dict(existing, status="completed")])
+
+    r = client.patch(
+        "/experiments:batch",
+        json={"items": [{"id": str(found), "status": "completed"}, {"id": str(missing), "title": "x"}]},
+    )
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert results[0]["status"] == 200
+    assert results[0]["item"]["status"] == "completed"
+    assert results[1] == {"id": str(missing), "status": 404, "item": None, "detail": "Experiment not found"}
+    # one UPDATE merges the patches in Postgres; nothing is read first or upserted
+    mock_supabase.rpc.assert_called_once_with(
+        "update_experiments_batch",
+        {"patches": {str(found): {"status": "completed"}, str(missing): {"title": "x"}}},
+    )
+    mock_supabase.table.assert_not_called()
+
+
+def test_update_experiments_batch_duplicate_ids(client):
+    experiment_id = str(uuid4())
+    r = client.patch(
+        "/experiments:batch",
+        json={"items": [{"id": experiment_id, "title": "a"}, {"id": experiment_id, "title": "b"}]},
+    )
+    assert r.status_code == 400
+
+
+@patch("app.export.settings.export_chunk_size", 2)
+@patch("app.routers.experiments.get_supabase")
+def test_export_experiments_ndjson_pages_through_table(mock_get_supabase, client):
+    rows = [_experiment_row(title=f"Exp {i}") for i in range(3)]
+    mock_table = Mock()
+    first_page = mock_table.select.return_value.order.return_value.order.return_value
+    first_page.limit.return_value.execute.return_value = Mock(data=rows)
+    next_page = mock_table.select.return_value.or_.return_value.order.return_value.order.return_value
+    next_page.limit.return_value.execute.return_value = Mock(data=rows[2:])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get("/experiments/export")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [line["title"] for line in lines] == ["Exp 0", "Exp 1", "Exp 2"]
+    first_page.limit.assert_called_once_with(3)
@@ -0,0 +1,125 @@
+from unittest.mock import Mock, patch
+
+from app.graph import DependencyGraph
+
+
+def _node(node_id, deps=(), status="not_started"):
+    return {"id": node_id, "title": node_id.upper(), "status": status, "dependencies": list(deps)}
+
+
+def _graph(*rows):
+    graph = DependencyGraph()
+    graph.load(list(rows))
+    return graph
+
+
+def test_topological_order_puts_dependencies_first():
+    graph = _graph(_node("c", ["b"]), _node("b", ["a"]), _node("a"))
+    assert graph.analysis().order == ["a", "b", "c"]
+    assert graph.analysis().cycles == []
+
+
+def test_cycles_are_reported_and_left_out_of_order():
+    graph = _graph(_node("a", ["b"]), _node("b", ["a"]), _node("c"), _node("d", ["d"]))
+    analysis = graph.analysis()
+    assert analysis.order == ["c"]
+    assert analysis.cycles == [["a", "b"], ["d"]]
+
+
+def test_critical_path_skips_completed_work():
+    graph = _graph(
+        _node("a", status="completed"),
+        _node("b", ["a"]),
+        _node("c", ["b"]),
+        _node("d", ["a"]),
+    )
+    assert graph.analysis().critical_path == ["b", "c"]
+
+
+def test_missing_dependencies():
+    graph = _graph(_node("a", ["ghost"]))
+    assert graph.analysis().missing == {"a": ["ghost"]}
+    assert graph.analysis().order == ["a"]
+
+
+def test_incremental_edge_update_invalidates_analysis():
+    graph = _graph(_node("a"), _node("b"))
+    assert graph.analysis().order == ["a", "b"]
+    graph.upsert(_node("a", ["b"]))
+    assert graph.analysis().order == ["b", "a"]
+    assert graph.unblocks("b") == ["a"]
+    graph.upsert(_node("a"))
+    assert graph.unblocks("b") == []
+
+
+def test_title_change_keeps_cached_analysis():
+    graph = _graph(_node("a"))
+    analysis = graph.analysis()
+    graph.upsert(dict(_node("a"), title="Renamed"))
+    assert graph.analysis() is analysis
+
+
+def test_remove_node_drops_edges():
+    graph = _graph(_node("a"), _node("b", ["a"]))
+    graph.remove("a")
+    assert "a" not in graph.nodes
+    assert graph.analysis().missing == {"b": ["a"]}
+
+
+def test_blocked_by_transitive_ignores_completed():
+    graph = _graph(_node("a"), _node("b", ["a"], status="completed"), _node("c", ["b"]))
+    assert graph.blocked_by("c") == []
+    assert graph.blocked_by("c", transitive=True) == ["a"]
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_graph_endpoint_loads_once_and_tracks_writes(mock_get_supabase, client):
+    a, b = "00000000-0000-0000-0000-00000000000a", "00000000-0000-0000-0000-00000000000b"
+    mock_table = Mock()
+    mock_table.select.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[_node(a), _node(b, [a])])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get("/experiments/graph")
+    assert r.status_code == 200
+    assert [node["id"] for node in r.json()["order"]] == [a, b]
+    assert r.json()["critical_path"] == [a, b]
+
+    mock_table.delete.return_value.eq.return_value.execute.return_value = Mock(data=None)
+    client.delete(f"/experiments/{a}")
+    r = client.get("/experiments/graph")
+    assert r.json()["missing_dependencies"] == {b: [a]}
+    mock_table.select.return_value.order.return_value.order.return_value.limit.return_value.execute.assert_called_once()
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_blocked_by_and_unblocks_endpoints(mock_get_supabase, client):
+    a, b = "00000000-0000-0000-0000-00000000000a", "00000000-0000-0000-0000-00000000000b"
+    mock_table = Mock()
+    mock_table.select.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[_node(a), _node(b, [a])])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    assert [n["id"] for n in client.get(f"/experiments/{b}/blocked-by").json()] == [a]
+    assert [n["id"] for n in client.get(f"/experiments/{a}/unblocks").json()] == [b]
+    r = client.get("/experiments/00000000-0000-0000-0000-00000000000c/unblocks")
+    assert r.status_code == 404
+
+
+@patch("app.export.settings.export_chunk_size", 2)
+@patch("app.routers.experiments.get_supabase")
+def test_graph_is_loaded_page_by_page(mock_get_supabase, client):
+    ids = [f"00000000-0000-0000-0000-00000000000{i}" for i in range(5)]
+    rows = [dict(_node(ids[0]), created_at="2024-01-01")] + [
+        dict(_node(node_id, [ids[i]]), created_at=f"2024-01-0{i + 2}") for i, node_id in enumerate(ids[1:])
+    ]
+    query = Mock()
+    for method in ("select", "or_", "order", "limit"):
+        getattr(query, method).return_value = query
+    # each page asks for one row more than the chunk size to see if another follows
+    query.execute.side_effect = [Mock(data=rows[0:3]), Mock(data=rows[2:5]), Mock(data=rows[4:5])]
+    mock_get_supabase.return_value.table.return_value = query
+
+    r = client.get("/experiments/graph")
+    assert r.status_code == 200
+    assert [node["id"] for node in r.json()["order"]] == ids
+    assert query.execute.call_count == 3
+    assert query.or_.call_count == 2
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+import httpx
+
+from app.idempotency import IdempotencyStore, StoredResponse, idempotency_store
+from app.main import app
+
+BODY = {"date": "2025-01-15", "description": "Shelter", "hours": 2}
+
+
+def _entry_row(**overrides):
+    return {
+        "id": str(uuid4()),
+        "date": "2025-01-15",
+        "description": "Shelter",
+        "hours": 2,
+        "reflection": "",
+        "created_at": "2025-01-15T10:00:00+00:00",
+        "updated_at": "2025-01-15T10:00:00+00:00",
+        **overrides,
+    }
+
+
+def _insert_mock(mock_get_supabase, *results):
+    mock_table = Mock()
+    mock_table.insert.return_value.execute.side_effect = list(results)
+    mock_get_supabase.return_value.table.return_value = mock_table
+    return mock_table.insert.return_value
+
+
+@patch("app.routers.service.get_supabase")
+def test_repeated_key_replays_response_without_insert(mock_get_supabase, client):
+    insert = _insert_mock(mock_get_supabase, Mock(data=[_entry_row()]), Mock(data=[_entry_row()]))
+    headers = {"Idempotency-Key": "k-1"}
+
+    first = client.post("/service/entries", json=BODY, headers=headers)
+    second = client.post("/service/entries", json=BODY, headers=headers)
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert insert.execute.call_count == 1
+    assert idempotency_store.stats()["replays"] == 1
+
+
+@patch("app.routers.service.get_supabase")
+def test_requests_without_key_are_not_deduplicated(mock_get_supabase, client):
+    insert = _insert_mock(mock_get_supabase, Mock(data=[_entry_row()]), Mock(data=[_entry_row()]))
+    client.post("/service/entries", json=BODY)
+    client.post("/service/entries", json=BODY)
+    assert insert.execute.call_count == 2
+
+
+@patch("app.routers.service.get_supabase")
+def test_key_reused_with_different_body_422(mock_get_supabase, client):
+    _insert_mock(mock_get_supabase, Mock(data=[_entry_row()]))
+    headers = {"Idempotency-Key": "k-2"}
+    client.post("/service/entries", json=BODY, headers=headers)
+
+    r = client.post("/service/entries", json={**BODY, "hours": 5}, headers=headers)
+    assert r.status_code == 422
+    assert "different request" in r.json()["detail"]
+
+
+@patch("app.routers.service.get_supabase")
+def test_server_error_is_not_stored(mock_get_supabase, client):
+    insert = _insert_mock(mock_get_supabase, Mock(data=[]), Mock(data=[_entry_row()]))
+    headers = {"Idempotency-Key": "k-3"}
+
+    assert client.post("/service/entries", json=BODY, headers=headers).status_code == 500
+    r = client.post("/service/entries", json=BODY, headers=headers)
+    assert r.status_code == 201
+    assert "idempotent-replayed" not in r.headers
+    assert insert.execute.call_count == 2
+
+
+@patch("app.routers.service.get_supabase")
+def test_batch_endpoints_use_keys(mock_get_supabase, client):
+    delete = mock_get_supabase.return_value.rpc.return_value.select.return_value
+    delete.execute.return_value = Mock(data=[])
+    headers = {"Idempotency-Key": "k-4"}
+    body = {"ids": [str(uuid4())]}
+
+    client.request("DELETE", "/service/entries:batch", json=body, headers=headers)
+    r = client.request("DELETE", "/service/entries:batch", json=body, headers=headers)
+    assert r.headers["idempotent-replayed"] == "true"
+    assert delete.execute.call_count == 1
+
+
+def test_overlong_key_400(client):
+    r = client.post("/service/entries", json=BODY, headers={"Idempotency-Key": "k" * 256})
+    assert r.status_code == 400
+
+
+@patch("app.routers.service.get_supabase")
+def test_concurrent_duplicates_wait_for_the_first(mock_get_supabase):
+    row = _entry_row()
+
+    def slow_insert():
+        time.sleep(0.1)
+        return Mock(data=[row])
+
+    mock_table = Mock()
+    mock_table.insert.return_value.execute.side_effect = slow_insert
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(
+                *(
+                    client.post("/service/entries", json=BODY, headers={"Idempotency-Key": "k-5"})
+                    for _ in range(3)
+                )
+            )
+
+    responses = asyncio.run(run())
+    assert [r.status_code for r in responses] == [201, 201, 201]
+    assert {r.json()["id"] for r in responses} == {row["id"]}
+    assert sum(r.headers.get("idempotent-replayed") == "true" for r in responses) == 2
+    assert mock_table.insert.return_value.execute.call_count == 1
+
+
+def test_store_bounded_by_bytes_and_ttl():
+    async def run():
+        store = IdempotencyStore(ttl_seconds=60, max_entries=10, max_bytes=10)
+        for key in ("a", "b"):
+            store.complete(key, store.reserve(key, "f"), StoredResponse(201, [], b"123456"))
+        assert store.get("a") is None
+        assert store.get("b").response.body == b"123456"
+        with patch("app.idempotency.time.monotonic", return_value=time.monotonic() + 61):
+            assert store.get("b") is None
+        return store.stats()
+
+    stats = asyncio.run(run())
+    assert stats["evictions"] == 1
+    assert stats["entries"] == 0
+    assert stats["bytes"] == 0
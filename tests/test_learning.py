@@ -1,6 +1,12 @@
 from unittest.mock import Mock, patch
 from uuid import uuid4
 
+from postgrest.exceptions import APIError
+
+from app.cache import read_cache
+from app.schemas.batch import MAX_BATCH_ITEMS
+from app.resilience import breaker
+
 
 def _goal_row(goal_id=None, title="Learn Python", **kwargs):
     row = {
@@ -8,6 +14,7 @@ def _goal_row(goal_id=None, title="Learn Python", **kwargs):
         "title": title,
         "target_hours": 10.0,
         "progress_percent": 0,
+        "logged_hours": 0,
         "notes": "",
         "resources": [],
         "weekly_hours": [],
@@ -21,29 +28,50 @@ def _goal_row(goal_id=None, title="Learn Python", **kwargs):
 @patch("app.routers.learning.get_supabase")
 def test_list_goals_empty(mock_get_supabase, client):
     mock_table = Mock()
-    mock_table.select.return_value.order.return_value.execute.return_value = Mock(data=[])
+    mock_table.select.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[])
     mock_get_supabase.return_value.table.return_value = mock_table
 
     r = client.get("/learning/goals")
     assert r.status_code == 200
-    assert r.json() == []
+    assert r.json() == {"items": [], "next_cursor": None}
 
 
 @patch("app.routers.learning.get_supabase")
 def test_list_goals_returns_items(mock_get_supabase, client):
     row = _goal_row()
     mock_table = Mock()
-    mock_table.select.return_value.order.return_value.execute.return_value = Mock(data=[row])
+    mock_table.select.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[row])
     mock_get_supabase.return_value.table.return_value = mock_table
 
     r = client.get("/learning/goals")
     assert r.status_code == 200
-    data = r.json()
+    data = r.json()["items"]
     assert len(data) == 1
     assert data[0]["title"] == row["title"]
     assert data[0]["id"] == row["id"]
 
 
+@patch("app.routers.learning.get_supabase")
+def test_list_goals_weak_etag_tracks_updated_at(mock_get_supabase, client):
+    row = _goal_row()
+    mock_table = Mock()
+    mock_execute = mock_table.select.return_value.order.return_value.order.return_value.limit.return_value.execute
+    mock_execute.return_value = Mock(data=[row])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get("/learning/goals")
+    etag = r.headers["etag"]
+    assert etag.startswith("W/")
+    r = client.get("/learning/goals", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    read_cache.clear()
+    mock_execute.return_value = Mock(data=[dict(row, updated_at="2025-02-01T00:00:00")])
+    r = client.get("/learning/goals", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+
 @patch("app.routers.learning.get_supabase")
 def test_get_goal_ok(mock_get_supabase, client):
     goal_id = uuid4()
@@ -58,6 +86,20 @@ def test_get_goal_ok(mock_get_supabase, client):
     assert r.json()["title"] == row["title"]
 
 
+@patch("app.routers.learning.get_supabase")
+def test_get_goal_sparse_fields(mock_get_supabase, client):
+    goal_id = uuid4()
+    row = {"id": str(goal_id), "title": "Learn Python", "target_hours": 10, "updated_at": "2025-01-01T00:00:00"}
+    mock_table = Mock()
+    mock_table.select.return_value.eq.return_value.execute.return_value = Mock(data=[row])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get(f"/learning/goals/{goal_id}", params={"fields": "title,target_hours"})
+    assert r.status_code == 200
+    assert r.json() == {"title": "Learn Python", "target_hours": 10.0}
+    mock_table.select.assert_called_once_with("title,target_hours,id,updated_at")
+
+
 @patch("app.routers.learning.get_supabase")
 def test_get_goal_404(mock_get_supabase, client):
     mock_table = Mock()
@@ -81,12 +123,23 @@ def test_create_goal(mock_get_supabase, client):
     assert r.json()["title"] == "New Goal"
 
 
+@patch("app.routers.learning.get_supabase")
+def test_create_goal_with_circuit_open_asks_to_retry(mock_get_supabase, client):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    r = client.post("/learning/goals", json={"title": "New Goal"})
+    assert r.status_code == 503
+    assert int(r.headers["retry-after"]) >= 1
+    mock_get_supabase.return_value.table.return_value.insert.return_value.execute.assert_not_called()
+
+
 @patch("app.routers.learning.get_supabase")
 def test_update_goal(mock_get_supabase, client):
     goal_id = uuid4()
     row = _goal_row(goal_id=goal_id, title="Updated")
     mock_table = Mock()
-    mock_table.update.return_value.eq.return_value.execute.return_value = Mock(data=[row])
+    mock_table.update.return_value.eq.return_value.select.return_value.execute.return_value = Mock(data=[row])
     mock_get_supabase.return_value.table.return_value = mock_table
 
     r = client.patch(f"/learning/goals/{goal_id}", json={"title": "Updated"})
@@ -97,7 +150,7 @@ def test_update_goal(mock_get_supabase, client):
 @patch("app.routers.learning.get_supabase")
 def test_update_goal_404(mock_get_supabase, client):
     mock_table = Mock()
-    mock_table.update.return_value.eq.return_value.execute.return_value = Mock(data=[])
+    mock_table.update.return_value.eq.return_value.select.return_value.execute.return_value = Mock(data=[])
     mock_get_supabase.return_value.table.return_value = mock_table
 
     r = client.patch(f"/learning/goals/{uuid4()}", json={"title": "x"})
@@ -122,3 +175,105 @@ def test_delete_goal_404(mock_get_supabase, client):
 
     r = client.delete(f"/learning/goals/{uuid4()}")
     assert r.status_code == 404
+
+
+@patch("app.routers.learning.get_supabase")
+def test_delete_goals_batch(mock_get_supabase, client):
+    deleted, missing = str(uuid4()), str(uuid4())
+    mock_supabase = mock_get_supabase.return_value
+    mock_supabase.rpc.return_value.select.return_value.execute.return_value = Mock(data=[{"id": deleted}])
+
+    r = client.request("DELETE", "/learning/goals:batch", json={"ids": [deleted, missing]})
+    assert r.status_code == 200
+    assert [res["status"] for res in r.json()["results"]] == [204, 404]
+    # the ids go in the body, not an in.(...) filter in the URL
+    mock_supabase.rpc.assert_called_once_with("delete_learning_goals_batch", {"ids": [deleted, missing]})
+    mock_supabase.table.assert_not_called()
+
+
+@patch("app.routers.learning.get_supabase")
+def test_delete_goals_batch_at_max_items(mock_get_supabase, client):
+    ids = [str(uuid4()) for _ in range(MAX_BATCH_ITEMS)]
+    mock_supabase = mock_get_supabase.return_value
+    mock_supabase.rpc.return_value.select.return_value.execute.return_value = Mock(data=[{"id": i} for i in ids])
+
+    r = client.request("DELETE", "/learning/goals:batch", json={"ids": ids})
+    assert r.status_code == 200
+    assert {res["status"] for res in r.json()["results"]} == {204}
+    assert mock_supabase.rpc.call_args.args[1] == {"ids": ids}
+
+
+@patch("app.routers.learning.get_supabase")
+def test_get_goal_embeds_weekly_hours_sorted(mock_get_supabase, client):
+    goal_id = uuid4()
+    weeks = [{"week_key": "2025-W02", "hours": 2}, {"week_key": "2025-W01", "hours": 1}]
+    row = _goal_row(goal_id=goal_id, weekly_hours=weeks, logged_hours=3)
+    mock_table = Mock()
+    mock_table.select.return_value.eq.return_value.execute.return_value = Mock(data=[row])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get(f"/learning/goals/{goal_id}")
+    assert r.status_code == 200
+    assert [w["week_key"] for w in r.json()["weekly_hours"]] == ["2025-W01", "2025-W02"]
+    assert r.json()["logged_hours"] == 3
+    assert "weekly_hours:learning_goal_weekly_hours(week_key,hours)" in mock_table.select.call_args.args[0]
+
+
+@patch("app.routers.learning.get_supabase")
+def test_update_goal_ignores_client_progress(mock_get_supabase, client):
+    goal_id = uuid4()
+    mock_table = Mock()
+    mock_table.update.return_value.eq.return_value.select.return_value.execute.return_value = Mock(
+        data=[_goal_row(goal_id=goal_id)]
+    )
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.patch(
+        f"/learning/goals/{goal_id}",
+        json={"notes": "n", "progress_percent": 80, "weekly_hours": [{"week_key": "2025-W01", "hours": 1}]},
+    )
+    assert r.status_code == 200
+    mock_table.update.assert_called_once_with({"notes": "n"})
+
+
+@patch("app.routers.learning.get_supabase")
+def test_put_weekly_hours_upserts_one_week(mock_get_supabase, client):
+    goal_id = uuid4()
+    mock_table = Mock()
+    mock_table.upsert.return_value.execute.return_value = Mock(
+        data=[{"goal_id": str(goal_id), "week_key": "2025-W03", "hours": 4}]
+    )
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.put(f"/learning/goals/{goal_id}/weekly-hours/2025-W03", json={"hours": 4})
+    assert r.status_code == 200
+    assert r.json() == {"week_key": "2025-W03", "hours": 4.0}
+    mock_get_supabase.return_value.table.assert_called_with("learning_goal_weekly_hours")
+    mock_table.upsert.assert_called_once_with(
+        {"goal_id": str(goal_id), "week_key": "2025-W03", "hours": 4.0}, on_conflict="goal_id,week_key"
+    )
+
+
+@patch("app.routers.learning.get_supabase")
+def test_put_weekly_hours_unknown_goal(mock_get_supabase, client):
+    mock_table = Mock()
+    mock_table.upsert.return_value.execute.side_effect = APIError({"code": "23503", "message": "fk"})
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.put(f"/learning/goals/{uuid4()}/weekly-hours/2025-W03", json={"hours": 4})
+    assert r.status_code == 404
+
+
+def test_put_weekly_hours_rejects_negative(client):
+    r = client.put(f"/learning/goals/{uuid4()}/weekly-hours/2025-W03", json={"hours": -1})
+    assert r.status_code == 422
+
+
+@patch("app.routers.learning.get_supabase")
+def test_delete_weekly_hours_404(mock_get_supabase, client):
+    mock_table = Mock()
+    mock_table.delete.return_value.eq.return_value.eq.return_value.execute.return_value = Mock(data=[])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.delete(f"/learning/goals/{uuid4()}/weekly-hours/2025-W03")
+    assert r.status_code == 404
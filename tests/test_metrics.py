@@ -0,0 +1,48 @@
+from unittest.mock import Mock, patch
+
+from supabase import create_client
+
+from app.metrics import Histogram, describe_query
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(("/a",), 0.05)
+    histogram.observe(("/a",), 0.5)
+    histogram.observe(("/a",), 5)
+    lines = list(histogram.render())
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+
+
+def test_describe_query_reads_table_and_operation():
+    supabase = create_client("http://localhost:54321", "key")
+    assert describe_query(supabase.table("experiments").select("*")) == ("experiments", "select")
+    assert describe_query(supabase.table("experiments").insert({})) == ("experiments", "insert")
+    assert describe_query(supabase.table("experiments").upsert({})) == ("experiments", "upsert")
+    assert describe_query(supabase.table("experiments").delete().eq("id", "x")) == ("experiments", "delete")
+    assert describe_query(supabase.rpc("service_hours_stats", {})) == ("service_hours_stats", "rpc")
+    assert describe_query(Mock()) == ("unknown", "unknown")
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_server_timing_and_metrics_endpoint(mock_get_supabase, client):
+    mock_table = Mock()
+    mock_table.select.return_value.eq.return_value.execute.return_value = Mock(data=[])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get("/experiments/00000000-0000-0000-0000-000000000001")
+    assert r.status_code == 404
+    assert r.headers["server-timing"].startswith('db;dur=')
+    assert 'desc="1 calls"' in r.headers["server-timing"]
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/experiments/{experiment_id}",status="404"}'
+        in r.text
+    )
+    assert "supabase_request_duration_seconds_bucket" in r.text
+    assert "read_cache_misses_total" in r.text
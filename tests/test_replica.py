@@ -0,0 +1,186 @@
+import asyncio
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+from app.cache import read_cache
+from app.replica import local_replica
+
+
+def _stamp(i: int) -> str:
+    return f"2024-01-01T00:00:{i:02d}+00:00"
+
+
+def _experiment(i: int, **overrides):
+    return {
+        "id": f"00000000-0000-0000-0000-{i:012d}",
+        "title": f"Exp {i}",
+        "description": "",
+        "dependencies": [],
+        "next_action": "",
+        "status": "completed" if i % 2 else "not_started",
+        "notes": "",
+        "created_at": _stamp(i),
+        "updated_at": _stamp(i),
+        **overrides,
+    }
+
+
+def _goal(i: int, **overrides):
+    return {
+        "id": f"00000000-0000-0000-0001-{i:012d}",
+        "title": f"Goal {i}",
+        "target_hours": 10,
+        "progress_percent": 10,
+        "logged_hours": 1,
+        "notes": "",
+        "resources": [],
+        "weekly_hours": [{"week_key": "2024-W01", "hours": 1}],
+        "created_at": _stamp(i),
+        "updated_at": _stamp(i),
+        **overrides,
+    }
+
+
+def _entry(i: int, **overrides):
+    return {
+        "id": f"00000000-0000-0000-0002-{i:012d}",
+        "date": f"2024-01-{i + 1:02d}",
+        "description": "Shelter",
+        "hours": i,
+        "reflection": "",
+        "created_at": _stamp(i),
+        "updated_at": _stamp(i),
+        **overrides,
+    }
+
+
+def _sync(data: dict[str, list]) -> None:
+    """Run one replica sync against Supabase returning ``data[table]`` (empty for the rest)."""
+    tables = {}
+    for name in ("learning_goals", "experiments", "service_entries", "deleted_records"):
+        table = Mock()
+        result = Mock(data=data.get(name, []))
+        ordered = table.select.return_value.order.return_value.order.return_value
+        ordered.limit.return_value.execute.return_value = result
+        seeked = table.select.return_value.or_.return_value.order.return_value.order.return_value
+        seeked.limit.return_value.execute.return_value = result
+        tables[name] = table
+    supabase = Mock()
+    supabase.table.side_effect = tables.__getitem__
+    local_replica.open()
+    with patch("app.replica.get_supabase", return_value=supabase):
+        asyncio.run(local_replica.sync())
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_reads_served_from_replica(mock_get_supabase, client):
+    _sync({"experiments": [_experiment(i) for i in range(5)]})
+    assert local_replica.ready
+
+    r = client.get("/experiments", params={"limit": 2})
+    assert [item["title"] for item in r.json()["items"]] == ["Exp 4", "Exp 3"]
+    r = client.get("/experiments", params={"limit": 2, "cursor": r.json()["next_cursor"]})
+    assert [item["title"] for item in r.json()["items"]] == ["Exp 2", "Exp 1"]
+
+    r = client.get("/experiments", params={"status": "completed", "sort": "created_at", "fields": "id,title"})
+    assert r.json()["items"] == [
+        {"id": _experiment(1)["id"], "title": "Exp 1"},
+        {"id": _experiment(3)["id"], "title": "Exp 3"},
+    ]
+    assert client.get(f"/experiments/{_experiment(2)['id']}").json()["title"] == "Exp 2"
+    assert client.get(f"/experiments/{uuid4()}").status_code == 404
+    mock_get_supabase.return_value.table.assert_not_called()
+
+
+@patch("app.routers.service.get_supabase")
+def test_service_filters_on_replica(mock_get_supabase, client):
+    _sync({"service_entries": [_entry(i) for i in range(6)]})
+    r = client.get("/service/entries", params={"date_from": "2024-01-02", "date_to": "2024-01-05", "min_hours": 2})
+    assert [item["hours"] for item in r.json()["items"]] == [4, 3, 2]
+    mock_get_supabase.return_value.table.assert_not_called()
+
+
+@patch("app.routers.service.get_supabase")
+def test_writes_apply_to_replica_at_once(mock_get_supabase, client):
+    _sync({"service_entries": [_entry(0)]})
+    created = _entry(1, search="'shelter':1")
+    mock_table = Mock()
+    mock_table.insert.return_value.execute.return_value = Mock(data=[created])
+    mock_table.delete.return_value.eq.return_value.execute.return_value = Mock(data=[_entry(0)])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    body = {"date": "2024-01-02", "description": "Shelter", "hours": 1}
+    assert client.post("/service/entries", json=body).status_code == 201
+    assert client.delete(f"/service/entries/{_entry(0)['id']}").status_code == 204
+    r = client.get("/service/entries")
+    assert [item["id"] for item in r.json()["items"]] == [created["id"]]
+    assert local_replica.get("service_entries", created["id"])[0].keys() == _entry(1).keys()
+    mock_table.select.assert_not_called()
+
+    # a sync read from before the delete does not bring the row back
+    _sync({"service_entries": [_entry(0)]})
+    assert local_replica.get("service_entries", _entry(0)["id"]) == []
+
+
+@patch("app.routers.learning.get_supabase")
+def test_write_without_rows_falls_back_until_synced(mock_get_supabase, client):
+    _sync({"learning_goals": [_goal(0)]})
+    mock_table = Mock()
+    mock_table.upsert.return_value.execute.return_value = Mock(data=[{"week_key": "2024-W02", "hours": 3}])
+    mock_table.select.return_value.eq.return_value.execute.return_value = Mock(
+        data=[_goal(0, logged_hours=4, updated_at=_stamp(9))]
+    )
+    mock_get_supabase.return_value.table.return_value = mock_table
+    goal_id = _goal(0)["id"]
+
+    client.put(f"/learning/goals/{goal_id}/weekly-hours/2024-W02", json={"hours": 3})
+    assert not local_replica.serves("learning_goals")
+    assert client.get(f"/learning/goals/{goal_id}").json()["logged_hours"] == 4
+    assert mock_table.select.return_value.eq.return_value.execute.call_count == 1
+
+    _sync({"learning_goals": [_goal(0, logged_hours=4, updated_at=_stamp(9))]})
+    assert local_replica.serves("learning_goals")
+    assert client.get(f"/learning/goals/{goal_id}").json()["logged_hours"] == 4
+    assert mock_table.select.return_value.eq.return_value.execute.call_count == 1
+
+
+def test_tombstones_and_older_copies():
+    _sync({"experiments": [_experiment(1, title="New", updated_at=_stamp(5)), _experiment(2)]})
+    tombstone = {"id": 1, "table_name": "experiments", "row_id": _experiment(2)["id"], "deleted_at": _stamp(6)}
+    _sync({"experiments": [_experiment(1, title="Old")], "deleted_records": [tombstone]})
+    assert local_replica.get("experiments", _experiment(1)["id"])[0]["title"] == "New"
+    assert local_replica.get("experiments", _experiment(2)["id"]) == []
+
+
+def test_write_in_another_worker_sends_reads_to_supabase():
+    _sync({})
+    assert local_replica.serves("experiments")
+    # the generation moved without this replica applying the write
+    read_cache.invalidate("experiments")
+    assert not local_replica.serves("experiments")
+    assert local_replica.serves("service_entries")
+    assert local_replica.stats()["fallbacks"] == 1
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_title_sort_pages_stay_on_supabase_across_a_fallback(mock_get_supabase, client):
+    # Postgres' collation order; SQLite would put "Éclair" after "Zebra"
+    titles = ["apple", "Banana", "cherry", "Éclair", "Zebra"]
+    rows = [_experiment(i, title=title) for i, title in enumerate(titles)]
+    _sync({"experiments": rows})
+    query = Mock()
+    for method in ("select", "or_", "order", "limit"):
+        getattr(query, method).return_value = query
+    query.execute.side_effect = [Mock(data=rows[:4]), Mock(data=rows[3:])]
+    mock_get_supabase.return_value.table.return_value = query
+
+    # the first page is read while the replica is behind, the second once it caught up
+    read_cache.invalidate("experiments")
+    first = client.get("/experiments", params={"sort": "title", "limit": 3}).json()
+    _sync({"experiments": rows})
+    assert local_replica.serves("experiments")
+    second = client.get("/experiments", params={"sort": "title", "limit": 3, "cursor": first["next_cursor"]}).json()
+
+    assert [item["title"] for item in first["items"] + second["items"]] == titles
+    assert second["next_cursor"] is None
+    assert query.execute.call_count == 2
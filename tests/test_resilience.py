@@ -0,0 +1,189 @@
+import asyncio
+import time
+from unittest.mock import Mock, patch
+
+import httpx
+from postgrest.exceptions import APIError
+
+from app.cache import read_cache
+from app.resilience import CircuitBreaker, CircuitOpenError, breaker, is_upstream_failure
+from app.supabase_client import execute
+
+
+def test_breaker_opens_after_threshold_and_rejects():
+    cb = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    cb.before_call()
+    cb.record_failure()
+    assert cb.state == cb.CLOSED
+    cb.record_failure()
+    assert cb.state == cb.OPEN
+    try:
+        cb.before_call()
+        assert False, "expected CircuitOpenError"
+    except CircuitOpenError as exc:
+        assert 0 < exc.retry_after <= 10
+    assert cb.stats()["rejected"] == 1
+
+
+def test_breaker_half_open_allows_one_trial():
+    cb = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    with patch("app.resilience.time.monotonic", return_value=100.0):
+        cb.record_failure()
+    with patch("app.resilience.time.monotonic", return_value=111.0):
+        cb.before_call()
+        assert cb.state == cb.HALF_OPEN
+        try:
+            cb.before_call()
+            assert False, "expected CircuitOpenError"
+        except CircuitOpenError:
+            pass
+        cb.record_failure()
+        assert cb.state == cb.OPEN
+    with patch("app.resilience.time.monotonic", return_value=122.0):
+        cb.before_call()
+        cb.record_success()
+    assert cb.state == cb.CLOSED
+    assert cb.stats()["opens"] == 2
+
+
+def test_upstream_failure_classification():
+    assert is_upstream_failure(httpx.ConnectError("refused"))
+    assert is_upstream_failure(TimeoutError())
+    assert is_upstream_failure(APIError({"message": "bad gateway", "code": 502}))
+    assert is_upstream_failure(APIError({"message": "no connection", "code": "PGRST001"}))
+    assert is_upstream_failure(APIError({"message": "timeout", "code": "57014"}))
+    assert not is_upstream_failure(APIError({"message": "fk", "code": "23503"}))
+    assert not is_upstream_failure(APIError({"message": "not found", "code": 404}))
+    assert not is_upstream_failure(ValueError("bad input"))
+
+
+def _query(*results):
+    query = Mock()
+    query.execute.side_effect = list(results)
+    return query
+
+
+@patch("app.supabase_client.settings.supabase_retry_backoff", 0.0)
+def test_read_is_retried_after_upstream_failure():
+    query = _query(httpx.ConnectError("refused"), Mock(data=[{"id": "a"}]))
+    assert asyncio.run(execute(query, read=True)).data == [{"id": "a"}]
+    assert query.execute.call_count == 2
+    assert query.request.retry_enabled is False
+    assert breaker.stats()["read_retries"] == 1
+    assert breaker.state == breaker.CLOSED
+
+
+def test_write_is_not_retried():
+    query = _query(httpx.ConnectError("refused"), Mock(data=[]))
+    try:
+        asyncio.run(execute(query))
+        assert False, "expected ConnectError"
+    except httpx.ConnectError:
+        pass
+    assert query.execute.call_count == 1
+    assert breaker.failures == 1
+
+
+def test_request_errors_do_not_trip_breaker():
+    query = _query(*[APIError({"message": "fk", "code": "23503"})] * 10)
+    for _ in range(10):
+        try:
+            asyncio.run(execute(query, read=True))
+        except APIError:
+            pass
+    assert query.execute.call_count == 10
+    assert breaker.state == breaker.CLOSED
+
+
+@patch("app.supabase_client.settings.supabase_read_deadline", 0.05)
+def test_read_deadline_bounds_slow_upstream():
+    def slow():
+        time.sleep(0.2)
+        return Mock(data=[])
+
+    query = Mock()
+    query.execute.side_effect = slow
+    try:
+        asyncio.run(execute(query, read=True))
+        assert False, "expected TimeoutError"
+    except TimeoutError:
+        pass
+    assert breaker.failures == 1
+
+
+def test_cancelled_trial_call_lets_the_next_call_try():
+    def slow():
+        time.sleep(0.1)
+        return Mock(data=[])
+
+    query = Mock()
+    query.execute.side_effect = slow
+
+    async def scenario():
+        breaker.state, breaker.opened_at = breaker.OPEN, time.monotonic() - breaker.reset_timeout
+        trial = asyncio.ensure_future(execute(query))
+        await asyncio.sleep(0.01)
+        assert breaker.state == breaker.HALF_OPEN
+        trial.cancel()
+        try:
+            await trial
+            assert False, "expected CancelledError"
+        except asyncio.CancelledError:
+            pass
+        return await execute(query)
+
+    assert asyncio.run(scenario()).data == []
+    assert breaker.state == breaker.CLOSED
+
+
+def _experiments_table(mock_get_supabase):
+    mock_table = Mock()
+    mock_query = mock_table.select.return_value.order.return_value.order.return_value.limit.return_value
+    mock_get_supabase.return_value.table.return_value = mock_table
+    return mock_query
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_stale_rows_served_when_upstream_is_down(mock_get_supabase, client):
+    mock_query = _experiments_table(mock_get_supabase)
+    mock_query.execute.return_value = Mock(
+        data=[
+            {
+                "id": "00000000-0000-0000-0000-000000000001",
+                "title": "T",
+                "description": "",
+                "dependencies": [],
+                "next_action": "",
+                "status": "planned",
+                "notes": "",
+                "created_at": "2024-01-01T00:00:00+00:00",
+                "updated_at": "2024-01-01T00:00:00+00:00",
+            }
+        ]
+    )
+    r = client.get("/experiments")
+    assert r.status_code == 200
+    assert "x-stale" not in r.headers
+
+    with patch.object(read_cache, "ttl_seconds", 0.0), patch.object(read_cache, "stale_seconds", 60.0):
+        mock_query.execute.side_effect = httpx.ConnectError("refused")
+        r = client.get("/experiments")
+    assert r.status_code == 200
+    assert r.headers["x-stale"] == "true"
+    assert "age" in r.headers
+    assert r.json()["items"][0]["title"] == "T"
+    assert read_cache.stats()["stale_hits"] == 1
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_open_circuit_fails_fast_with_retry_after(mock_get_supabase, client):
+    mock_query = _experiments_table(mock_get_supabase)
+    mock_query.execute.side_effect = httpx.ConnectError("refused")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    r = client.get("/experiments")
+    assert r.status_code == 503
+    assert int(r.headers["retry-after"]) >= 1
+    assert mock_query.execute.call_count == 0
+    assert client.get("/health/upstream").json()["state"] == "open"
@@ -0,0 +1,49 @@
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+
+def _hit(kind="experiment", title="Spaced repetition", rank=0.5):
+    return {
+        "kind": kind,
+        "id": str(uuid4()),
+        "title": title,
+        "snippet": f"<mark>{title}</mark> trial",
+        "rank": rank,
+        "updated_at": "2025-01-01T00:00:00",
+    }
+
+
+@patch("app.routers.search.get_supabase")
+def test_search_returns_ranked_hits(mock_get_supabase, client):
+    hits = [_hit(rank=0.9), _hit(kind="service_entry", title="Shelter", rank=0.4)]
+    mock_get_supabase.return_value.rpc.return_value.execute.return_value = Mock(data=hits)
+
+    r = client.get("/search", params={"q": " recall "})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["query"] == "recall"
+    assert [item["kind"] for item in body["items"]] == ["experiment", "service_entry"]
+    assert body["items"][0]["snippet"] == "<mark>Spaced repetition</mark> trial"
+    assert body["next_offset"] is None
+    mock_get_supabase.return_value.rpc.assert_called_once_with(
+        "search_all", {"query": "recall", "kinds": None, "result_limit": 21, "result_offset": 0}
+    )
+
+
+@patch("app.routers.search.get_supabase")
+def test_search_next_offset_when_more_hits(mock_get_supabase, client):
+    mock_get_supabase.return_value.rpc.return_value.execute.return_value = Mock(data=[_hit() for _ in range(3)])
+
+    r = client.get("/search", params={"q": "recall", "limit": 2, "offset": 4, "kind": ["experiment", "learning_goal"]})
+    assert r.status_code == 200
+    assert len(r.json()["items"]) == 2
+    assert r.json()["next_offset"] == 6
+    params = mock_get_supabase.return_value.rpc.call_args.args[1]
+    assert params["kinds"] == ["experiment", "learning_goal"]
+    assert params["result_offset"] == 4
+
+
+def test_search_rejects_blank_query(client):
+    assert client.get("/search", params={"q": "  "}).status_code == 400
+    assert client.get("/search").status_code == 422
+    assert client.get("/search", params={"q": "x", "kind": "notes"}).status_code == 422
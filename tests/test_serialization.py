@@ -0,0 +1,55 @@
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from app.projection import projection_model
+from app.schemas.learning import LearningGoalResponse
+from app.schemas.service import ServiceEntryResponse
+from app.serialization import ORJSONResponse, dump_rows, rows_response
+
+ROWS = [
+    {
+        "id": "00000000-0000-0000-0000-00000000000%d" % i,
+        "date": "2024-01-0%d" % (i + 1),
+        "description": "Shift é",
+        "hours": 2.5,
+        "reflection": "",
+        "created_at": "2024-01-01T00:00:00+00:00",
+        "updated_at": "2024-01-02T00:00:00Z",
+    }
+    for i in range(3)
+]
+
+
+def test_rows_response_matches_model_encoding():
+    response = rows_response(ServiceEntryResponse, ROWS, "next", {"ETag": 'W/"x"'})
+    expected = {
+        "items": [jsonable_encoder(ServiceEntryResponse.model_validate(row)) for row in ROWS],
+        "next_cursor": "next",
+    }
+    assert json.loads(response.body) == expected
+    assert response.headers["ETag"] == 'W/"x"'
+    assert response.media_type == "application/json"
+
+
+def test_dump_rows_uses_projection_fields_only():
+    model = projection_model(ServiceEntryResponse, ("id", "hours"))
+    body = ORJSONResponse(dump_rows(model, ROWS)).body
+    assert json.loads(body) == [{"id": row["id"], "hours": 2.5} for row in ROWS]
+
+
+def test_dump_rows_keeps_nested_models():
+    row = {
+        "id": "00000000-0000-0000-0000-000000000001",
+        "title": "Rust",
+        "target_hours": None,
+        "progress_percent": 0,
+        "logged_hours": 3,
+        "notes": "",
+        "resources": [],
+        "weekly_hours": [{"week_key": "2024-W01", "hours": 3}],
+        "created_at": "2024-01-01T00:00:00Z",
+        "updated_at": "2024-01-01T00:00:00Z",
+    }
+    [item] = json.loads(ORJSONResponse(dump_rows(LearningGoalResponse, [row])).body)
+    assert item["weekly_hours"] == [{"week_key": "2024-W01", "hours": 3.0}]
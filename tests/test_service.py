@@ -1,6 +1,8 @@
 from unittest.mock import Mock, patch
 from uuid import uuid4
 
+from app.pagination import decode_cursor
+
 
 def _entry_row(entry_id=None, description="Helped at shelter", **kwargs):
     row = {
@@ -19,28 +21,44 @@ def _entry_row(entry_id=None, description="Helped at shelter", **kwargs):
 @patch("app.routers.service.get_supabase")
 def test_list_entries_empty(mock_get_supabase, client):
     mock_table = Mock()
-    mock_table.select.return_value.order.return_value.execute.return_value = Mock(data=[])
+    mock_table.select.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[])
     mock_get_supabase.return_value.table.return_value = mock_table
 
     r = client.get("/service/entries")
     assert r.status_code == 200
-    assert r.json() == []
+    assert r.json() == {"items": [], "next_cursor": None}
 
 
 @patch("app.routers.service.get_supabase")
 def test_list_entries_returns_items(mock_get_supabase, client):
     row = _entry_row()
     mock_table = Mock()
-    mock_table.select.return_value.order.return_value.execute.return_value = Mock(data=[row])
+    mock_table.select.return_value.order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[row])
     mock_get_supabase.return_value.table.return_value = mock_table
 
     r = client.get("/service/entries")
     assert r.status_code == 200
-    data = r.json()
+    data = r.json()["items"]
     assert len(data) == 1
     assert data[0]["description"] == row["description"]
 
 
+@patch("app.routers.service.get_supabase")
+def test_list_entries_cursor_uses_date(mock_get_supabase, client):
+    rows = [_entry_row(date="2025-01-20"), _entry_row(date="2025-01-10")]
+    mock_table = Mock()
+    mock_query = mock_table.select.return_value.order.return_value.order.return_value
+    mock_query.limit.return_value.execute.return_value = Mock(data=rows)
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get("/service/entries", params={"limit": 1})
+    assert r.status_code == 200
+    body = r.json()
+    assert len(body["items"]) == 1
+    assert decode_cursor(body["next_cursor"], "date") == ("2025-01-20", rows[0]["id"])
+    mock_table.select.return_value.order.assert_called_once_with("date", desc=True)
+
+
 @patch("app.routers.service.get_supabase")
 def test_get_entry_ok(mock_get_supabase, client):
     entry_id = uuid4()
@@ -54,6 +72,27 @@ def test_get_entry_ok(mock_get_supabase, client):
     assert r.json()["id"] == str(entry_id)
 
 
+@patch("app.routers.service.get_supabase")
+def test_get_entry_conditional(mock_get_supabase, client):
+    entry_id = uuid4()
+    row = _entry_row(entry_id=entry_id)
+    mock_table = Mock()
+    mock_table.select.return_value.eq.return_value.execute.return_value = Mock(data=[row])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get(f"/service/entries/{entry_id}")
+    etag = r.headers["etag"]
+    assert not etag.startswith("W/")
+
+    r = client.get(f"/service/entries/{entry_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+
+    r = client.get(f"/service/entries/{entry_id}", headers={"If-None-Match": '"stale"'})
+    assert r.status_code == 200
+
+
 @patch("app.routers.service.get_supabase")
 def test_get_entry_404(mock_get_supabase, client):
     mock_table = Mock()
@@ -112,3 +151,102 @@ def test_delete_entry_404(mock_get_supabase, client):
 
     r = client.delete(f"/service/entries/{uuid4()}")
     assert r.status_code == 404
+
+
+@patch("app.routers.service.get_supabase")
+def test_create_entries_batch_single_insert(mock_get_supabase, client):
+    rows = [_entry_row(description=f"Entry {i}") for i in range(3)]
+    mock_table = Mock()
+    mock_table.insert.return_value.execute.return_value = Mock(data=rows)
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    items = [{"date": "2025-02-01", "description": f"Entry {i}", "hours": 1.0} for i in range(3)]
+    r = client.post("/service/entries:batch", json={"items": items})
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [res["status"] for res in results] == [201, 201, 201]
+    assert [res["item"]["description"] for res in results] == ["Entry 0", "Entry 1", "Entry 2"]
+    mock_table.insert.assert_called_once()
+    assert len(mock_table.insert.call_args.args[0]) == 3
+
+
+def test_create_entries_batch_rejects_empty(client):
+    r = client.post("/service/entries:batch", json={"items": []})
+    assert r.status_code == 422
+
+
+@patch("app.routers.service.get_supabase")
+def test_service_stats(mock_get_supabase, client):
+    mock_rpc = mock_get_supabase.return_value.rpc
+    mock_rpc.return_value.execute.return_value = Mock(
+        data=[
+            {"period": "2025-01-01", "total_hours": 6, "entry_count": 2, "avg_hours": 3},
+            {"period": "2025-02-01", "total_hours": 2, "entry_count": 2, "avg_hours": 1},
+        ]
+    )
+
+    r = client.get("/service/stats", params={"group_by": "month", "from": "2025-01-01"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["total_hours"] == 8
+    assert body["entry_count"] == 4
+    assert body["avg_hours"] == 2
+    assert [b["period"] for b in body["buckets"]] == ["2025-01-01", "2025-02-01"]
+    mock_rpc.assert_called_once_with(
+        "service_hours_stats", {"group_by": "month", "date_from": "2025-01-01", "date_to": None}
+    )
+
+
+def test_service_stats_rejects_bad_group_by(client):
+    r = client.get("/service/stats", params={"group_by": "day"})
+    assert r.status_code == 422
+
+
+def test_service_stats_rejects_inverted_range(client):
+    r = client.get("/service/stats", params={"from": "2025-02-01", "to": "2025-01-01"})
+    assert r.status_code == 400
+
+
+@patch("app.routers.service.get_supabase")
+def test_export_entries_csv(mock_get_supabase, client):
+    row = _entry_row(description="Shelter, evening shift")
+    mock_table = Mock()
+    mock_query = mock_table.select.return_value.order.return_value.order.return_value
+    mock_query.limit.return_value.execute.return_value = Mock(data=[row])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get("/service/entries/export", params={"format": "csv"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    assert 'filename="service_entries.csv"' in r.headers["content-disposition"]
+    header, line = r.text.splitlines()
+    assert header == "id,date,description,hours,reflection,created_at,updated_at"
+    assert '"Shelter, evening shift"' in line
+
+
+@patch("app.routers.service.get_supabase")
+def test_list_entries_filters_by_date_range_and_hours(mock_get_supabase, client):
+    mock_table = Mock()
+    mock_from = mock_table.select.return_value.gte
+    mock_to = mock_from.return_value.lte
+    mock_hours = mock_to.return_value.gte
+    mock_order = mock_hours.return_value.order
+    mock_order.return_value.order.return_value.limit.return_value.execute.return_value = Mock(data=[_entry_row()])
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    r = client.get(
+        "/service/entries",
+        params={"date_from": "2025-01-01", "date_to": "2025-01-31", "min_hours": 1.5, "sort": "-hours"},
+    )
+    assert r.status_code == 200
+    assert len(r.json()["items"]) == 1
+    mock_from.assert_called_once_with("date", "2025-01-01")
+    mock_to.assert_called_once_with("date", "2025-01-31")
+    mock_hours.assert_called_once_with("hours", 1.5)
+    mock_order.assert_called_once_with("hours", desc=True)
+
+
+def test_list_entries_rejects_inverted_date_range(client):
+    r = client.get("/service/entries", params={"date_from": "2025-02-01", "date_to": "2025-01-01"})
+    assert r.status_code == 400
+    assert client.get("/service/entries", params={"min_hours": -1}).status_code == 422
@@ -0,0 +1,133 @@
+import sqlite3
+import time
+from unittest.mock import Mock, patch
+
+from app.cache import ReadCache
+from app.shared_cache import SharedCache
+
+KEY = ("experiments", "list", None)
+
+
+def _workers(tmp_path, count=2):
+    """Read caches of ``count`` workers sharing one SQLite file, each with its own connection."""
+    path = str(tmp_path / "cache.db")
+    return [ReadCache(60, 10, shared=SharedCache(path, 60, 100)) for _ in range(count)]
+
+
+def test_rows_cached_by_one_worker_are_hits_in_another(tmp_path):
+    a, b = _workers(tmp_path)
+    a.set(KEY, [{"id": "x"}])
+    a.shared.flush()
+    assert b.get(KEY) == (True, [{"id": "x"}])
+    assert b.stats()["shared_hits"] == 1
+    # now in b's own memory
+    assert b.get(KEY) == (True, [{"id": "x"}])
+    assert b.stats()["shared_hits"] == 1
+
+
+def test_write_in_one_worker_invalidates_the_others(tmp_path):
+    a, b = _workers(tmp_path)
+    b.set(KEY, [{"id": "x"}])
+    b.set(("service_entries", "list"), [])
+    assert b.get(KEY)[0] is True
+
+    assert a.invalidate("experiments") == 1
+    assert b.generation("experiments") == 1
+    assert b.get(KEY) == (False, None)
+    assert b.get_stale(KEY)[0] is False
+    assert b.get(("service_entries", "list")) == (True, [])
+
+
+def test_rows_read_before_a_write_are_not_shared(tmp_path):
+    a, b = _workers(tmp_path)
+    generation = a.generation("experiments")
+    b.invalidate("experiments")
+    a.set(KEY, [{"id": "old"}], generation)
+    a.shared.flush()
+    assert b.get(KEY) == (False, None)
+    assert a.get(KEY) == (False, None)
+
+
+def test_shared_entries_expire(tmp_path):
+    shared = SharedCache(str(tmp_path / "cache.db"), 10, 100)
+    with patch("app.shared_cache.time.time", return_value=1000.0):
+        shared.set("k", "experiments", 0, [1])
+        shared.flush()
+    with patch("app.shared_cache.time.time", return_value=1005.0):
+        assert shared.get("k", 0) == (5.0, [1])
+    with patch("app.shared_cache.time.time", return_value=1011.0):
+        assert shared.get("k", 0) is None
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_graph_reloads_after_a_write_in_another_worker(mock_get_supabase, client, tmp_path):
+    this, other = _workers(tmp_path)
+    mock_table = Mock()
+    graph_reads = mock_table.select.return_value.order.return_value.order.return_value.limit.return_value.execute
+    graph_reads.return_value = Mock(data=[])
+    mock_table.delete.return_value.eq.return_value.execute.return_value = Mock(data=None)
+    mock_get_supabase.return_value.table.return_value = mock_table
+
+    with patch("app.graph.read_cache", this), patch("app.events.read_cache", this):
+        client.get("/experiments/graph")
+        # a write in this worker updates the graph in place
+        client.delete("/experiments/00000000-0000-0000-0000-000000000001")
+        client.get("/experiments/graph")
+        assert graph_reads.call_count == 1
+
+        other.invalidate("experiments")
+        client.get("/experiments/graph")
+        assert graph_reads.call_count == 2
+
+
+def test_a_locked_file_does_not_stall_the_event_loop(tmp_path):
+    path = str(tmp_path / "cache.db")
+    shared, other = SharedCache(path, 60, 100), SharedCache(path, 60, 100)
+    shared.version("experiments")
+    other_worker = sqlite3.connect(path, isolation_level=None)
+    other_worker.execute("begin immediate")
+
+    start = time.monotonic()
+    # stored by the writer thread once the lock is free
+    shared.set("k", "experiments", 0, [1])
+    # the bump is retried off the loop; this worker's version moves at once
+    assert shared.bump("experiments") == 1
+    assert time.monotonic() - start < 1
+    assert shared.stats()["unsynced_bumps"] == 1
+
+    other_worker.execute("commit")
+    shared.flush()
+    assert shared.stats()["unsynced_bumps"] == 0
+    assert shared.version("experiments") == other.version("experiments") == 1
+    # stored under version 0 before the bump landed, so never served
+    assert shared.get("k", 1) is None
+
+
+@patch("app.routers.experiments.get_supabase")
+def test_write_with_the_file_locked_succeeds(mock_get_supabase, client, tmp_path):
+    this, other = _workers(tmp_path)
+    created = {
+        "id": "00000000-0000-0000-0000-000000000001",
+        "title": "New",
+        "description": "",
+        "dependencies": [],
+        "next_action": "",
+        "status": "not_started",
+        "notes": "",
+        "created_at": "2024-01-01T00:00:00+00:00",
+        "updated_at": "2024-01-01T00:00:00+00:00",
+    }
+    mock_table = Mock()
+    mock_table.insert.return_value.execute.return_value = Mock(data=[created])
+    mock_get_supabase.return_value.table.return_value = mock_table
+    other_worker = sqlite3.connect(this.shared.path, isolation_level=None)
+    this.generation("experiments")
+    other_worker.execute("begin immediate")
+
+    with patch("app.events.read_cache", this), patch("app.graph.read_cache", this):
+        r = client.post("/experiments", json={"title": "New"})
+    other_worker.execute("commit")
+    assert r.status_code == 201
+    assert mock_table.insert.return_value.execute.call_count == 1
+    this.shared.flush()
+    assert other.generation("experiments") == 1
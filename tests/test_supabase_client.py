@@ -0,0 +1,76 @@
+import asyncio
+from unittest.mock import Mock, patch
+
+from app import supabase_client
+
+
+def test_pool_stats_before_client(client):
+    r = client.get("/health/pool")
+    assert r.status_code == 200
+    assert r.json()["connections"] == 0
+    assert r.json()["max_connections"] == supabase_client.settings.supabase_max_connections
+
+
+@patch("app.supabase_client.settings")
+def test_http_client_uses_settings(mock_settings):
+    mock_settings.supabase_http2 = False
+    mock_settings.supabase_max_connections = 7
+    mock_settings.supabase_max_keepalive_connections = 3
+    mock_settings.supabase_keepalive_expiry = 12.0
+    mock_settings.supabase_connect_timeout = 1.0
+    mock_settings.supabase_read_timeout = 2.0
+    mock_settings.supabase_write_timeout = 3.0
+    mock_settings.supabase_pool_timeout = 4.0
+    http = supabase_client._build_http_client()
+    try:
+        assert http.timeout.connect == 1.0
+        assert http.timeout.read == 2.0
+        assert http.timeout.pool == 4.0
+        assert http._transport._pool._max_connections == 7
+        assert http._transport._pool._max_keepalive_connections == 3
+    finally:
+        http.close()
+
+
+@patch("app.supabase_client.settings")
+@patch("app.supabase_client.get_supabase")
+def test_open_client_skips_without_credentials(mock_get_supabase, mock_settings):
+    mock_settings.supabase_url = ""
+    asyncio.run(supabase_client.open_client())
+    mock_get_supabase.assert_not_called()
+
+
+@patch("app.supabase_client.settings")
+@patch("app.supabase_client.get_supabase")
+def test_open_client_warms_connections(mock_get_supabase, mock_settings):
+    mock_settings.supabase_url = "http://db"
+    mock_settings.supabase_key = "key"
+    mock_settings.supabase_warm_connections = 3
+    mock_settings.supabase_max_concurrency = 4
+    query = mock_get_supabase.return_value.table.return_value.select.return_value.limit.return_value
+    query.execute.return_value = Mock(data=[])
+    asyncio.run(supabase_client.open_client())
+    assert query.execute.call_count == 3
+    supabase_client.close_executor()
+
+
+@patch("app.supabase_client.settings")
+@patch("app.supabase_client.get_supabase")
+def test_open_client_survives_failed_warm_up(mock_get_supabase, mock_settings, caplog):
+    mock_settings.supabase_url = "http://db"
+    mock_settings.supabase_key = "key"
+    mock_settings.supabase_warm_connections = 1
+    mock_settings.supabase_max_concurrency = 1
+    query = mock_get_supabase.return_value.table.return_value.select.return_value.limit.return_value
+    query.execute.side_effect = ConnectionError("refused")
+    asyncio.run(supabase_client.open_client())
+    assert "warm-up failed" in caplog.text
+    supabase_client.close_executor()
+
+
+def test_close_client_closes_http_pool():
+    http = Mock()
+    with patch.object(supabase_client, "_http", http), patch.object(supabase_client, "_client", Mock()):
+        supabase_client.close_client()
+        http.close.assert_called_once()
+        assert supabase_client._client is None
@@ -0,0 +1,129 @@
+import time
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+from app.changes import advance
+from app.routers.sync import decode_token, encode_token
+
+OLD = "2024-01-01T00:00:00+00:00"
+
+
+def _goal(updated_at=OLD):
+    return {
+        "id": str(uuid4()),
+        "title": "Rust",
+        "target_hours": 10,
+        "progress_percent": 0,
+        "logged_hours": 0,
+        "notes": "",
+        "resources": [],
+        "weekly_hours": [{"week_key": "2024-W02", "hours": 1}, {"week_key": "2024-W01", "hours": 2}],
+        "created_at": OLD,
+        "updated_at": updated_at,
+    }
+
+
+def _entry(updated_at=OLD):
+    return {
+        "id": str(uuid4()),
+        "date": "2024-01-01",
+        "description": "Shelter",
+        "hours": 2,
+        "reflection": "",
+        "created_at": OLD,
+        "updated_at": updated_at,
+    }
+
+
+def _tables(data: dict[str, list]) -> dict[str, Mock]:
+    """One mock per table; ``execute`` returns ``data[table]`` with or without a seek filter."""
+    tables = {}
+    for name, rows in data.items():
+        table = Mock()
+        ordered = table.select.return_value.order.return_value.order.return_value
+        ordered.limit.return_value.execute.return_value = Mock(data=rows)
+        seeked = table.select.return_value.or_.return_value.order.return_value.order.return_value
+        seeked.limit.return_value.execute.return_value = Mock(data=rows)
+        tables[name] = table
+    return tables
+
+
+def _token(**positions):
+    base = {"learning_goals": None, "experiments": None, "service_entries": None, "deleted_records": None}
+    return encode_token({**base, **positions}, time.time())
+
+
+@patch("app.routers.sync.get_supabase")
+def test_full_sync_returns_every_table_without_tombstones(mock_get_supabase, client):
+    goal, entry = _goal(), _entry()
+    tables = _tables({"learning_goals": [goal], "experiments": [], "service_entries": [entry]})
+    mock_get_supabase.return_value.table.side_effect = tables.__getitem__
+
+    r = client.get("/sync")
+    assert r.status_code == 200
+    body = r.json()
+    assert [g["id"] for g in body["changes"]["learning_goals"]] == [goal["id"]]
+    assert [w["week_key"] for w in body["changes"]["learning_goals"][0]["weekly_hours"]] == ["2024-W01", "2024-W02"]
+    assert body["changes"]["experiments"] == []
+    assert body["changes"]["service_entries"][0]["id"] == entry["id"]
+    assert body["deleted"] == []
+    assert body["has_more"] is False
+    positions, _ = decode_token(body["next_token"])
+    assert positions["service_entries"] == [OLD, entry["id"]]
+    assert positions["experiments"] is None
+    assert positions["deleted_records"][1] == 0
+    tables["service_entries"].select.return_value.or_.assert_not_called()
+
+
+@patch("app.routers.sync.get_supabase")
+def test_incremental_sync_seeks_and_returns_tombstones(mock_get_supabase, client):
+    entries = [_entry(), _entry()]
+    deleted_id = str(uuid4())
+    tombstone = {"id": 7, "table_name": "experiments", "row_id": deleted_id, "deleted_at": OLD}
+    tables = _tables(
+        {"learning_goals": [], "experiments": [], "service_entries": entries, "deleted_records": [tombstone]}
+    )
+    mock_get_supabase.return_value.table.side_effect = tables.__getitem__
+    since = _token(service_entries=["2023-12-01T00:00:00+00:00", str(uuid4())], deleted_records=[OLD, 3])
+
+    r = client.get("/sync", params={"since": since, "limit": 1})
+    assert r.status_code == 200
+    body = r.json()
+    assert [e["id"] for e in body["changes"]["service_entries"]] == [entries[0]["id"]]
+    assert body["deleted"] == [{"table": "experiments", "id": deleted_id, "deleted_at": "2024-01-01T00:00:00Z"}]
+    assert body["has_more"] is True
+    positions, _ = decode_token(body["next_token"])
+    assert positions["service_entries"] == [OLD, entries[0]["id"]]
+    assert positions["deleted_records"] == [OLD, 7]
+    assert positions["learning_goals"] is None
+    seek_filter = tables["service_entries"].select.return_value.or_.call_args[0][0]
+    assert seek_filter.startswith('updated_at.gt."2023-12-01T00:00:00+00:00"')
+    tables["deleted_records"].select.assert_called_once_with("id,table_name,row_id,deleted_at")
+
+
+def test_invalid_sync_token_400(client):
+    r = client.get("/sync", params={"since": "not-a-token"})
+    assert r.status_code == 400
+
+
+def test_expired_sync_token_410(client):
+    positions = {"learning_goals": None, "experiments": None, "service_entries": None, "deleted_records": None}
+    r = client.get("/sync", params={"since": encode_token(positions, time.time() - 90 * 86400)})
+    assert r.status_code == 410
+
+
+def test_position_stays_behind_horizon_for_recent_rows():
+    horizon = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    recent = _entry("2024-06-01T00:00:10+00:00")
+    rows, position, more = advance("service_entries", [recent], 10, None, horizon)
+    assert rows == [recent]
+    assert position == [horizon.isoformat(), "00000000-0000-0000-0000-000000000000"]
+    assert more is False
+
+    # a full page always moves forward, or the client would loop
+    rows, position, more = advance("service_entries", [recent, _entry()], 1, None, horizon)
+    assert position == [recent["updated_at"], recent["id"]]
+    assert more is True
+
+    assert advance("service_entries", [], 10, [OLD, "x"], horizon) == ([], [OLD, "x"], False)